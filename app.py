@@ -1,8 +1,8 @@
 import streamlit as st
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
-from PIL import Image as PILImage
+from PIL import Image as PILImage, ImageOps
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 from reportlab.lib.utils import ImageReader
@@ -11,25 +11,57 @@ from reportlab.platypus import Table, TableStyle, Paragraph
 from reportlab.lib.styles import getSampleStyleSheet
 import os
 import io
-import json
 import yagmail
 import tempfile
 import shutil
 
-from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaIoBaseUpload
 from googleapiclient.errors import HttpError
 
 import sqlite3
 import hashlib
+import html
 import base64
 
+from diario_obra_flowables import gerar_pdf_fluxo
+from banco_registros import conectar as conectar_registros, salvar_registro, listar_obras
+from horas_trabalhadas import AGRUPAMENTOS, consultar_horas, recalcular_agregados
+from artefatos import criar_saida_pdf, salvar_artefato, novo_artefato, iniciar_limpeza_artefatos, TAMANHO_BLOCO_UPLOAD
+from drive_arquivos import enviar_diario, credenciais_drive, criar_servico_drive, servico_da_thread
+from catalogo_drive import (
+    conectar_catalogo, sincronizar_catalogo, ultima_sincronizacao, listar_obras_no_drive,
+    listar_diarios_no_drive, diario_no_drive
+)
+from holerite_page import render_holerite_page
+from aquecimento import iniciar_aquecimento, estado_aquecimento, logo_pdf
+from registro_modelo import Registro, EntradaEfetivo
+from previa_diario import gerar_previa_html
+from upload_fotos import upload_fotos_navegador, FotoRedimensionada, LADO_MAXIMO_FOTO
+from busca_registros import buscar_registros, destacar_snippet
+from catalogo_fotos import (
+    catalogar_fotos, metadados_exif, listar_obras_com_fotos, contar_fotos, listar_fotos,
+    gerar_galeria_html, caminho_foto, FOTOS_POR_PAGINA
+)
+from exportacao import exportar, FORMATOS as FORMATOS_EXPORTACAO
+from importacao_usuarios import (
+    criar_indice_usuarios, listar_usuarios_repetidos, remover_cadastro, ler_usuarios_csv, importar_usuarios,
+    contar_usuarios, listar_usuarios, gerar_csv_senhas, PERFIS, USUARIOS_POR_PAGINA
+)
+from arquivo_mensal import (
+    arquivar_meses_fechados, formatar_relatorio, guardar_pdf_diario, ler_foto_arquivada, ler_pdf_diario
+)
+from layout_fotos import LAYOUTS_FOTOS, LAYOUT_FOTOS_PADRAO, paginas_grade, fotos_apendice, desenhar_grade_canvas
+
 # ========== CONSTANTES ==========
 DRIVE_FOLDER_ID = "1BUgZRcBrKksC3eUytoJ5mv_nhMRdAv1d"
+# O histórico sincroniza sozinho o catálogo do Drive se estiver mais velho que isto
+INTERVALO_SINCRONIA_DRIVE = timedelta(minutes=5)
 LOGO_LOGIN_PATH = "LOGO RDV AZUL.jpeg"
 LOGO_PDF_PATH = "LOGO_RDV_AZUL-sem fundo.png"
 LOGO_ICON_PATH = "LOGO_RDV_AZUL-sem fundo.png"
+# "fluxo": layout paginado (platypus); "canvas": layout fixo de página única
+MODO_LAYOUT_PDF = "fluxo"
 
 def get_img_as_base64(file_path):
     if not os.path.exists(file_path):
@@ -88,11 +120,14 @@ except Exception:
     )
 
 # --- CREDENCIAIS GOOGLE DRIVE ---
+@st.cache_resource
+def carregar_credenciais_drive(info_conta_servico):
+    # Uma vez por processo: todas as sessões usam as mesmas credenciais (e o mesmo token)
+    return credenciais_drive(info_conta_servico)
+
 try:
     creds_dict = dict(st.secrets["google_service_account"])
-    creds = service_account.Credentials.from_service_account_info(
-        creds_dict, scopes=["https://www.googleapis.com/auth/drive"]
-    )
+    creds = carregar_credenciais_drive(creds_dict)
 except Exception:
     st.error("Erro nas credenciais do Google Drive.")
     st.stop()
@@ -107,6 +142,11 @@ def make_hashes(password):
 def create_usertable():
     c.execute('CREATE TABLE IF NOT EXISTS userstable(username TEXT,password TEXT,role TEXT)')
     conn.commit()
+    # Migração do índice único: uma vez por sessão (depois de criado é só uma
+    # consulta ao sqlite_master); com usuários repetidos o admin resolve na
+    # página de usuários
+    if "indice_usuarios" not in st.session_state:
+        st.session_state.indice_usuarios = criar_indice_usuarios(conn)
 
 def add_userdata(username, password, role):
     c.execute('INSERT INTO userstable(username,password,role) VALUES (?,?,?)',(username,password,role))
@@ -119,14 +159,9 @@ def login_user(username, password):
         return True, data[0][2]
     return False, None
 
-def view_all_users():
-    c.execute('SELECT * FROM userstable')
-    data = c.fetchall()
-    return data
-
 def init_db():
     create_usertable()
-    if not view_all_users():
+    if not contar_usuarios(conn):
         add_userdata("admin", make_hashes("admin123"), "admin")
         st.success("Usuário 'admin' criado com senha 'admin123'. Por favor, altere sua senha após o primeiro login.")
 
@@ -152,19 +187,19 @@ def draw_header(c, width, height, logo_path):
     c.drawCentredString(width/2, height-50, "DIÁRIO DE OBRA")
     c.setFont("Helvetica", 12)
     c.drawCentredString(width/2, height-70, "RDV ENGENHARIA")
-    if os.path.exists(logo_path):
-        try:
-            logo = ImageReader(logo_path)
-            c.drawImage(logo, 30, height-70, width=100, height=50, preserveAspectRatio=True) 
-        except Exception:
-            pass
+    try:
+        logo = logo_pdf(logo_path)
+        if logo is not None:
+            c.drawImage(logo, 30, height-70, width=100, height=50, preserveAspectRatio=True)
+    except Exception:
+        pass
 
 def draw_info_table(c, registro, width, height, y_start, margem):
     data = [
-        ["OBRA:", registro.get("Obra", "N/A")],
-        ["LOCAL:", registro.get("Local", "N/A")],
-        ["DATA:", registro.get("Data", "N/A")],
-        ["CONTRATO:", registro.get("Contrato", "N/A")]
+        ["OBRA:", registro.obra or "N/A"],
+        ["LOCAL:", registro.local or "N/A"],
+        ["DATA:", registro.data_br],
+        ["CONTRATO:", registro.contrato or "N/A"]
     ]
     col2_width = width - 100 - (2 * margem)
     table = Table(data, colWidths=[100, col2_width]) 
@@ -178,14 +213,10 @@ def draw_info_table(c, registro, width, height, y_start, margem):
     table.drawOn(c, margem, y_start - table_height)
     return y_start - table_height - 10
 
-def draw_efetivo_table(c, efetivo_data_json, width, height, y_start, margem):
-    try:
-        efetivo_data = json.loads(efetivo_data_json)
-    except json.JSONDecodeError:
-        efetivo_data = [] 
+def draw_efetivo_table(c, efetivo, width, height, y_start, margem):
     data = [["NOME", "FUNÇÃO", "1ª ENTRADA", "1ª SAÍDA"]]
-    for item in efetivo_data:
-        data.append([item.get("Nome", ""), item.get("Função", ""), item.get("Entrada", ""), item.get("Saída", "")])
+    for item in efetivo:
+        data.append([item.nome, item.funcao, item.entrada, item.saida])
     min_rows_display = 6
     while len(data) < min_rows_display + 1:
         data.append(["", "", "", ""])
@@ -216,16 +247,47 @@ def draw_footer(c, width, margem, current_y, registro):
     y_assinatura_name = margem + 15
     c.line(margem + 50, y_assinatura_line, margem + 200, y_assinatura_line)
     c.drawCentredString(margem + 125, y_assinatura_title, "Responsável Técnico")
-    c.drawCentredString(margem + 125, y_assinatura_name, f"Nome: {registro.get('Responsável Empresa', 'Eng. Responsável')}")
+    c.drawCentredString(margem + 125, y_assinatura_name, f"Nome: {registro.responsavel or 'Eng. Responsável'}")
     c.line(width - margem - 200, y_assinatura_line, width - margem - 50, y_assinatura_line)
     c.drawCentredString(width - margem - 125, y_assinatura_title, "Fiscalização")
-    c.drawCentredString(width - margem - 125, y_assinatura_name, f"Nome: {registro.get('Fiscalização', 'Conforme assinatura')}")
+    c.drawCentredString(width - margem - 125, y_assinatura_name, f"Nome: {registro.fiscalizacao or 'Conforme assinatura'}")
     c.setFillColor(black)
     c.setFont("Helvetica", 8)
     c.drawString(margem + 5, margem + 5, f"Gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M')}")
     return margem
 
-def gerar_pdf(registro, fotos_paths):
+def draw_fotos_grade(c, fotos_paths, width, height, margem, colunas, linhas):
+    fotos_validas = [f for f in fotos_paths if Path(f).exists()]
+    titulo_h = 25
+    largura_util = width - 2 * margem
+    altura_util = height - 2 * margem - titulo_h
+    for itens in paginas_grade(fotos_validas, largura_util, altura_util, colunas, linhas):
+        c.showPage()
+        c.setFillColor(black)
+        c.setFont("Helvetica-Bold", 12)
+        c.drawString(margem, height - margem - 12, "Registro Fotográfico")
+        desenhar_grade_canvas(c, itens, margem, height - margem - titulo_h)
+
+def draw_fotos_apendice(c, fotos_paths, width, height, margem):
+    fotos_validas = [f for f in fotos_paths if Path(f).exists()]
+    max_img_width = width - 2 * margem
+    max_img_height = height - 2 * margem - 30
+    for numero, foto_path, img, new_width, new_height in fotos_apendice(fotos_validas, max_img_width, max_img_height):
+        c.showPage()
+        y_foto = height - margem
+        c.setFont("Helvetica-Bold", 12)
+        c.drawString(margem, y_foto, f"Apêndice - Foto {numero}: {Path(foto_path).name}")
+        x_pos_img = margem + (max_img_width - new_width) / 2
+        img_y_pos = y_foto - 20 - new_height - 10
+        c.drawImage(ImageReader(img), x_pos_img, img_y_pos, width=new_width, height=new_height)
+
+def gerar_pdf(registro, fotos_paths, layout_fotos=LAYOUT_FOTOS_PADRAO, apendice_fotos=False, modo_layout=MODO_LAYOUT_PDF):
+    if modo_layout == "fluxo":
+        return gerar_pdf_fluxo(
+            registro, fotos_paths,
+            cabecalho=lambda c, width, height: draw_header(c, width, height, LOGO_PDF_PATH),
+            layout_fotos=layout_fotos, apendice_fotos=apendice_fotos
+        )
     import io
     from reportlab.platypus import Table, TableStyle, Paragraph
     from reportlab.lib.styles import ParagraphStyle
@@ -238,7 +300,7 @@ def gerar_pdf(registro, fotos_paths):
     from pathlib import Path
     from datetime import datetime
 
-    buffer = io.BytesIO()
+    buffer = criar_saida_pdf()
     try:
         c = canvas.Canvas(buffer, pagesize=A4)
         width, height = A4
@@ -257,11 +319,11 @@ def gerar_pdf(registro, fotos_paths):
         c.setFont("Helvetica-Bold", 10)
         c.drawString(margem + 5, y - 15, "Condições do dia:")
         c.setFont("Helvetica", 11)
-        c.drawString(margem + 120, y - 15, registro.get('Clima', 'N/A'))
+        c.drawString(margem + 120, y - 15, registro.clima or 'N/A')
         y -= (box_clima_h + 8)
 
         # --- Bloco Máquinas e Equipamentos ---
-        maquinas_txt = registro.get('Máquinas', '').strip() or 'Nenhuma máquina/equipamento informado.'
+        maquinas_txt = registro.maquinas.strip() or 'Nenhuma máquina/equipamento informado.'
         maquinas_lines = maquinas_txt.count('\n') + 1
         box_maquinas_h = max(28, 12 * maquinas_lines + 18)
         c.rect(margem, y - box_maquinas_h, width - 2*margem, box_maquinas_h)
@@ -273,7 +335,7 @@ def gerar_pdf(registro, fotos_paths):
         y -= (box_maquinas_h + 8)
 
         # --- Serviços Executados ---
-        servicos_txt = registro.get('Serviços', '').strip() or 'Nenhum serviço executado informado.'
+        servicos_txt = registro.servicos.strip() or 'Nenhum serviço executado informado.'
         servicos_lines = servicos_txt.count('\n') + 1
         box_servicos_h = max(32, 12 * servicos_lines + 18)
         c.rect(margem, y - box_servicos_h, width - 2*margem, box_servicos_h)
@@ -290,13 +352,8 @@ def gerar_pdf(registro, fotos_paths):
         y -= 18
 
         # --- Tabela de Efetivo (com quebra de linha no nome) ---
-        try:
-            efetivo_data = json.loads(registro.get("Efetivo", "[]"))
-        except Exception:
-            efetivo_data = []
-
         data = [["NOME", "FUNÇÃO", "1ª ENTRADA", "1ª SAÍDA"]]
-        for item in efetivo_data:
+        for item in registro.efetivo_preenchido:
             nome_style = ParagraphStyle(
                 name='nome_style',
                 fontName='Helvetica',
@@ -304,13 +361,13 @@ def gerar_pdf(registro, fotos_paths):
                 alignment=TA_LEFT,
                 leading=10
             )
-            nome_paragraph = Paragraph(item.get("Nome", ""), nome_style)
-            funcao_paragraph = Paragraph(item.get("Função", ""), nome_style)
+            nome_paragraph = Paragraph(item.nome, nome_style)
+            funcao_paragraph = Paragraph(item.funcao, nome_style)
             data.append([
                 nome_paragraph,
                 funcao_paragraph,
-                item.get("Entrada", ""),
-                item.get("Saída", "")
+                item.entrada,
+                item.saida
             ])
         min_rows_display = 6
         while len(data) < min_rows_display + 1:
@@ -334,7 +391,7 @@ def gerar_pdf(registro, fotos_paths):
         y -= (table_height + 10)
 
         # --- Ocorrências ---
-        ocorrencias_txt = registro.get('Ocorrências', '').strip() or 'Nenhuma ocorrência informada.'
+        ocorrencias_txt = registro.ocorrencias.strip() or 'Nenhuma ocorrência informada.'
         ocorrencias_lines = ocorrencias_txt.count('\n') + 1
         box_ocorrencias_h = max(25, 12 * ocorrencias_lines + 18)
         c.setFont("Helvetica-Bold", 10)
@@ -346,7 +403,7 @@ def gerar_pdf(registro, fotos_paths):
         y -= (box_ocorrencias_h + 10)
 
         # --- Fiscalização ---
-        fiscal_txt = registro.get('Fiscalização', '').strip() or 'N/A'
+        fiscal_txt = registro.fiscalizacao.strip() or 'N/A'
         c.setFont("Helvetica-Bold", 10)
         c.drawString(margem, y - 10, "Fiscalização:")
         y -= 18
@@ -359,37 +416,13 @@ def gerar_pdf(registro, fotos_paths):
         # --- Rodapé (assinaturas) já logo após o conteúdo ---
         draw_footer(c, width, margem, y, registro)
 
-        # --- Fotos nas páginas seguintes ---
-        for i, foto_path in enumerate(fotos_paths):
-            try:
-                if not Path(foto_path).exists():
-                    continue
-                c.showPage()
-                y_foto = height - margem
-                c.setFont("Helvetica-Bold", 12)
-                c.drawString(margem, y_foto, f"📷 Foto {i+1}: {Path(foto_path).name}")
-                c.setFont("Helvetica", 10)
-                y_foto -= 20
-                img = PILImage.open(foto_path)
-                img_width, img_height = img.size
-                max_img_width = width - 2 * margem
-                max_img_height = height - 2 * margem - (height - y_foto)
-                aspect_ratio = img_width / img_height
-                new_width = img_width
-                new_height = img_height
-                if img_width > max_img_width or img_height > max_img_height:
-                    if (max_img_width / aspect_ratio) <= max_img_height:
-                        new_width = max_img_width
-                        new_height = max_img_width / aspect_ratio
-                    else:
-                        new_height = max_img_height
-                        new_width = max_img_height * aspect_ratio
-                    img = img.resize((int(new_width), int(new_height)), PILImage.Resampling.LANCZOS)
-                x_pos_img = margem + (max_img_width - new_width) / 2
-                img_y_pos = y_foto - new_height - 10 
-                c.drawImage(ImageReader(img), x_pos_img, img_y_pos, width=new_width, height=new_height)
-            except Exception:
-                continue
+        # --- Fotos em grade (folha de contatos) nas páginas seguintes ---
+        colunas, linhas = LAYOUTS_FOTOS.get(layout_fotos, LAYOUTS_FOTOS[LAYOUT_FOTOS_PADRAO])
+        draw_fotos_grade(c, fotos_paths, width, height, margem, colunas, linhas)
+
+        # --- Apêndice opcional com as fotos em resolução total ---
+        if apendice_fotos:
+            draw_fotos_apendice(c, fotos_paths, width, height, margem)
 
         c.save()
         buffer.seek(0)
@@ -397,9 +430,20 @@ def gerar_pdf(registro, fotos_paths):
 
     except Exception as e:
         print("Erro ao gerar PDF:", e)
+        buffer.close()
         return None
+
+# Aquecimento em segundo plano já na primeira execução (tela de login), para o
+# primeiro diário não pagar importações, fontes, logo e conexão com o Drive;
+# o PDF de teste passa pelo gerar_pdf acima, no motor configurado
+iniciar_aquecimento(creds, DRIVE_FOLDER_ID, gerar_pdf)
+iniciar_limpeza_artefatos()
+
 def processar_fotos(fotos_upload, obra_nome, data_relatorio):
+    # Retorna os caminhos das fotos processadas e, na mesma ordem, os
+    # metadados EXIF (data de captura, GPS, orientação) para o catálogo
     fotos_processadas_paths = []
+    metadados_fotos = []
     temp_dir_path_obj = None
     try:
         temp_dir_path_obj = Path(tempfile.mkdtemp(prefix="diario_obra_"))
@@ -415,22 +459,34 @@ def processar_fotos(fotos_upload, obra_nome, data_relatorio):
                 if not caminho_foto_temp.exists():
                     raise FileNotFoundError()
                 img = PILImage.open(caminho_foto_temp)
-                img.thumbnail((1200, 1200), PILImage.Resampling.LANCZOS)
-                img.save(caminho_foto_temp, "JPEG", quality=85)
+                # Fotos reduzidas no navegador já vêm na orientação certa e trazem o EXIF à parte
+                exif_navegador = getattr(foto_file, "exif", None)
+                metadados = metadados_exif(exif_navegador if exif_navegador is not None else img.getexif())
+                girar = exif_navegador is None and (metadados["orientacao"] or 1) != 1
+                # Fotos já reduzidas no navegador não são decodificadas e recomprimidas de novo
+                if img.format != "JPEG" or max(img.size) > LADO_MAXIMO_FOTO or girar:
+                    img.draft("RGB", (LADO_MAXIMO_FOTO, LADO_MAXIMO_FOTO))
+                    img = ImageOps.exif_transpose(img)
+                    img.thumbnail((LADO_MAXIMO_FOTO, LADO_MAXIMO_FOTO), PILImage.Resampling.LANCZOS)
+                    if img.mode not in ("RGB", "L"):
+                        img = img.convert("RGB")
+                    img.save(caminho_foto_temp, "JPEG", quality=85)
                 fotos_processadas_paths.append(str(caminho_foto_temp))
+                metadados_fotos.append(metadados)
             except Exception:
                 continue
-        return fotos_processadas_paths
+        return fotos_processadas_paths, metadados_fotos
     except Exception:
         if temp_dir_path_obj and temp_dir_path_obj.exists():
             shutil.rmtree(temp_dir_path_obj)
-        return []
+        return [], []
 
 def upload_para_drive_seguro(pdf_buffer, nome_arquivo):
     try:
         pdf_buffer.seek(0)
-        service = build("drive", "v3", credentials=creds, static_discovery=False)
-        media = MediaIoBaseUpload(pdf_buffer, mimetype='application/pdf', resumable=True)
+        service = criar_servico_drive(creds)
+        media = MediaIoBaseUpload(pdf_buffer, mimetype='application/pdf',
+                                  chunksize=TAMANHO_BLOCO_UPLOAD, resumable=True)
         file_metadata = {'name': nome_arquivo, 'parents': [DRIVE_FOLDER_ID]}
         file = service.files().create(
             body=file_metadata,
@@ -447,12 +503,13 @@ def upload_para_drive_seguro(pdf_buffer, nome_arquivo):
 
 def enviar_email(destinatarios, assunto, corpo_html, drive_id=None):
     try:
+        config_email = st.secrets["email"]
         yag = yagmail.SMTP(
-            user=st.secrets["email"]["user"],
-            password=st.secrets["email"]["password"],
-            host='smtp.gmail.com',
-            port=587,
-            smtp_starttls=True,
+            user=config_email["user"],
+            password=config_email["password"],
+            host=config_email.get("host", 'smtp.gmail.com'),
+            port=int(config_email.get("port", 587)),
+            smtp_starttls=bool(config_email.get("starttls", True)),
             smtp_ssl=False,
             timeout=30
         )
@@ -563,9 +620,32 @@ if st.session_state.logged_in:
     st.sidebar.title(f"Bem-vindo, {st.session_state.username}!")
     st.sidebar.button("Sair", on_click=lambda: st.session_state.clear(), key="logout_button")
 
-    menu = ["Diário de Obra"]
+    def mostrar_estado_aquecimento():
+        aquecimento = estado_aquecimento()
+        if aquecimento["pronto"]:
+            st.caption(f"🟢 Servidor pronto (aquecido em {aquecimento['duracao']:.1f}s)")
+            if aquecimento["erros"] and st.session_state.role == "admin":
+                st.caption("⚠️ Falhas no aquecimento: " + "; ".join(
+                    f"{etapa}: {erro}" for etapa, erro in aquecimento["erros"].items()))
+        else:
+            st.caption("🟡 Preparando o servidor... o primeiro envio pode demorar mais.")
+
+    with st.sidebar:
+        if estado_aquecimento()["pronto"]:
+            mostrar_estado_aquecimento()
+        else:
+            # O aquecimento começa na tela de login do primeiro visitante e pode
+            # terminar depois do login dele: só o aviso é reexecutado até ficar pronto
+            st.fragment(run_every=2)(mostrar_estado_aquecimento)()
+
+    menu = ["Diário de Obra", "Holerites"]
     if st.session_state.role == "admin":
         menu.append("Gerenciamento de Usuários")
+        menu.append("Horas Trabalhadas")
+        menu.append("Exportar Dados")
+        menu.append("Buscar Diários")
+        menu.append("Galeria de Fotos")
+        menu.append("Histórico do Drive")
     choice = st.sidebar.selectbox("Navegar", menu, key="sidebar_menu")
 
     def render_diario_obra_page():
@@ -648,78 +728,126 @@ if st.session_state.logged_in:
                         entrada = st.time_input("Entrada", value=datetime.strptime("08:00", "%H:%M").time(), key=f"colab_entrada_reativo_{i}")
                     with col2:
                         saida = st.time_input("Saída", value=datetime.strptime("17:00", "%H:%M").time(), key=f"colab_saida_reativo_{i}")
-                    efetivo_lista.append({
-                        "Nome": nome,
-                        "Função": funcao,
-                        "Entrada": entrada.strftime("%H:%M"),
-                        "Saída": saida.strftime("%H:%M")
-                    })
+                    efetivo_lista.append(EntradaEfetivo(
+                        nome=nome,
+                        funcao=funcao,
+                        entrada=entrada.strftime("%H:%M"),
+                        saida=saida.strftime("%H:%M")
+                    ))
         st.markdown("---")
         st.subheader("Informações Adicionais")
         ocorrencias = st.text_area("Ocorrências")
         nome_empresa = st.text_input("Responsável pela empresa")
         nome_fiscal = st.text_input("Nome da fiscalização")
-        fotos = st.file_uploader("Fotos do serviço", accept_multiple_files=True, type=["png", "jpg", "jpeg"])
+        # As fotos são reduzidas no navegador; se não for possível, usa o envio original
+        fotos = upload_fotos_navegador("Fotos do serviço", key="fotos_navegador")
+        if fotos is None:
+            fotos = st.file_uploader("Fotos do serviço", accept_multiple_files=True, type=["png", "jpg", "jpeg"])
+        elif fotos:
+            st.caption(f"As fotos são arquivadas no Drive reduzidas a {LADO_MAXIMO_FOTO} px; "
+                       "os originais em tamanho cheio ficam só no aparelho.")
+        col_layout, col_apendice = st.columns(2)
+        with col_layout:
+            layout_fotos = st.selectbox(
+                "Fotos por página",
+                list(LAYOUTS_FOTOS.keys()),
+                index=list(LAYOUTS_FOTOS.keys()).index(LAYOUT_FOTOS_PADRAO)
+            )
+        with col_apendice:
+            apendice_fotos = st.checkbox("Incluir apêndice com fotos em tamanho original", value=False)
+        registro = Registro(
+            obra=obra,
+            data=data,
+            contrato=contrato,
+            local=local,
+            clima=clima,
+            maquinas=maquinas,
+            servicos=servicos,
+            ocorrencias=ocorrencias,
+            responsavel=nome_empresa,
+            fiscalizacao=nome_fiscal,
+            efetivo=efetivo_lista
+        )
+        # Prévia leve da primeira página, atualizada a cada alteração do formulário
+        with st.expander("👁️ Pré-visualização do relatório"):
+            st.html(gerar_previa_html(registro, len(fotos or [])))
+        if obra:
+            conn_drive = conectar_catalogo()
+            try:
+                ja_enviado = diario_no_drive(conn_drive, obra, data)
+            finally:
+                conn_drive.close()
+            if ja_enviado:
+                st.info(f"Já existe um diário desta obra e data no Drive ({ja_enviado[1]}). "
+                        "Salvar de novo substitui o arquivo existente.")
         if st.button("Salvar e Gerar Relatório"):
             temp_dir_obj_for_cleanup = None
             fotos_processed_paths = []
+            metadados_fotos = []
+            pdf_buffer = None
             try:
-                if not obra or obra == "":
-                    st.error("Por favor, selecione a 'Obra'.")
+                erros_validacao = registro.validar()
+                if erros_validacao:
+                    for erro in erros_validacao:
+                        st.error(erro)
                     st.stop()
-                if not contrato or contrato == "":
-                    st.error("Por favor, selecione o 'Contrato'.")
-                    st.stop()
-                if not nome_empresa:
-                    st.error("Por favor, preencha o campo 'Responsável pela empresa'.")
-                    st.stop()
-                registro = {
-                    "Obra": obra,
-                    "Local": local,
-                    "Data": data.strftime("%d/%m/%Y"),
-                    "Contrato": contrato,
-                    "Clima": clima,
-                    "Máquinas": maquinas,
-                    "Serviços": servicos,
-                    "Efetivo": json.dumps(efetivo_lista, ensure_ascii=False),
-                    "Ocorrências": ocorrencias,
-                    "Responsável Empresa": nome_empresa,
-                    "Fiscalização": nome_fiscal
-                }
                 with st.spinner("Processando fotos..."):
-                    fotos_processed_paths = processar_fotos(fotos, obra, data) if fotos else []
+                    fotos_processed_paths, metadados_fotos = processar_fotos(fotos, obra, data) if fotos else ([], [])
                     if fotos_processed_paths:
                         temp_dir_obj_for_cleanup = Path(fotos_processed_paths[0]).parent
                     elif fotos:
                         st.warning("Nenhuma foto foi processada corretamente. O PDF pode não conter imagens.")
                 with st.spinner("Gerando PDF..."):
                     nome_pdf = f"Diario_{obra.replace(' ', '_')}_{data.strftime('%Y-%m-%d')}.pdf"
-                    pdf_buffer = gerar_pdf(registro, fotos_processed_paths)
+                    pdf_buffer = gerar_pdf(registro, fotos_processed_paths, layout_fotos, apendice_fotos)
                     if pdf_buffer is None:
                         st.error("Falha ao gerar o PDF. Verifique os logs.")
                         st.stop()
-                st.download_button(
-                    label="📥 Baixar Relatório PDF",
-                    data=pdf_buffer,
-                    file_name=nome_pdf,
-                    mime="application/pdf",
-                    type="primary"
-                )
+                with st.spinner("Salvando registro..."):
+                    try:
+                        conn_registros = conectar_registros()
+                        try:
+                            salvar_registro(conn_registros, registro, st.session_state.username)
+                        finally:
+                            conn_registros.close()
+                    except Exception as e:
+                        st.warning(f"Relatório gerado, mas não foi possível salvar o registro no banco: {e}")
+                if fotos_processed_paths:
+                    with st.spinner("Catalogando fotos..."):
+                        try:
+                            conn_registros = conectar_registros()
+                            try:
+                                catalogar_fotos(conn_registros, obra, data, fotos_processed_paths, metadados_fotos)
+                            finally:
+                                conn_registros.close()
+                        except Exception as e:
+                            st.warning(f"Não foi possível incluir as fotos na galeria: {e}")
+                # O PDF fica no disco, fora do static serving; só esta sessão
+                # recebe o download
+                caminho_pdf = salvar_artefato(pdf_buffer, nome_pdf)
+                try:
+                    guardar_pdf_diario(pdf_buffer, obra, data)
+                except OSError as e:
+                    st.warning(f"Não foi possível guardar a cópia local do PDF: {e}")
+                st.download_button("📥 Baixar Relatório PDF", caminho_pdf.read_bytes(), file_name=nome_pdf,
+                                   mime="application/pdf", key="baixar_relatorio_pdf")
 # ... (depois de gerar o PDF e antes do envio de e-mail) ...
                 with st.spinner("Enviando para Google Drive..."):
                     try:
-                        # Recria o serviço sempre que for usar (seguro para múltiplos uploads)
-                        service = build("drive", "v3", credentials=creds, static_discovery=False)
-                        pdf_buffer.seek(0)
-                        media = MediaIoBaseUpload(pdf_buffer, mimetype='application/pdf', resumable=True)
-                        file_metadata = {'name': nome_pdf, 'parents': [DRIVE_FOLDER_ID]}
-                        file = service.files().create(
-                            body=file_metadata,
-                            media_body=media,
-                            fields='id',
-                            supportsAllDrives=True
-                        ).execute()
-                        drive_id = file.get("id")
+                        # PDF e fotos sobem em paralelo para obra/ano/mês; fotos reduzidas
+                        # no navegador não têm original no servidor e são nomeadas como tal
+                        arquivos_drive = [(nome_pdf, pdf_buffer, 'application/pdf')]
+                        for i, foto_file in enumerate(fotos or []):
+                            sufixo = "reduzida" if isinstance(foto_file, FotoRedimensionada) else "original"
+                            nome_foto = f"{obra.replace(' ', '_')}_{data.strftime('%Y-%m-%d')}_foto{i+1}_{sufixo}{Path(foto_file.name).suffix}"
+                            arquivos_drive.append((nome_foto, foto_file, foto_file.type or 'image/jpeg'))
+                        ids_drive, erros_drive = enviar_diario(creds, DRIVE_FOLDER_ID, obra, data, arquivos_drive)
+                        if erros_drive.get(nome_pdf):
+                            raise erros_drive[nome_pdf]
+                        fotos_com_erro = [nome for nome in erros_drive if nome != nome_pdf]
+                        if fotos_com_erro:
+                            st.warning(f"{len(fotos_com_erro)} foto(s) não foram enviadas ao Drive.")
+                        drive_id = ids_drive.get(nome_pdf)
                         if drive_id:
                             st.success(f"PDF salvo no Google Drive! ID: {drive_id}")
                             st.markdown(f"[Abrir no Drive](https://drive.google.com/file/d/{drive_id}/view)")
@@ -747,6 +875,8 @@ if st.session_state.logged_in:
                         st.error(f"Falha no upload para o Google Drive. Erro: {e}")
 
             finally:
+                if pdf_buffer is not None:
+                    pdf_buffer.close()
                 try:
                     if temp_dir_obj_for_cleanup and temp_dir_obj_for_cleanup.exists():
                         shutil.rmtree(temp_dir_obj_for_cleanup)
@@ -763,25 +893,333 @@ if st.session_state.logged_in:
         if st.session_state.role != "admin":
             st.warning("Você não tem permissão para acessar esta página.")
             return
+        indice_ok = st.session_state.indice_usuarios = criar_indice_usuarios(conn)
+        if not indice_ok:
+            st.subheader("Usuários Repetidos")
+            st.warning("Há usuários cadastrados mais de uma vez. Remova os cadastros que sobram para "
+                       "liberar o cadastro e a importação de usuários.")
+            for rowid, usuario_repetido, perfil_repetido in listar_usuarios_repetidos(conn):
+                col_usuario, col_perfil, col_remover = st.columns([3, 2, 2])
+                col_usuario.write(usuario_repetido)
+                col_perfil.write(perfil_repetido)
+                if col_remover.button("Remover este cadastro", key=f"remover_repetido_{rowid}"):
+                    remover_cadastro(conn, rowid)
+                    st.rerun()
         st.subheader("Adicionar Novo Usuário")
-        with st.form("add_user_form", key="add_user_form_key"):
+        with st.form("add_user_form"):
             new_username = st.text_input("Nome de Usuário", key="new_username_input")
             new_password = st.text_input("Senha", type="password", key="new_password_input")
-            new_role = st.selectbox("Função", ["user", "admin"], key="new_role_select")
-            add_user_submitted = st.form_submit_button("Adicionar Usuário", key="add_user_submit")
+            new_role = st.selectbox("Função", list(PERFIS), key="new_role_select")
+            add_user_submitted = st.form_submit_button("Adicionar Usuário", disabled=not indice_ok)
             if add_user_submitted:
                 if new_username and new_password:
                     hashed_new_password = make_hashes(new_password)
-                    add_userdata(new_username, hashed_new_password, new_role)
-                    st.success(f"Usuário '{new_username}' adicionado com sucesso como '{new_role}'.")
+                    try:
+                        add_userdata(new_username, hashed_new_password, new_role)
+                        st.success(f"Usuário '{new_username}' adicionado com sucesso como '{new_role}'.")
+                    except sqlite3.IntegrityError:
+                        st.error(f"O usuário '{new_username}' já existe.")
                 else:
                     st.error("Preencha todos os campos para adicionar um novo usuário.")
+
+        st.subheader("Importar Usuários em Lote")
+        st.caption("CSV com a coluna 'usuario' (ou 'Nome', como o colaboradores.csv) e, opcionalmente, "
+                   "'senha' e 'perfil'. Quem não tiver senha no arquivo recebe uma senha gerada.")
+        origem = st.radio("Origem", ["colaboradores.csv", "Enviar arquivo CSV"], horizontal=True, key="import_origem")
+        arquivo_csv = None
+        if origem == "Enviar arquivo CSV":
+            arquivo_csv = st.file_uploader("Arquivo CSV", type=["csv"], key="import_arquivo")
+        atualizar_existentes = st.checkbox("Atualizar perfil/senha de usuários já cadastrados",
+                                           key="import_atualizar")
+        if st.button("Importar usuários", key="import_usuarios", disabled=not indice_ok):
+            try:
+                if origem == "colaboradores.csv":
+                    conteudo = Path("colaboradores.csv").read_bytes()
+                elif arquivo_csv is not None:
+                    conteudo = arquivo_csv.getvalue()
+                else:
+                    st.error("Selecione um arquivo CSV.")
+                    st.stop()
+                usuarios = ler_usuarios_csv(conteudo)
+            except (OSError, UnicodeDecodeError, ValueError) as e:
+                st.error(f"Não foi possível ler o CSV: {e}")
+                st.stop()
+            with st.spinner("Importando..."):
+                resultado = importar_usuarios(conn, usuarios, make_hashes, atualizar_existentes,
+                                              usuario_atual=st.session_state.username)
+            st.success(f"{resultado['inseridos']} usuário(s) criado(s), {resultado['atualizados']} atualizado(s).")
+            if resultado["conflitos"]:
+                st.warning(f"{len(resultado['conflitos'])} linha(s) não importada(s):")
+                st.dataframe(
+                    pd.DataFrame(resultado["conflitos"], columns=["Linha", "Usuário", "Motivo"]),
+                    use_container_width=True, hide_index=True
+                )
+            if resultado["senhas_geradas"]:
+                st.info("Baixe agora as senhas geradas; elas não ficam guardadas (apenas o hash).")
+                st.download_button("📥 Baixar senhas geradas (CSV)", gerar_csv_senhas(resultado["senhas_geradas"]),
+                                   file_name="senhas_usuarios.csv", mime="text/csv", key="import_senhas")
+
         st.subheader("Usuários Existentes")
-        user_data = view_all_users()
-        df_users = pd.DataFrame(user_data, columns=['Username', 'Password Hash', 'Role'])
-        st.dataframe(df_users, use_container_width=True)
+        busca_usuario = st.text_input("Buscar usuário", key="usuarios_busca")
+        total_usuarios = contar_usuarios(conn, busca_usuario)
+        paginas = max(1, (total_usuarios + USUARIOS_POR_PAGINA - 1) // USUARIOS_POR_PAGINA)
+        pagina = st.number_input(f"Página (de {paginas})", min_value=1, max_value=paginas, value=1,
+                                 key="usuarios_pagina")
+        df_users = pd.DataFrame(listar_usuarios(conn, busca_usuario, pagina), columns=['Username', 'Role'])
+        st.caption(f"{total_usuarios} usuário(s).")
+        st.dataframe(df_users, use_container_width=True, hide_index=True)
+
+    def render_horas_trabalhadas_page():
+        st.title("Horas Trabalhadas")
+        if st.session_state.role != "admin":
+            st.warning("Você não tem permissão para acessar esta página.")
+            return
+        conn_registros = conectar_registros()
+        try:
+            obras_registradas = listar_obras(conn_registros)
+            col1, col2 = st.columns(2)
+            with col1:
+                obra_filtro = st.selectbox("Obra", ["Todas"] + obras_registradas, key="horas_obra")
+                data_inicio = st.date_input("De", datetime.today().replace(day=1), key="horas_inicio")
+            with col2:
+                agrupar_por = st.multiselect(
+                    "Agrupar por", list(AGRUPAMENTOS.keys()), default=["Obra", "Função", "Mês"], key="horas_agrupar"
+                )
+                data_fim = st.date_input("Até", datetime.today(), key="horas_fim")
+            if not agrupar_por:
+                st.info("Selecione ao menos um agrupamento.")
+                return
+            colunas, linhas = consultar_horas(
+                conn_registros, agrupar_por, data_inicio, data_fim,
+                None if obra_filtro == "Todas" else obra_filtro
+            )
+            df_horas = pd.DataFrame(linhas, columns=colunas)
+            if df_horas.empty:
+                st.info("Nenhuma hora registrada no período.")
+            else:
+                st.metric("Total de horas", f"{df_horas['Horas'].sum():,.1f}")
+                st.dataframe(df_horas, use_container_width=True, hide_index=True)
+            with st.expander("Manutenção"):
+                st.caption("Recalcula todos os agregados a partir do efetivo salvo (use após importações).")
+                if st.button("Recalcular agregados", key="horas_recalcular"):
+                    with st.spinner("Recalculando..."):
+                        total = recalcular_agregados(conn_registros)
+                    st.success(f"Agregados recalculados a partir de {total} lançamentos de efetivo.")
+        finally:
+            conn_registros.close()
+
+    def render_exportacao_page():
+        st.title("Exportar Dados (BI)")
+        if st.session_state.role != "admin":
+            st.warning("Você não tem permissão para acessar esta página.")
+            return
+        conn_registros = conectar_registros()
+        try:
+            col1, col2 = st.columns(2)
+            with col1:
+                tipo = st.selectbox("Dados", ["registros", "efetivo"], key="export_tipo",
+                                    format_func=lambda t: "Registros" if t == "registros" else "Efetivo (uma linha por colaborador)")
+                data_inicio = st.date_input("De", datetime.today().replace(day=1), key="export_inicio")
+            with col2:
+                formato = st.selectbox("Formato", FORMATOS_EXPORTACAO, key="export_formato")
+                data_fim = st.date_input("Até", datetime.today(), key="export_fim")
+            obras_filtro = st.multiselect("Obras (vazio = todas)", listar_obras(conn_registros), key="export_obras")
+            if st.button("Gerar arquivo", key="export_gerar"):
+                nome_arquivo = f"diarios_{tipo}_{data_inicio.isoformat()}_{data_fim.isoformat()}.{formato}"
+                caminho = novo_artefato(nome_arquivo)
+                with st.spinner("Exportando..."):
+                    try:
+                        total = exportar(conn_registros, tipo, formato, caminho,
+                                         data_inicio=data_inicio, data_fim=data_fim, obras=obras_filtro)
+                    except ImportError:
+                        st.error("Exportação Parquet requer o pacote 'pyarrow'.")
+                        return
+                st.success(f"{total} linhas exportadas.")
+                with open(caminho, "rb") as arquivo_exportado:
+                    st.download_button(f"📥 Baixar {nome_arquivo}", arquivo_exportado, file_name=nome_arquivo,
+                                       key="export_baixar")
+            with st.expander("Arquivo mensal"):
+                st.caption("Compacta os meses fechados de cada obra (registros, PDFs e fotos) em pacotes ZIP "
+                           "e remove os arquivos soltos já empacotados.")
+                if st.button("Arquivar meses fechados", key="export_arquivar"):
+                    with st.spinner("Arquivando..."):
+                        resultados = arquivar_meses_fechados(conn_registros)
+                    if resultados:
+                        st.code(formatar_relatorio(resultados), language=None)
+                    else:
+                        st.info("Nenhum mês fechado para arquivar.")
+        finally:
+            conn_registros.close()
+
+    def render_busca_page():
+        st.title("Buscar Diários")
+        if st.session_state.role != "admin":
+            st.warning("Você não tem permissão para acessar esta página.")
+            return
+        conn_registros = conectar_registros()
+        try:
+            texto_busca = st.text_input("Buscar em Serviços executados e Ocorrências",
+                                        placeholder="ex.: concretagem laje", key="busca_texto")
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                obra_filtro = st.selectbox("Obra", ["Todas"] + listar_obras(conn_registros), key="busca_obra")
+            with col2:
+                data_inicio = st.date_input("De", None, key="busca_inicio")
+            with col3:
+                data_fim = st.date_input("Até", None, key="busca_fim")
+            if not texto_busca:
+                return
+            resultados = buscar_registros(
+                conn_registros, texto_busca,
+                None if obra_filtro == "Todas" else obra_filtro, data_inicio, data_fim
+            )
+            if not resultados:
+                st.info("Nenhum diário encontrado.")
+                return
+            st.caption(f"{len(resultados)} diário(s) encontrado(s), do mais relevante para o menos relevante.")
+            for registro_id, obra_resultado, data_resultado, snippet_servicos, snippet_ocorrencias in resultados:
+                data_dia = datetime.strptime(data_resultado, "%Y-%m-%d").date()
+                data_br = data_dia.strftime("%d/%m/%Y")
+                st.markdown(
+                    f"""
+                    **{html.escape(obra_resultado)}** — {data_br}<br>
+                    <small><b>Serviços:</b> {destacar_snippet(snippet_servicos)}</small><br>
+                    <small><b>Ocorrências:</b> {destacar_snippet(snippet_ocorrencias)}</small>
+                    """,
+                    unsafe_allow_html=True
+                )
+                # O PDF (solto ou dentro do pacote do mês arquivado) só é lido sob demanda
+                if st.button("Abrir PDF", key=f"busca_pdf_{registro_id}"):
+                    conteudo = ler_pdf_diario(conn_registros, obra_resultado, data_dia)
+                    if conteudo:
+                        st.download_button(
+                            "📥 Baixar PDF", conteudo, mime="application/pdf",
+                            file_name=f"Diario_{obra_resultado.replace(' ', '_')}_{data_resultado}.pdf",
+                            key=f"busca_baixar_pdf_{registro_id}"
+                        )
+                    else:
+                        st.warning("O PDF deste diário não está guardado neste servidor.")
+        finally:
+            conn_registros.close()
+
+    def render_galeria_page():
+        st.title("Galeria de Fotos")
+        if st.session_state.role != "admin":
+            st.warning("Você não tem permissão para acessar esta página.")
+            return
+        conn_registros = conectar_registros()
+        try:
+            obras_com_fotos = listar_obras_com_fotos(conn_registros)
+            if not obras_com_fotos:
+                st.info("Nenhuma foto catalogada ainda.")
+                return
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                obra_galeria = st.selectbox("Obra", obras_com_fotos, key="galeria_obra")
+            with col2:
+                data_inicio = st.date_input("De", None, key="galeria_inicio")
+            with col3:
+                data_fim = st.date_input("Até", None, key="galeria_fim")
+            total = contar_fotos(conn_registros, obra_galeria, data_inicio, data_fim)
+            if not total:
+                st.info("Nenhuma foto no período.")
+                return
+            paginas = (total + FOTOS_POR_PAGINA - 1) // FOTOS_POR_PAGINA
+            pagina = st.number_input(f"Página (de {paginas})", min_value=1, max_value=paginas, value=1,
+                                     key="galeria_pagina")
+            linhas = listar_fotos(conn_registros, obra_galeria, data_inicio, data_fim, pagina)
+            st.caption(f"{total} foto(s). Clique em uma miniatura para abrir a foto inteira.")
+            st.html(gerar_galeria_html(linhas))
+            # Meses arquivados só têm as miniaturas soltas; o original é lido do pacote
+            arquivadas = [linha for linha in linhas if not caminho_foto(linha[0]).exists()]
+            if arquivadas:
+                with st.expander(f"Originais de meses arquivados ({len(arquivadas)} nesta página)"):
+                    escolhida = st.selectbox(
+                        "Foto", arquivadas, key="galeria_arquivada",
+                        format_func=lambda linha: (
+                            f"{datetime.fromisoformat(linha[2] or linha[1]).strftime('%d/%m/%Y %H:%M')}"
+                            f" · {linha[0][:8]}"
+                        )
+                    )
+                    if st.button("Abrir original", key="galeria_abrir_original"):
+                        hash_foto, data_foto = escolhida[0], datetime.fromisoformat(escolhida[1]).date()
+                        conteudo = ler_foto_arquivada(conn_registros, obra_galeria, data_foto, hash_foto)
+                        if conteudo is None:
+                            st.error("Foto não encontrada no pacote do mês.")
+                        else:
+                            st.image(conteudo)
+                            st.download_button("📥 Baixar original", conteudo, file_name=f"{hash_foto}.jpg",
+                                               mime="image/jpeg", key="galeria_baixar_original")
+        finally:
+            conn_registros.close()
+
+    def render_historico_drive_page():
+        st.title("Histórico do Drive")
+        if st.session_state.role != "admin":
+            st.warning("Você não tem permissão para acessar esta página.")
+            return
+        conn_drive = conectar_catalogo()
+        try:
+            ultima = ultima_sincronizacao(conn_drive, DRIVE_FOLDER_ID)
+            atualizar = st.button("Sincronizar agora", key="historico_sincronizar")
+            # Sincronização incremental: só as alterações desde o último page token
+            if atualizar or ultima is None or datetime.now() - ultima > INTERVALO_SINCRONIA_DRIVE:
+                with st.spinner("Sincronizando com o Google Drive..."):
+                    try:
+                        resumo = sincronizar_catalogo(conn_drive, servico_da_thread(creds), DRIVE_FOLDER_ID)
+                        ultima = ultima_sincronizacao(conn_drive, DRIVE_FOLDER_ID)
+                        if atualizar:
+                            st.success(f"Catálogo atualizado: {resumo['gravados']} alteração(ões), "
+                                       f"{resumo['removidos']} remoção(ões).")
+                    except Exception as e:
+                        st.warning(f"Não foi possível sincronizar com o Drive; mostrando o catálogo local. Erro: {e}")
+            if ultima:
+                st.caption(f"Última sincronização: {ultima.strftime('%d/%m/%Y %H:%M')}")
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                obra_filtro = st.selectbox("Obra", ["Todas"] + listar_obras_no_drive(conn_drive), key="historico_obra")
+            with col2:
+                data_inicio = st.date_input("De", None, key="historico_inicio")
+            with col3:
+                data_fim = st.date_input("Até", None, key="historico_fim")
+            diarios = listar_diarios_no_drive(
+                conn_drive, None if obra_filtro == "Todas" else obra_filtro, data_inicio, data_fim
+            )
+            if not diarios:
+                st.info("Nenhum diário encontrado no Drive.")
+                return
+            df_diarios = pd.DataFrame(
+                [
+                    (datetime.strptime(data_diario, "%Y-%m-%d").strftime("%d/%m/%Y"), obra_diario, nome,
+                     (tamanho or 0) / 1024, f"https://drive.google.com/file/d/{arquivo_id}/view")
+                    for arquivo_id, nome, obra_diario, data_diario, tamanho, _ in diarios
+                ],
+                columns=["Data", "Obra", "Arquivo", "Tamanho (KB)", "Link"]
+            )
+            st.caption(f"{len(df_diarios)} diário(s) no Drive.")
+            st.dataframe(
+                df_diarios, use_container_width=True, hide_index=True,
+                column_config={
+                    "Tamanho (KB)": st.column_config.NumberColumn(format="%.0f"),
+                    "Link": st.column_config.LinkColumn(display_text="Abrir"),
+                }
+            )
+        finally:
+            conn_drive.close()
 
     if choice == "Diário de Obra":
         render_diario_obra_page()
+    elif choice == "Holerites":
+        render_holerite_page(creds)
     elif choice == "Gerenciamento de Usuários":
         render_user_management_page()
+    elif choice == "Horas Trabalhadas":
+        render_horas_trabalhadas_page()
+    elif choice == "Exportar Dados":
+        render_exportacao_page()
+    elif choice == "Buscar Diários":
+        render_busca_page()
+    elif choice == "Galeria de Fotos":
+        render_galeria_page()
+    elif choice == "Histórico do Drive":
+        render_historico_drive_page()
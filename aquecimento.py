@@ -0,0 +1,101 @@
+import io
+import os
+import tempfile
+import threading
+import time
+from datetime import date
+from functools import lru_cache
+
+# Aquecimento do servidor: na primeira execução do app (antes de qualquer
+# envio) uma thread carrega o que o primeiro diário pagaria sozinho: módulos
+# do reportlab/PIL/googleapiclient, métricas das fontes, o logo decodificado e
+# o serviço do Drive em cada thread do pool de upload. Tudo fica no processo e
+# é compartilhado por todas as sessões; PRONTO sinaliza o fim.
+PRONTO = threading.Event()
+
+_lock = threading.Lock()
+_thread = None
+_estado = {"duracao": None, "etapas": {}, "erros": {}}
+
+
+@lru_cache(maxsize=4)
+def logo_pdf(caminho):
+    # ImageReader guarda a imagem decodificada; reaproveitado em todos os PDFs
+    from reportlab.lib.utils import ImageReader
+    return ImageReader(caminho) if os.path.exists(caminho) else None
+
+
+def _etapa(nome, funcao):
+    inicio = time.perf_counter()
+    try:
+        funcao()
+    except Exception as e:
+        _estado["erros"][nome] = f"{type(e).__name__}: {e}"
+    _estado["etapas"][nome] = time.perf_counter() - inicio
+
+
+def _aquecer_imagens():
+    from PIL import Image as PILImage, ImageOps
+    from catalogo_fotos import metadados_exif
+
+    buffer = io.BytesIO()
+    PILImage.new("RGB", (640, 480), "white").save(buffer, "JPEG", quality=85)
+    buffer.seek(0)
+    with PILImage.open(buffer) as img:
+        img.draft("RGB", (320, 320))
+        metadados_exif(img.getexif())
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((160, 160), PILImage.Resampling.LANCZOS)
+        img.save(io.BytesIO(), "PNG")
+
+
+def _aquecer_pdf(gerar_pdf):
+    # Pelo mesmo gerar_pdf do app, que escolhe o motor configurado
+    # (MODO_LAYOUT_PDF), com cabeçalho, logo e uma foto na grade
+    from registro_modelo import Registro, EntradaEfetivo
+    from PIL import Image as PILImage
+
+    registro = Registro(
+        obra="Aquecimento", data=date.today(), contrato="-", servicos="Texto de exemplo.",
+        efetivo=[EntradaEfetivo("Colaborador", "Função", "07:00", "17:00")]
+    )
+    with tempfile.TemporaryDirectory(prefix="aquecimento_") as pasta:
+        foto = os.path.join(pasta, "foto.jpg")
+        PILImage.new("RGB", (400, 300), "gray").save(foto, "JPEG")
+        pdf = gerar_pdf(registro, [foto])
+        if pdf is None:
+            raise RuntimeError("falha ao gerar o PDF de aquecimento")
+        pdf.close()
+
+
+def _aquecer(creds, raiz_id, gerar_pdf):
+    from drive_arquivos import aquecer_uploads
+
+    inicio = time.perf_counter()
+    _etapa("imagens", _aquecer_imagens)
+    _etapa("pdf", lambda: _aquecer_pdf(gerar_pdf))
+    _etapa("drive", lambda: aquecer_uploads(creds, raiz_id))
+    _estado["duracao"] = time.perf_counter() - inicio
+    PRONTO.set()
+
+
+def iniciar_aquecimento(creds, raiz_id, gerar_pdf):
+    # O Streamlit não tem gancho de inicialização do servidor: é chamada a cada
+    # execução do script e só a primeira (tela de login da primeira sessão)
+    # inicia a thread
+    global _thread
+    with _lock:
+        if _thread is not None:
+            return
+        _thread = threading.Thread(target=_aquecer, args=(creds, raiz_id, gerar_pdf),
+                                   name="aquecimento", daemon=True)
+        _thread.start()
+
+
+def estado_aquecimento():
+    return {
+        "pronto": PRONTO.is_set(),
+        "duracao": _estado["duracao"],
+        "etapas": dict(_estado["etapas"]),
+        "erros": dict(_estado["erros"]),
+    }
@@ -0,0 +1,292 @@
+import argparse
+import json
+import os
+import re
+import shutil
+import zipfile
+from dataclasses import asdict
+from datetime import date, datetime
+from pathlib import Path
+
+from banco_registros import conectar, carregar_registro
+from catalogo_fotos import TAMANHOS_MINIATURA, caminho_foto
+
+# Arquivamento dos meses fechados: cada obra/mês vira um pacote ZIP com os
+# registros (JSON), os PDFs e as versões das fotos, mais um indice.json. O ZIP
+# guarda cada arquivo comprimido separadamente e tem um diretório central, então
+# um diário ou uma foto é lido direto do pacote, sem descompactar o resto.
+#
+#   python arquivo_mensal.py            # arquiva todos os meses anteriores ao atual
+#   python arquivo_mensal.py --obra "Obra X"
+PASTA_PDFS_DIARIOS = Path("diarios")
+PASTA_PACOTES = Path("arquivo")
+NOME_INDICE = "indice.json"
+TAMANHO_BLOCO = 1024 * 1024
+
+SQL_CRIAR_PACOTES = """
+CREATE TABLE IF NOT EXISTS pacotes (
+    id INTEGER PRIMARY KEY,
+    obra TEXT NOT NULL,
+    mes TEXT NOT NULL,
+    caminho TEXT NOT NULL,
+    diarios INTEGER NOT NULL,
+    fotos INTEGER NOT NULL,
+    bytes_originais INTEGER NOT NULL,
+    bytes_pacote INTEGER NOT NULL,
+    criado_em TEXT NOT NULL,
+    UNIQUE (obra, mes)
+)
+"""
+
+
+def criar_tabela_pacotes(conn):
+    # Criada aqui (e não em banco_registros.criar_tabelas), pois este módulo
+    # depende de banco_registros
+    with conn:
+        conn.execute(SQL_CRIAR_PACOTES)
+
+
+def _pasta_obra(obra):
+    return re.sub(r"[^\w.-]+", "_", obra).strip("_") or "obra"
+
+
+def caminho_pdf_diario(obra, data):
+    return PASTA_PDFS_DIARIOS / _pasta_obra(obra) / f"{data.isoformat()}.pdf"
+
+
+def guardar_pdf_diario(origem, obra, data):
+    # Cópia local do PDF de cada diário, que o arquivamento mensal empacota
+    destino = caminho_pdf_diario(obra, data)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    temporario = destino.with_suffix(".parcial")
+    origem.seek(0)
+    with open(temporario, "wb") as f:
+        shutil.copyfileobj(origem, f, TAMANHO_BLOCO)
+    origem.seek(0)
+    os.replace(temporario, destino)
+    return destino
+
+
+def caminho_pacote(obra, mes):
+    return PASTA_PACOTES / _pasta_obra(obra) / f"{mes}.zip"
+
+
+def meses_fechados(conn, hoje=None, obra=None):
+    # Meses anteriores ao atual com diários ainda não arquivados, ou alterados
+    # depois do último arquivamento (o pacote é refeito)
+    criar_tabela_pacotes(conn)
+    inicio_mes_atual = (hoje or date.today()).replace(day=1).isoformat()
+    sql = (
+        "SELECT DISTINCT r.obra, substr(r.data, 1, 7) FROM registros r "
+        "WHERE r.data < ? AND NOT EXISTS ("
+        "  SELECT 1 FROM pacotes p WHERE p.obra = r.obra AND p.mes = substr(r.data, 1, 7) "
+        "  AND p.criado_em >= r.atualizado_em)"
+    )
+    parametros = [inicio_mes_atual]
+    if obra:
+        sql += " AND r.obra = ?"
+        parametros.append(obra)
+    return conn.execute(sql + " ORDER BY 1, 2", parametros).fetchall()
+
+
+def _registro_json(registro):
+    return json.dumps(asdict(registro), ensure_ascii=False, default=str, indent=1).encode("utf-8")
+
+
+def _copiar(pacote, origem, membro, pacote_anterior, compress_type=None):
+    # Usa o arquivo solto; se ele já foi removido num arquivamento anterior do
+    # mesmo mês, copia o membro do pacote antigo. Retorna o tamanho original.
+    if origem.exists():
+        pacote.write(origem, membro, compress_type=compress_type)
+        return origem.stat().st_size
+    if pacote_anterior is not None and membro in pacote_anterior.NameToInfo:
+        conteudo = pacote_anterior.read(membro)
+        pacote.writestr(membro, conteudo, compress_type=compress_type)
+        return len(conteudo)
+    return None
+
+
+def arquivar_mes(conn, obra, mes):
+    criar_tabela_pacotes(conn)
+    registros = conn.execute(
+        "SELECT id, data FROM registros WHERE obra = ? AND substr(data, 1, 7) = ? ORDER BY data", (obra, mes)
+    ).fetchall()
+    fotos = conn.execute(
+        "SELECT hash, data, nome, capturada_em, latitude, longitude, largura, altura FROM fotos "
+        "WHERE obra = ? AND substr(data, 1, 7) = ? ORDER BY data, id", (obra, mes)
+    ).fetchall()
+    destino = caminho_pacote(obra, mes)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    temporario = destino.with_suffix(".parcial")
+    indice = {"obra": obra, "mes": mes, "criado_em": datetime.now().isoformat(timespec="seconds"),
+              "diarios": {}, "fotos": {}}
+    bytes_originais = 0
+    pdfs_soltos = []
+    fotos_soltas = []
+    pacote_anterior = zipfile.ZipFile(destino) if destino.exists() else None
+    try:
+        with zipfile.ZipFile(temporario, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=9) as pacote:
+            for registro_id, data in registros:
+                conteudo = _registro_json(carregar_registro(conn, registro_id))
+                membro_registro = f"registros/{data}.json"
+                pacote.writestr(membro_registro, conteudo)
+                bytes_originais += len(conteudo)
+                diario = {"registro": membro_registro, "pdf": None, "fotos": []}
+                pdf = caminho_pdf_diario(obra, date.fromisoformat(data))
+                tamanho = _copiar(pacote, pdf, f"pdfs/{data}.pdf", pacote_anterior)
+                if tamanho is not None:
+                    diario["pdf"] = f"pdfs/{data}.pdf"
+                    bytes_originais += tamanho
+                    pdfs_soltos.append(pdf)
+                indice["diarios"][data] = diario
+            for hash_foto, data, nome, capturada_em, latitude, longitude, largura, altura in fotos:
+                if data in indice["diarios"]:
+                    indice["diarios"][data]["fotos"].append(hash_foto)
+                if hash_foto in indice["fotos"]:
+                    continue
+                versoes = {}
+                for lado in (None,) + TAMANHOS_MINIATURA:
+                    caminho = caminho_foto(hash_foto, lado)
+                    membro = f"fotos/{caminho.name}"
+                    # JPEG não comprime mais; guardado sem compressão a leitura é direta
+                    tamanho = _copiar(pacote, caminho, membro, pacote_anterior, zipfile.ZIP_STORED)
+                    if tamanho is not None:
+                        bytes_originais += tamanho
+                        versoes[str(lado or "original")] = membro
+                indice["fotos"][hash_foto] = {
+                    "data": data, "nome": nome, "capturada_em": capturada_em,
+                    "latitude": latitude, "longitude": longitude, "largura": largura, "altura": altura,
+                    "versoes": versoes,
+                }
+                fotos_soltas.append(hash_foto)
+            pacote.writestr(NOME_INDICE, json.dumps(indice, ensure_ascii=False, indent=1))
+    finally:
+        if pacote_anterior is not None:
+            pacote_anterior.close()
+    os.replace(temporario, destino)
+    bytes_pacote = destino.stat().st_size
+
+    with conn:
+        conn.execute(
+            "INSERT INTO pacotes (obra, mes, caminho, diarios, fotos, bytes_originais, bytes_pacote, criado_em) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (obra, mes) DO UPDATE SET caminho = excluded.caminho, "
+            "diarios = excluded.diarios, fotos = excluded.fotos, bytes_originais = excluded.bytes_originais, "
+            "bytes_pacote = excluded.bytes_pacote, criado_em = excluded.criado_em",
+            (obra, mes, str(destino), len(registros), len(indice["fotos"]), bytes_originais, bytes_pacote,
+             indice["criado_em"])
+        )
+
+    # Só depois do pacote gravado e registrado os arquivos soltos são removidos.
+    # As miniaturas continuam soltas para a galeria, e uma foto que também
+    # pertence a um mês ainda não arquivado (mesmo hash) fica onde está.
+    removidos = pdfs_soltos + [
+        caminho_foto(hash_foto) for hash_foto in fotos_soltas if not _foto_em_mes_aberto(conn, hash_foto)
+    ]
+    bytes_liberados = 0
+    for caminho in removidos:
+        try:
+            tamanho = caminho.stat().st_size
+            caminho.unlink()
+            bytes_liberados += tamanho
+        except OSError:
+            continue
+    return {
+        "obra": obra, "mes": mes, "pacote": str(destino), "diarios": len(registros), "fotos": len(indice["fotos"]),
+        "bytes_originais": bytes_originais, "bytes_pacote": bytes_pacote, "bytes_liberados": bytes_liberados,
+    }
+
+
+def _foto_em_mes_aberto(conn, hash_foto):
+    return conn.execute(
+        "SELECT 1 FROM fotos f WHERE f.hash = ? AND NOT EXISTS ("
+        "  SELECT 1 FROM pacotes p WHERE p.obra = f.obra AND p.mes = substr(f.data, 1, 7)) LIMIT 1",
+        (hash_foto,)
+    ).fetchone() is not None
+
+
+def arquivar_meses_fechados(conn, hoje=None, obra=None):
+    return [arquivar_mes(conn, obra_mes, mes) for obra_mes, mes in meses_fechados(conn, hoje, obra)]
+
+
+def ler_indice(caminho):
+    with zipfile.ZipFile(caminho) as pacote:
+        return json.loads(pacote.read(NOME_INDICE))
+
+
+def ler_membro(caminho, membro):
+    # Leitura por acesso aleatório: só o membro pedido é lido e descomprimido
+    with zipfile.ZipFile(caminho) as pacote:
+        return pacote.read(membro)
+
+
+def _pacote_do_dia(conn, obra, data):
+    criar_tabela_pacotes(conn)
+    linha = conn.execute(
+        "SELECT caminho FROM pacotes WHERE obra = ? AND mes = ?", (obra, data.isoformat()[:7])
+    ).fetchone()
+    return Path(linha[0]) if linha else None
+
+
+def ler_pdf_arquivado(conn, obra, data):
+    caminho = _pacote_do_dia(conn, obra, data)
+    if caminho is None:
+        return None
+    diario = ler_indice(caminho)["diarios"].get(data.isoformat())
+    if not diario or not diario["pdf"]:
+        return None
+    return ler_membro(caminho, diario["pdf"])
+
+
+def ler_pdf_diario(conn, obra, data):
+    # Cópia solta (mês aberto) ou, depois do arquivamento, o membro do pacote
+    pdf = caminho_pdf_diario(obra, data)
+    try:
+        return pdf.read_bytes()
+    except FileNotFoundError:
+        return ler_pdf_arquivado(conn, obra, data)
+
+
+def ler_foto_arquivada(conn, obra, data, hash_foto, lado=None):
+    caminho = _pacote_do_dia(conn, obra, data)
+    if caminho is None:
+        return None
+    foto = ler_indice(caminho)["fotos"].get(hash_foto)
+    membro = foto and foto["versoes"].get(str(lado or "original"))
+    return ler_membro(caminho, membro) if membro else None
+
+
+def formatar_relatorio(resultados):
+    linhas = []
+    total_original = total_pacote = total_liberado = 0
+    for r in resultados:
+        economia = 1 - r["bytes_pacote"] / r["bytes_originais"] if r["bytes_originais"] else 0
+        linhas.append(
+            f"{r['obra']} {r['mes']}: {r['diarios']} diário(s), {r['fotos']} foto(s), "
+            f"{r['bytes_originais'] / 1048576:.1f} MB -> {r['bytes_pacote'] / 1048576:.1f} MB ({economia:.0%} menor)"
+        )
+        total_original += r["bytes_originais"]
+        total_pacote += r["bytes_pacote"]
+        total_liberado += r["bytes_liberados"]
+    linhas.append(
+        f"Total: {len(resultados)} pacote(s), {total_original / 1048576:.1f} MB -> {total_pacote / 1048576:.1f} MB, "
+        f"{total_liberado / 1048576:.1f} MB liberados em arquivos soltos"
+    )
+    return "\n".join(linhas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Arquiva os meses fechados de cada obra em pacotes ZIP.")
+    parser.add_argument("--obra", default=None, help="Arquiva só esta obra")
+    parser.add_argument("--banco", default=None, help="Caminho do banco de registros")
+    args = parser.parse_args()
+
+    conn = conectar(args.banco) if args.banco else conectar()
+    try:
+        resultados = arquivar_meses_fechados(conn, obra=args.obra)
+    finally:
+        conn.close()
+    print(formatar_relatorio(resultados) if resultados else "Nenhum mês fechado para arquivar.")
+
+
+if __name__ == "__main__":
+    main()
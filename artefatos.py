@@ -0,0 +1,71 @@
+import shutil
+import secrets
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Relatórios gerados ficam em disco, fora da pasta pública do static serving:
+# a sessão guarda só o caminho e o arquivo é lido no st.download_button da
+# própria sessão. Uma thread apaga os expirados a cada INTERVALO_LIMPEZA.
+PASTA_ARTEFATOS = Path("artefatos")
+TTL_ARTEFATOS_SEGUNDOS = 6 * 60 * 60
+INTERVALO_LIMPEZA_SEGUNDOS = 15 * 60
+
+# Acima deste tamanho o PDF em geração é despejado para um arquivo temporário
+PDF_SPOOL_MAX_BYTES = 8 * 1024 * 1024
+TAMANHO_BLOCO = 1024 * 1024
+# Tamanho dos blocos do upload resumable do Drive (múltiplo de 256 KB)
+TAMANHO_BLOCO_UPLOAD = 4 * 1024 * 1024
+
+
+def criar_saida_pdf():
+    return tempfile.SpooledTemporaryFile(max_size=PDF_SPOOL_MAX_BYTES, mode="w+b")
+
+
+def novo_artefato(nome_arquivo):
+    # Reserva um caminho no armazenamento de artefatos para escrita direta
+    pasta = PASTA_ARTEFATOS / secrets.token_urlsafe(16)
+    pasta.mkdir(parents=True, exist_ok=True)
+    return pasta / nome_arquivo
+
+
+def salvar_artefato(origem, nome_arquivo):
+    caminho = novo_artefato(nome_arquivo)
+    origem.seek(0)
+    with open(caminho, "wb") as destino:
+        shutil.copyfileobj(origem, destino, TAMANHO_BLOCO)
+    origem.seek(0)
+    return caminho
+
+
+def limpar_artefatos_expirados(ttl=TTL_ARTEFATOS_SEGUNDOS):
+    if not PASTA_ARTEFATOS.exists():
+        return
+    limite = time.time() - ttl
+    for pasta in PASTA_ARTEFATOS.iterdir():
+        try:
+            if pasta.stat().st_mtime < limite:
+                shutil.rmtree(pasta, ignore_errors=True)
+        except OSError:
+            continue
+
+
+_lock_limpeza = threading.Lock()
+_thread_limpeza = None
+
+
+def iniciar_limpeza_artefatos(intervalo=INTERVALO_LIMPEZA_SEGUNDOS):
+    # A limpeza roda sozinha no processo, com ou sem novos relatórios; pode
+    # ser chamada a cada execução do script, só a primeira inicia a thread
+    global _thread_limpeza
+
+    def limpar_periodicamente():
+        while True:
+            limpar_artefatos_expirados()
+            time.sleep(intervalo)
+
+    with _lock_limpeza:
+        if _thread_limpeza is None:
+            _thread_limpeza = threading.Thread(target=limpar_periodicamente, name="limpeza_artefatos", daemon=True)
+            _thread_limpeza.start()
@@ -0,0 +1,130 @@
+import sqlite3
+from datetime import date, datetime
+
+from busca_registros import criar_indice_busca
+from catalogo_fotos import criar_tabela_fotos
+from horas_trabalhadas import criar_tabela_agregados, somar_registro, subtrair_registro
+from registro_modelo import EntradaEfetivo, Registro
+
+BANCO_REGISTROS = "registros.db"
+
+SQL_CRIAR_REGISTROS = """
+CREATE TABLE IF NOT EXISTS registros (
+    id INTEGER PRIMARY KEY,
+    obra TEXT NOT NULL,
+    local TEXT,
+    data TEXT NOT NULL,
+    contrato TEXT NOT NULL,
+    clima TEXT,
+    maquinas TEXT,
+    servicos TEXT,
+    ocorrencias TEXT,
+    responsavel TEXT,
+    fiscalizacao TEXT,
+    usuario TEXT,
+    atualizado_em TEXT NOT NULL,
+    UNIQUE (obra, data)
+)
+"""
+
+SQL_CRIAR_EFETIVO = """
+CREATE TABLE IF NOT EXISTS efetivo (
+    id INTEGER PRIMARY KEY,
+    registro_id INTEGER NOT NULL REFERENCES registros(id) ON DELETE CASCADE,
+    nome TEXT NOT NULL,
+    funcao TEXT NOT NULL,
+    entrada TEXT,
+    saida TEXT,
+    horas REAL NOT NULL DEFAULT 0
+)
+"""
+
+
+def conectar(caminho=BANCO_REGISTROS):
+    conn = sqlite3.connect(caminho, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    criar_tabelas(conn)
+    return conn
+
+
+def criar_tabelas(conn):
+    with conn:
+        conn.execute(SQL_CRIAR_REGISTROS)
+        conn.execute(SQL_CRIAR_EFETIVO)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_efetivo_registro ON efetivo(registro_id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_registros_data ON registros(data)")
+        criar_tabela_agregados(conn)
+        criar_indice_busca(conn)
+        criar_tabela_fotos(conn)
+
+
+def salvar_registro(conn, registro, usuario=None):
+    # Um diário por obra e dia: salvar de novo substitui o anterior e os
+    # agregados de horas são corrigidos na mesma transação.
+    dados = (
+        registro.local,
+        registro.contrato,
+        registro.clima,
+        registro.maquinas,
+        registro.servicos,
+        registro.ocorrencias,
+        registro.responsavel,
+        registro.fiscalizacao,
+        usuario,
+        datetime.now().isoformat(timespec="seconds"),
+    )
+    obra = registro.obra
+    data = registro.data.isoformat()
+    with conn:
+        existente = conn.execute(
+            "SELECT id FROM registros WHERE obra = ? AND data = ?", (obra, data)
+        ).fetchone()
+        if existente:
+            registro_id = existente[0]
+            subtrair_registro(conn, registro_id)
+            conn.execute("DELETE FROM efetivo WHERE registro_id = ?", (registro_id,))
+            conn.execute(
+                "UPDATE registros SET local = ?, contrato = ?, clima = ?, maquinas = ?, servicos = ?, "
+                "ocorrencias = ?, responsavel = ?, fiscalizacao = ?, usuario = ?, atualizado_em = ? "
+                "WHERE id = ?",
+                dados + (registro_id,)
+            )
+        else:
+            cursor = conn.execute(
+                "INSERT INTO registros (local, contrato, clima, maquinas, servicos, ocorrencias, "
+                "responsavel, fiscalizacao, usuario, atualizado_em, obra, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                dados + (obra, data)
+            )
+            registro_id = cursor.lastrowid
+        conn.executemany(
+            "INSERT INTO efetivo (registro_id, nome, funcao, entrada, saida, horas) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (registro_id, item.nome, item.funcao, item.entrada, item.saida, item.horas)
+                for item in registro.efetivo_preenchido
+            ]
+        )
+        somar_registro(conn, registro_id)
+    return registro_id
+
+
+def carregar_registro(conn, registro_id):
+    linha = conn.execute(
+        "SELECT obra, data, contrato, local, clima, maquinas, servicos, ocorrencias, responsavel, fiscalizacao "
+        "FROM registros WHERE id = ?", (registro_id,)
+    ).fetchone()
+    if linha is None:
+        return None
+    efetivo = [
+        EntradaEfetivo(nome, funcao or "", entrada or "", saida or "")
+        for nome, funcao, entrada, saida in conn.execute(
+            "SELECT nome, funcao, entrada, saida FROM efetivo WHERE registro_id = ? ORDER BY id", (registro_id,)
+        )
+    ]
+    obra, data, *textos = linha
+    return Registro(obra, date.fromisoformat(data), *[t or "" for t in textos], efetivo=efetivo)
+
+
+def listar_obras(conn):
+    return [linha[0] for linha in conn.execute("SELECT DISTINCT obra FROM registros ORDER BY obra")]
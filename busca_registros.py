@@ -0,0 +1,92 @@
+import html
+import re
+
+# Índice de texto completo (FTS5) sobre "Serviços executados" e "Ocorrências".
+# É uma tabela de conteúdo externo ligada a `registros` por gatilhos, então o
+# índice é atualizado incrementalmente a cada registro salvo.
+
+SQL_CRIAR_INDICE = """
+CREATE VIRTUAL TABLE registros_fts USING fts5(
+    servicos, ocorrencias,
+    content='registros', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+)
+"""
+
+SQL_GATILHOS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS registros_fts_ai AFTER INSERT ON registros BEGIN
+        INSERT INTO registros_fts (rowid, servicos, ocorrencias)
+        VALUES (new.id, new.servicos, new.ocorrencias);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS registros_fts_ad AFTER DELETE ON registros BEGIN
+        INSERT INTO registros_fts (registros_fts, rowid, servicos, ocorrencias)
+        VALUES ('delete', old.id, old.servicos, old.ocorrencias);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS registros_fts_au AFTER UPDATE OF servicos, ocorrencias ON registros BEGIN
+        INSERT INTO registros_fts (registros_fts, rowid, servicos, ocorrencias)
+        VALUES ('delete', old.id, old.servicos, old.ocorrencias);
+        INSERT INTO registros_fts (rowid, servicos, ocorrencias)
+        VALUES (new.id, new.servicos, new.ocorrencias);
+    END
+    """,
+]
+
+# Marcadores usados no snippet antes de escapar o HTML
+INICIO_DESTAQUE = "\x02"
+FIM_DESTAQUE = "\x03"
+LIMITE_RESULTADOS = 50
+
+
+def criar_indice_busca(conn):
+    existe = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'registros_fts'"
+    ).fetchone()
+    if not existe:
+        conn.execute(SQL_CRIAR_INDICE)
+        # Indexa os registros salvos antes da criação do índice
+        conn.execute("INSERT INTO registros_fts (registros_fts) VALUES ('rebuild')")
+    for sql in SQL_GATILHOS:
+        conn.execute(sql)
+
+
+def montar_consulta_fts(texto):
+    # Cada palavra vira um termo entre aspas com prefixo (laje -> "laje"*),
+    # o que evita erros de sintaxe do FTS5 com a entrada livre do usuário.
+    palavras = re.findall(r"\w+", texto or "")
+    return " ".join(f'"{palavra}"*' for palavra in palavras)
+
+
+def buscar_registros(conn, texto, obra=None, data_inicio=None, data_fim=None, limite=LIMITE_RESULTADOS):
+    consulta = montar_consulta_fts(texto)
+    if not consulta:
+        return []
+    condicoes, parametros = ["registros_fts MATCH ?"], [consulta]
+    if obra:
+        condicoes.append("r.obra = ?")
+        parametros.append(obra)
+    if data_inicio:
+        condicoes.append("r.data >= ?")
+        parametros.append(data_inicio.isoformat())
+    if data_fim:
+        condicoes.append("r.data <= ?")
+        parametros.append(data_fim.isoformat())
+    parametros.append(limite)
+    sql = (
+        "SELECT r.id, r.obra, r.data, "
+        f"snippet(registros_fts, 0, '{INICIO_DESTAQUE}', '{FIM_DESTAQUE}', '…', 16), "
+        f"snippet(registros_fts, 1, '{INICIO_DESTAQUE}', '{FIM_DESTAQUE}', '…', 16) "
+        "FROM registros_fts JOIN registros r ON r.id = registros_fts.rowid "
+        f"WHERE {' AND '.join(condicoes)} "
+        "ORDER BY bm25(registros_fts) LIMIT ?"
+    )
+    return conn.execute(sql, parametros).fetchall()
+
+
+def destacar_snippet(snippet):
+    texto = html.escape(snippet or "")
+    return texto.replace(INICIO_DESTAQUE, "<mark>").replace(FIM_DESTAQUE, "</mark>")
@@ -0,0 +1,286 @@
+import re
+import sqlite3
+import threading
+from datetime import datetime
+
+from googleapiclient.errors import HttpError
+
+# Catálogo local dos metadados da pasta de relatórios no Drive (nome, obra,
+# data, id, tamanho). A primeira sincronização lista a árvore inteira; as
+# seguintes usam a API changes a partir do page token salvo e aplicam só as
+# diferenças. O envio de diários e o histórico consultam este catálogo em vez
+# de listar o Drive.
+BANCO_DRIVE = "drive_cache.db"
+MIME_PASTA = "application/vnd.google-apps.folder"
+CAMPOS_ARQUIVO = "id, name, mimeType, parents, size, modifiedTime, trashed"
+TAMANHO_PAGINA = 1000
+PADRAO_NOME_DIARIO = re.compile(r"^Diario_(.+)_(\d{4}-\d{2}-\d{2})\.pdf$")
+PADRAO_DATA = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+SQL_CRIAR_CATALOGO = """
+CREATE TABLE IF NOT EXISTS drive_catalogo (
+    id TEXT PRIMARY KEY,
+    nome TEXT NOT NULL,
+    mime TEXT,
+    pai TEXT,
+    caminho TEXT NOT NULL,
+    obra TEXT,
+    data TEXT,
+    tamanho INTEGER,
+    modificado_em TEXT
+)
+"""
+
+SQL_CRIAR_SINCRONIA = """
+CREATE TABLE IF NOT EXISTS drive_sincronia (
+    raiz TEXT PRIMARY KEY,
+    page_token TEXT NOT NULL,
+    sincronizado_em TEXT NOT NULL
+)
+"""
+
+_lock_sincronia = threading.Lock()
+
+
+def conectar_catalogo(caminho=BANCO_DRIVE):
+    conn = sqlite3.connect(caminho, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    with conn:
+        conn.execute(SQL_CRIAR_CATALOGO)
+        conn.execute(SQL_CRIAR_SINCRONIA)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_drive_catalogo_pai ON drive_catalogo(pai, nome)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_drive_catalogo_obra ON drive_catalogo(obra, data)")
+    return conn
+
+
+def _classificar(caminho, nome, mime):
+    # obra/data a partir da hierarquia obra/ano/mês e do nome do arquivo; PDFs
+    # antigos enviados direto na raiz trazem obra e data só no nome
+    if mime == MIME_PASTA:
+        return None, None
+    segmentos = caminho.split("/")
+    data = PADRAO_DATA.search(nome)
+    if len(segmentos) > 1:
+        return segmentos[0], data.group(0) if data else None
+    legado = PADRAO_NOME_DIARIO.match(nome)
+    if legado:
+        return legado.group(1).replace("_", " "), legado.group(2)
+    return None, data.group(0) if data else None
+
+
+def _caminho_do_pai(conn, raiz_id, pai_id):
+    if pai_id == raiz_id:
+        return ""
+    linha = conn.execute("SELECT caminho FROM drive_catalogo WHERE id = ? AND mime = ?", (pai_id, MIME_PASTA)).fetchone()
+    return linha[0] if linha else None
+
+
+def _remover(conn, arquivo_id):
+    linha = conn.execute("SELECT caminho, mime FROM drive_catalogo WHERE id = ?", (arquivo_id,)).fetchone()
+    if linha is None:
+        return 0
+    conn.execute("DELETE FROM drive_catalogo WHERE id = ?", (arquivo_id,))
+    removidos = 1
+    if linha[1] == MIME_PASTA:
+        # Itens dentro de uma pasta apagada não aparecem um a um nas alterações
+        removidos += conn.execute(
+            "DELETE FROM drive_catalogo WHERE substr(caminho, 1, ?) = ?", (len(linha[0]) + 1, linha[0] + "/")
+        ).rowcount
+    return removidos
+
+
+def _gravar(conn, raiz_id, arquivo):
+    # Retorna False quando o arquivo não está (ou deixou de estar) sob a raiz,
+    # ou quando a pasta-mãe ainda não está no catálogo
+    pais = arquivo.get("parents") or []
+    caminho_pai = _caminho_do_pai(conn, raiz_id, pais[0]) if pais else None
+    if caminho_pai is None:
+        return False
+    nome = arquivo["name"]
+    mime = arquivo.get("mimeType")
+    caminho = f"{caminho_pai}/{nome}" if caminho_pai else nome
+    obra, data = _classificar(caminho, nome, mime)
+    anterior = conn.execute("SELECT caminho FROM drive_catalogo WHERE id = ?", (arquivo["id"],)).fetchone()
+    conn.execute(
+        "INSERT INTO drive_catalogo (id, nome, mime, pai, caminho, obra, data, tamanho, modificado_em) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (id) DO UPDATE SET nome = excluded.nome, "
+        "mime = excluded.mime, pai = excluded.pai, caminho = excluded.caminho, obra = excluded.obra, "
+        "data = excluded.data, tamanho = excluded.tamanho, modificado_em = excluded.modificado_em",
+        (arquivo["id"], nome, mime, pais[0], caminho, obra, data,
+         int(arquivo["size"]) if arquivo.get("size") else None, arquivo.get("modifiedTime"))
+    )
+    if anterior and anterior[0] != caminho and mime == MIME_PASTA:
+        # Pasta renomeada ou movida: refaz o caminho (e a obra) de tudo abaixo dela
+        prefixo = anterior[0] + "/"
+        descendentes = conn.execute(
+            "SELECT id, nome, mime, caminho FROM drive_catalogo WHERE substr(caminho, 1, ?) = ?",
+            (len(prefixo), prefixo)
+        ).fetchall()
+        for item_id, item_nome, item_mime, item_caminho in descendentes:
+            novo = caminho + "/" + item_caminho[len(prefixo):]
+            item_obra, item_data = _classificar(novo, item_nome, item_mime)
+            conn.execute(
+                "UPDATE drive_catalogo SET caminho = ?, obra = ?, data = ? WHERE id = ?",
+                (novo, item_obra, item_data, item_id)
+            )
+    return True
+
+
+def registrar_arquivo(conn, raiz_id, arquivo):
+    # Inclui no catálogo um arquivo/pasta que o próprio app acabou de criar,
+    # sem esperar a próxima sincronização
+    with conn:
+        return _gravar(conn, raiz_id, arquivo)
+
+
+def remover_arquivo(conn, arquivo_id):
+    # Retira do catálogo um arquivo (ou pasta, com tudo abaixo dela) que o app
+    # sabe não existir mais no Drive
+    with conn:
+        return _remover(conn, arquivo_id)
+
+
+def _listar_pagina(servico, **parametros):
+    return servico.files().list(
+        fields=f"nextPageToken, files({CAMPOS_ARQUIVO})",
+        pageSize=TAMANHO_PAGINA,
+        supportsAllDrives=True,
+        includeItemsFromAllDrives=True,
+        **parametros
+    ).execute()
+
+
+def _sincronizar_tudo(conn, servico, raiz_id):
+    # O token é obtido antes da listagem: o que mudar durante ela volta na
+    # próxima sincronização incremental
+    token = servico.changes().getStartPageToken(supportsAllDrives=True).execute()["startPageToken"]
+    total = 0
+    with conn:
+        conn.execute("DELETE FROM drive_catalogo")
+        pastas = [raiz_id]
+        while pastas:
+            pasta_id = pastas.pop(0)
+            pagina = None
+            while True:
+                resposta = _listar_pagina(servico, q=f"'{pasta_id}' in parents and trashed = false", pageToken=pagina)
+                for arquivo in resposta.get("files", []):
+                    if _gravar(conn, raiz_id, dict(arquivo, parents=[pasta_id])):
+                        total += 1
+                        if arquivo.get("mimeType") == MIME_PASTA:
+                            pastas.append(arquivo["id"])
+                pagina = resposta.get("nextPageToken")
+                if not pagina:
+                    break
+    return token, {"completa": True, "gravados": total, "removidos": 0}
+
+
+def _aplicar_alteracoes(conn, raiz_id, alteracoes):
+    # Cada arquivo aparece uma vez, na posição da sua última alteração; uma
+    # pasta pode vir depois dos arquivos dela, então as alterações pendentes
+    # são reaplicadas até não haver mais progresso
+    gravados = removidos = 0
+    pendentes = []
+    for alteracao in alteracoes:
+        arquivo = alteracao.get("file")
+        if alteracao.get("removed") or not arquivo or arquivo.get("trashed"):
+            removidos += _remover(conn, alteracao["fileId"])
+        else:
+            pendentes.append(arquivo)
+    while pendentes:
+        restantes = [arquivo for arquivo in pendentes if not _gravar(conn, raiz_id, arquivo)]
+        gravados += len(pendentes) - len(restantes)
+        if len(restantes) == len(pendentes):
+            break
+        pendentes = restantes
+    # O que sobrou está fora da raiz (ou foi movido para fora dela)
+    for arquivo in pendentes:
+        removidos += _remover(conn, arquivo["id"])
+    return gravados, removidos
+
+
+def sincronizar_catalogo(conn, servico, raiz_id):
+    with _lock_sincronia:
+        linha = conn.execute("SELECT page_token FROM drive_sincronia WHERE raiz = ?", (raiz_id,)).fetchone()
+        if linha is None:
+            token, resumo = _sincronizar_tudo(conn, servico, raiz_id)
+        else:
+            token = linha[0]
+            alteracoes = []
+            try:
+                while True:
+                    resposta = servico.changes().list(
+                        pageToken=token,
+                        fields=f"nextPageToken, newStartPageToken, changes(fileId, removed, file({CAMPOS_ARQUIVO}))",
+                        pageSize=TAMANHO_PAGINA,
+                        spaces="drive",
+                        supportsAllDrives=True,
+                        includeItemsFromAllDrives=True
+                    ).execute()
+                    alteracoes.extend(resposta.get("changes", []))
+                    if "newStartPageToken" in resposta:
+                        token = resposta["newStartPageToken"]
+                        break
+                    token = resposta["nextPageToken"]
+            except HttpError as erro:
+                if erro.resp.status not in (400, 404, 410):
+                    raise
+                # Token expirado ou inválido: recomeça com a listagem completa
+                token, resumo = _sincronizar_tudo(conn, servico, raiz_id)
+            else:
+                with conn:
+                    gravados, removidos = _aplicar_alteracoes(conn, raiz_id, alteracoes)
+                resumo = {"completa": False, "gravados": gravados, "removidos": removidos}
+        with conn:
+            conn.execute(
+                "INSERT INTO drive_sincronia (raiz, page_token, sincronizado_em) VALUES (?, ?, ?) "
+                "ON CONFLICT (raiz) DO UPDATE SET page_token = excluded.page_token, "
+                "sincronizado_em = excluded.sincronizado_em",
+                (raiz_id, token, datetime.now().isoformat(timespec="seconds"))
+            )
+        return resumo
+
+
+def ultima_sincronizacao(conn, raiz_id):
+    linha = conn.execute("SELECT sincronizado_em FROM drive_sincronia WHERE raiz = ?", (raiz_id,)).fetchone()
+    return datetime.fromisoformat(linha[0]) if linha else None
+
+
+def arquivo_no_catalogo(conn, pai_id, nome, mime=None):
+    sql = "SELECT id FROM drive_catalogo WHERE pai = ? AND nome = ?"
+    parametros = [pai_id, nome]
+    if mime:
+        sql += " AND mime = ?"
+        parametros.append(mime)
+    linha = conn.execute(sql, parametros).fetchone()
+    return linha[0] if linha else None
+
+
+def listar_obras_no_drive(conn):
+    return [linha[0] for linha in conn.execute(
+        "SELECT DISTINCT obra FROM drive_catalogo WHERE obra IS NOT NULL ORDER BY obra"
+    )]
+
+
+def listar_diarios_no_drive(conn, obra=None, data_inicio=None, data_fim=None):
+    # PDFs de diários no catálogo: (id, nome, obra, data, tamanho, modificado_em)
+    filtros = ["mime = 'application/pdf'", "data IS NOT NULL"]
+    parametros = []
+    if obra:
+        filtros.append("obra = ?")
+        parametros.append(obra)
+    if data_inicio:
+        filtros.append("data >= ?")
+        parametros.append(data_inicio.isoformat())
+    if data_fim:
+        filtros.append("data <= ?")
+        parametros.append(data_fim.isoformat())
+    return conn.execute(
+        f"SELECT id, nome, obra, data, tamanho, modificado_em FROM drive_catalogo "
+        f"WHERE {' AND '.join(filtros)} ORDER BY data DESC, obra",
+        parametros
+    ).fetchall()
+
+
+def diario_no_drive(conn, obra, data):
+    linhas = listar_diarios_no_drive(conn, obra, data, data)
+    return linhas[0] if linhas else None
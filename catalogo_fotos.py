@@ -0,0 +1,228 @@
+import hashlib
+import os
+from datetime import datetime
+from pathlib import Path
+
+from PIL import Image as PILImage
+
+# Catálogo permanente das fotos dos diários. Na ingestão são lidos do EXIF a
+# data de captura, o GPS e a orientação, e a foto (já reduzida para o PDF) é
+# guardada com uma pirâmide de miniaturas na pasta servida pelo static serving.
+# A galeria mostra só as miniaturas pequenas e carrega as maiores sob demanda.
+PASTA_CATALOGO = Path("static") / "fotos"
+URL_CATALOGO = "app/static/fotos"
+# Cada nível da pirâmide é gerado a partir do anterior (maior para menor)
+TAMANHOS_MINIATURA = (480, 160)
+QUALIDADE_MINIATURA = 80
+FOTOS_POR_PAGINA = 48
+
+TAG_ORIENTACAO = 0x0112
+TAG_DATA_HORA = 0x0132
+TAG_DATA_HORA_ORIGINAL = 0x9003
+IFD_EXIF = 0x8769
+IFD_GPS = 0x8825
+
+SQL_CRIAR_FOTOS = """
+CREATE TABLE IF NOT EXISTS fotos (
+    id INTEGER PRIMARY KEY,
+    obra TEXT NOT NULL,
+    data TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    nome TEXT,
+    capturada_em TEXT,
+    latitude REAL,
+    longitude REAL,
+    orientacao INTEGER,
+    largura INTEGER,
+    altura INTEGER,
+    incluida_em TEXT NOT NULL,
+    UNIQUE (obra, data, hash)
+)
+"""
+
+
+def criar_tabela_fotos(conn):
+    conn.execute(SQL_CRIAR_FOTOS)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_fotos_obra_data ON fotos(obra, data, id)")
+
+
+def _graus(valor, referencia):
+    try:
+        graus, minutos, segundos = (float(v) for v in valor)
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+    decimal = graus + minutos / 60 + segundos / 3600
+    return -decimal if referencia in ("S", "W") else decimal
+
+
+def metadados_exif(origem):
+    # `origem` é o segmento EXIF enviado pelo navegador (bytes) ou o EXIF de
+    # uma imagem aberta no servidor (Image.getexif())
+    vazio = {"capturada_em": None, "latitude": None, "longitude": None, "orientacao": None}
+    if isinstance(origem, (bytes, bytearray)):
+        if not origem:
+            return vazio
+        exif = PILImage.Exif()
+        try:
+            exif.load(bytes(origem))
+        except Exception:
+            return vazio
+    else:
+        exif = origem
+    try:
+        dados_exif = exif.get_ifd(IFD_EXIF)
+        gps = exif.get_ifd(IFD_GPS)
+    except Exception:
+        return vazio
+    capturada_em = None
+    data_hora = dados_exif.get(TAG_DATA_HORA_ORIGINAL) or exif.get(TAG_DATA_HORA)
+    if data_hora:
+        try:
+            capturada_em = datetime.strptime(str(data_hora).strip("\x00 "), "%Y:%m:%d %H:%M:%S").isoformat()
+        except ValueError:
+            pass
+    latitude = _graus(gps.get(2), gps.get(1))
+    longitude = _graus(gps.get(4), gps.get(3))
+    orientacao = exif.get(TAG_ORIENTACAO)
+    return {
+        "capturada_em": capturada_em,
+        "latitude": latitude,
+        "longitude": longitude,
+        "orientacao": int(orientacao) if orientacao else None,
+    }
+
+
+def url_foto(hash_foto, lado=None):
+    sufixo = f"_{lado}" if lado else ""
+    return f"{URL_CATALOGO}/{hash_foto[:2]}/{hash_foto}{sufixo}.jpg"
+
+
+def caminho_foto(hash_foto, lado=None):
+    sufixo = f"_{lado}" if lado else ""
+    return PASTA_CATALOGO / hash_foto[:2] / f"{hash_foto}{sufixo}.jpg"
+
+
+def _gravar_jpeg(img, destino):
+    temporario = destino.with_suffix(".parcial")
+    img.save(temporario, "JPEG", quality=QUALIDADE_MINIATURA, optimize=True)
+    os.replace(temporario, destino)
+
+
+def _gerar_piramide(foto_path, hash_foto):
+    # Fotos iguais (mesmo hash) já catalogadas não são reprocessadas
+    destino = caminho_foto(hash_foto)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    with PILImage.open(foto_path) as img:
+        tamanho = img.size
+        if all(caminho_foto(hash_foto, lado).exists() for lado in TAMANHOS_MINIATURA) and destino.exists():
+            return tamanho
+        # O JPEG é decodificado já reduzido (escala DCT) até o maior nível
+        img.draft("RGB", (TAMANHOS_MINIATURA[0], TAMANHOS_MINIATURA[0]))
+        nivel = img.convert("RGB")
+    for lado in TAMANHOS_MINIATURA:
+        nivel.thumbnail((lado, lado), PILImage.Resampling.LANCZOS)
+        _gravar_jpeg(nivel, caminho_foto(hash_foto, lado))
+    if not destino.exists():
+        temporario = destino.with_suffix(".parcial")
+        with open(foto_path, "rb") as origem, open(temporario, "wb") as saida:
+            saida.write(origem.read())
+        os.replace(temporario, destino)
+    return tamanho
+
+
+def _hash_arquivo(caminho):
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def catalogar_fotos(conn, obra, data, fotos_paths, metadados):
+    # `fotos_paths` são as fotos já processadas (JPEG de até 1200 px, na
+    # orientação correta); `metadados` vem de metadados_exif, na mesma ordem
+    agora = datetime.now().isoformat(timespec="seconds")
+    linhas = []
+    for foto_path, meta in zip(fotos_paths, metadados):
+        hash_foto = _hash_arquivo(foto_path)
+        largura, altura = _gerar_piramide(foto_path, hash_foto)
+        linhas.append((
+            obra, data.isoformat(), hash_foto, Path(foto_path).name,
+            meta.get("capturada_em"), meta.get("latitude"), meta.get("longitude"), meta.get("orientacao"),
+            largura, altura, agora,
+        ))
+    with conn:
+        conn.executemany(
+            "INSERT INTO fotos (obra, data, hash, nome, capturada_em, latitude, longitude, orientacao, "
+            "largura, altura, incluida_em) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (obra, data, hash) DO NOTHING",
+            linhas
+        )
+    return len(linhas)
+
+
+def listar_obras_com_fotos(conn):
+    return [linha[0] for linha in conn.execute("SELECT DISTINCT obra FROM fotos ORDER BY obra")]
+
+
+def _filtro_fotos(obra, data_inicio, data_fim):
+    filtros = ["obra = ?"]
+    parametros = [obra]
+    if data_inicio:
+        filtros.append("data >= ?")
+        parametros.append(data_inicio.isoformat())
+    if data_fim:
+        filtros.append("data <= ?")
+        parametros.append(data_fim.isoformat())
+    return " AND ".join(filtros), parametros
+
+
+def contar_fotos(conn, obra, data_inicio=None, data_fim=None):
+    where, parametros = _filtro_fotos(obra, data_inicio, data_fim)
+    return conn.execute(f"SELECT COUNT(*) FROM fotos WHERE {where}", parametros).fetchone()[0]
+
+
+def listar_fotos(conn, obra, data_inicio=None, data_fim=None, pagina=1, por_pagina=FOTOS_POR_PAGINA):
+    # Uma página por vez, das fotos mais recentes para as mais antigas (usa o
+    # índice obra/data/id, sem ler o restante do catálogo)
+    where, parametros = _filtro_fotos(obra, data_inicio, data_fim)
+    return conn.execute(
+        f"SELECT hash, data, capturada_em, latitude, longitude, largura, altura FROM fotos "
+        f"WHERE {where} ORDER BY data DESC, id DESC LIMIT ? OFFSET ?",
+        parametros + [por_pagina, (max(pagina, 1) - 1) * por_pagina]
+    ).fetchall()
+
+
+ESTILO_GALERIA = """
+<style>
+  .galeria { display: grid; grid-template-columns: repeat(auto-fill, minmax(160px, 1fr)); gap: 8px; }
+  .galeria figure { margin: 0; background: #f4f4f4; border-radius: 4px; overflow: hidden; }
+  .galeria img { width: 100%; height: 140px; object-fit: cover; display: block; }
+  .galeria figcaption { font-size: 11px; color: #333; padding: 3px 5px; }
+  .galeria figcaption a { color: #0F2A4D; }
+</style>
+"""
+
+
+def gerar_galeria_html(linhas):
+    # As miniaturas usam loading="lazy": o navegador só baixa as que aparecem na
+    # tela, e o srcset escolhe a de 480 px apenas em telas de alta densidade.
+    # Fotos de meses arquivados (arquivo_mensal.py) abrem na versão de 480 px;
+    # o original é lido do pacote pela página da galeria.
+    pequena, media = TAMANHOS_MINIATURA[1], TAMANHOS_MINIATURA[0]
+    itens = []
+    for hash_foto, data, capturada_em, latitude, longitude, _, _ in linhas:
+        legenda = datetime.fromisoformat(capturada_em).strftime("%d/%m/%Y %H:%M") if capturada_em \
+            else datetime.fromisoformat(data).strftime("%d/%m/%Y")
+        if latitude is not None and longitude is not None:
+            legenda += (f' · <a href="https://www.google.com/maps?q={latitude:.6f},{longitude:.6f}" '
+                        f'target="_blank">mapa</a>')
+        itens.append(
+            f'<figure><a href="{url_foto(hash_foto, None if caminho_foto(hash_foto).exists() else media)}" '
+            f'target="_blank">'
+            f'<img src="{url_foto(hash_foto, pequena)}" '
+            f'srcset="{url_foto(hash_foto, pequena)} {pequena}w, {url_foto(hash_foto, media)} {media}w" '
+            f'sizes="160px" loading="lazy" decoding="async" alt=""></a>'
+            f'<figcaption>{legenda}</figcaption></figure>'
+        )
+    return f'{ESTILO_GALERIA}<div class="galeria">{"".join(itens)}</div>'
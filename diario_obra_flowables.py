@@ -0,0 +1,255 @@
+import io
+from datetime import datetime
+from pathlib import Path
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.colors import HexColor, lightgrey, white, darkgrey
+from reportlab.lib.enums import TA_LEFT, TA_CENTER
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.utils import simpleSplit
+from reportlab.platypus import (
+    BaseDocTemplate, PageTemplate, Frame, Paragraph, Spacer, Table, LongTable,
+    TableStyle, KeepTogether, PageBreak, NextPageTemplate, Image, Flowable
+)
+from xml.sax.saxutils import escape
+
+from artefatos import criar_saida_pdf
+from layout_fotos import LAYOUTS_FOTOS, LAYOUT_FOTOS_PADRAO, paginas_grade, fotos_apendice, desenhar_grade_canvas
+
+# Layout em fluxo (platypus): as alturas vêm do texto já quebrado em linhas e
+# tabelas/textos longos continuam na página seguinte em vez de sobrepor o rodapé.
+MARGEM = 30
+ALTURA_CABECALHO = 100
+MIN_LINHAS_EFETIVO = 6
+AZUL_RDV = HexColor("#0F2A4D")
+
+estilo_titulo = ParagraphStyle(name="titulo_secao", fontName="Helvetica-Bold", fontSize=10, leading=12)
+estilo_texto = ParagraphStyle(name="texto_secao", fontName="Helvetica", fontSize=10, leading=12, alignment=TA_LEFT)
+estilo_celula = ParagraphStyle(name="celula_efetivo", fontName="Helvetica", fontSize=8, leading=10, alignment=TA_LEFT)
+estilo_assinatura = ParagraphStyle(name="assinatura", fontName="Helvetica", fontSize=9, leading=12,
+                                   alignment=TA_CENTER, textColor=darkgrey)
+
+
+def _paragrafo(texto, estilo):
+    return Paragraph(escape(texto or ""), estilo)
+
+
+def _caixa_texto(titulo, texto, largura):
+    # Uma linha da tabela por linha já quebrada na largura da caixa: mesmo um
+    # parágrafo único maior que a página pode ser dividido entre páginas, e a
+    # caixa (BOX) é redesenhada em cada parte.
+    padding_esquerda, padding_direita = 8, 6
+    largura_texto = largura - padding_esquerda - padding_direita
+    linhas = [[_paragrafo(titulo, estilo_titulo)]]
+    for paragrafo in texto.split("\n"):
+        if not paragrafo.strip():
+            linhas.append([Spacer(1, 6)])
+            continue
+        for linha in simpleSplit(paragrafo, estilo_texto.fontName, estilo_texto.fontSize, largura_texto):
+            linhas.append([linha])
+    tabela = Table(linhas, colWidths=[largura], splitByRow=1)
+    tabela.setStyle(TableStyle([
+        ("BOX", (0, 0), (-1, -1), 0.5, darkgrey),
+        ("FONTNAME", (0, 1), (-1, -1), estilo_texto.fontName),
+        ("FONTSIZE", (0, 1), (-1, -1), estilo_texto.fontSize),
+        ("LEADING", (0, 1), (-1, -1), estilo_texto.leading),
+        ("LEFTPADDING", (0, 0), (-1, -1), padding_esquerda),
+        ("RIGHTPADDING", (0, 0), (-1, -1), padding_direita),
+        ("TOPPADDING", (0, 0), (-1, -1), 0),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 0),
+        ("TOPPADDING", (0, 0), (-1, 0), 5),
+        ("BOTTOMPADDING", (0, 0), (-1, 0), 1),
+        ("BOTTOMPADDING", (0, -1), (-1, -1), 6),
+    ]))
+    return tabela
+
+
+def _tabela_info(registro, largura):
+    data = [
+        ["OBRA:", registro.obra or "N/A"],
+        ["LOCAL:", registro.local or "N/A"],
+        ["DATA:", registro.data_br],
+        ["CONTRATO:", registro.contrato or "N/A"],
+    ]
+    tabela = Table(data, colWidths=[100, largura - 100])
+    tabela.setStyle(TableStyle([
+        ("FONTNAME", (0, 0), (-1, -1), "Helvetica-Bold"),
+        ("FONTSIZE", (0, 0), (-1, -1), 10),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
+    ]))
+    return tabela
+
+
+def _tabela_clima(registro, largura):
+    tabela = Table([["Condições do dia:", registro.clima or "N/A"]], colWidths=[115, largura - 115])
+    tabela.setStyle(TableStyle([
+        ("BOX", (0, 0), (-1, -1), 0.5, darkgrey),
+        ("FONTNAME", (0, 0), (0, 0), "Helvetica-Bold"),
+        ("FONTSIZE", (0, 0), (0, 0), 10),
+        ("FONTNAME", (1, 0), (1, 0), "Helvetica"),
+        ("FONTSIZE", (1, 0), (1, 0), 11),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+    ]))
+    return tabela
+
+
+def _tabela_efetivo(registro, largura):
+    data = [["NOME", "FUNÇÃO", "1ª ENTRADA", "1ª SAÍDA"]]
+    for item in registro.efetivo_preenchido:
+        data.append([
+            _paragrafo(item.nome, estilo_celula),
+            _paragrafo(item.funcao, estilo_celula),
+            item.entrada,
+            item.saida,
+        ])
+    while len(data) < MIN_LINHAS_EFETIVO + 1:
+        data.append(["", "", "", ""])
+    largura_nome = largura - 100 - 65 - 65
+    # repeatRows=1 repete o cabeçalho em cada página quando a equipe é grande
+    tabela = LongTable(data, colWidths=[largura_nome, 100, 65, 65], repeatRows=1, splitByRow=1)
+    tabela.setStyle(TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), AZUL_RDV),
+        ("TEXTCOLOR", (0, 0), (-1, 0), white),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("FONTSIZE", (0, 0), (-1, 0), 9),
+        ("FONTSIZE", (0, 1), (-1, -1), 8),
+        ("ALIGN", (0, 0), (-1, 0), "CENTER"),
+        ("ALIGN", (2, 1), (3, -1), "CENTER"),
+        ("ALIGN", (0, 1), (1, -1), "LEFT"),
+        ("GRID", (0, 0), (-1, -1), 0.5, lightgrey),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+    ]))
+    return tabela
+
+
+def _bloco_assinaturas(registro, largura):
+    responsavel = registro.responsavel or "Eng. Responsável"
+    fiscal = registro.fiscalizacao or "Conforme assinatura"
+    linha = "_" * 35
+    data = [
+        [Spacer(1, 20), Spacer(1, 20)],
+        [_paragrafo(linha, estilo_assinatura), _paragrafo(linha, estilo_assinatura)],
+        [_paragrafo("Responsável Técnico", estilo_assinatura), _paragrafo("Fiscalização", estilo_assinatura)],
+        [_paragrafo(f"Nome: {responsavel}", estilo_assinatura), _paragrafo(f"Nome: {fiscal}", estilo_assinatura)],
+        [_paragrafo(f"Gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M')}", estilo_celula), ""],
+    ]
+    tabela = Table(data, colWidths=[largura / 2, largura / 2])
+    tabela.setStyle(TableStyle([
+        ("BOX", (0, 0), (-1, -1), 0.5, darkgrey),
+        ("SPAN", (0, -1), (-1, -1)),
+        ("TOPPADDING", (0, 0), (-1, -1), 1),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 1),
+    ]))
+    # O rodapé de assinaturas nunca é dividido entre duas páginas
+    return KeepTogether([Spacer(1, 10), tabela])
+
+
+def _imagem_flowable(img, largura, altura):
+    buffer_img = io.BytesIO()
+    img.save(buffer_img, "JPEG", quality=85)
+    buffer_img.seek(0)
+    return Image(buffer_img, width=largura, height=altura)
+
+
+class _GradeFotos(Flowable):
+    # Uma página da grade de fotos, desenhada pela mesma rotina do layout em canvas
+    def __init__(self, itens, largura, altura):
+        super().__init__()
+        self.itens = itens
+        self.largura = largura
+        self.altura = altura
+
+    def wrap(self, largura_disponivel, altura_disponivel):
+        return self.largura, self.altura
+
+    def draw(self):
+        desenhar_grade_canvas(self.canv, self.itens, 0, self.altura)
+
+
+def _paginas_fotos(fotos_paths, largura, altura, layout_fotos):
+    colunas, linhas = LAYOUTS_FOTOS.get(layout_fotos, LAYOUTS_FOTOS[LAYOUT_FOTOS_PADRAO])
+    titulo_h = 25
+    # 1 pt de folga para a grade nunca exceder o frame por arredondamento
+    altura_grade = altura - titulo_h - 1
+    fluxo = []
+    for itens in paginas_grade(fotos_paths, largura, altura_grade, colunas, linhas):
+        fluxo.append(PageBreak())
+        fluxo.append(Table([[_paragrafo("Registro Fotográfico", estilo_titulo)]],
+                           colWidths=[largura], rowHeights=[titulo_h]))
+        fluxo.append(_GradeFotos(itens, largura, altura_grade))
+    return fluxo
+
+
+def _apendice_fotos(fotos_paths, largura, altura):
+    fluxo = []
+    for numero, foto_path, img, w_img, h_img in fotos_apendice(fotos_paths, largura, altura - 30):
+        fluxo.append(PageBreak())
+        fluxo.append(_paragrafo(f"Apêndice - Foto {numero}: {Path(foto_path).name}", estilo_titulo))
+        fluxo.append(Spacer(1, 10))
+        fluxo.append(_imagem_flowable(img, w_img, h_img))
+    return fluxo
+
+
+def montar_fluxo(registro, largura):
+    def texto(valor, padrao):
+        return (valor or "").strip() or padrao
+
+    return [
+        _tabela_info(registro, largura),
+        Spacer(1, 10),
+        _tabela_clima(registro, largura),
+        Spacer(1, 8),
+        _caixa_texto("Máquinas e Equipamentos:", texto(registro.maquinas, "Nenhuma máquina/equipamento informado."), largura),
+        Spacer(1, 8),
+        _caixa_texto("Serviços Executados:", texto(registro.servicos, "Nenhum serviço executado informado."), largura),
+        Spacer(1, 8),
+        _paragrafo("Efetivo de Pessoal:", estilo_titulo),
+        Spacer(1, 6),
+        _tabela_efetivo(registro, largura),
+        Spacer(1, 10),
+        _caixa_texto("Ocorrências:", texto(registro.ocorrencias, "Nenhuma ocorrência informada."), largura),
+        Spacer(1, 10),
+        _caixa_texto("Fiscalização:", f"Nome da Fiscalização: {texto(registro.fiscalizacao, 'N/A')}", largura),
+        _bloco_assinaturas(registro, largura),
+    ]
+
+
+def gerar_pdf_fluxo(registro, fotos_paths, cabecalho=None, layout_fotos=LAYOUT_FOTOS_PADRAO, apendice_fotos=False):
+    buffer = criar_saida_pdf()
+    try:
+        width, height = A4
+        largura = width - 2 * MARGEM
+        altura = height - 2 * MARGEM
+
+        def primeira_pagina(c, doc):
+            if cabecalho:
+                c.saveState()
+                cabecalho(c, width, height)
+                c.restoreState()
+
+        doc = BaseDocTemplate(buffer, pagesize=A4, leftMargin=MARGEM, rightMargin=MARGEM,
+                              topMargin=MARGEM, bottomMargin=MARGEM, title="Diário de Obra")
+        frame_primeira = Frame(MARGEM, MARGEM, largura, height - ALTURA_CABECALHO - MARGEM, id="primeira",
+                               leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0)
+        frame_demais = Frame(MARGEM, MARGEM, largura, altura, id="demais",
+                             leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0)
+        doc.addPageTemplates([
+            PageTemplate(id="primeira", frames=[frame_primeira], onPage=primeira_pagina, autoNextPageTemplate="demais"),
+            PageTemplate(id="demais", frames=[frame_demais]),
+        ])
+
+        fluxo = montar_fluxo(registro, largura)
+        fotos_validas = [f for f in fotos_paths if Path(f).exists()]
+        if fotos_validas:
+            fluxo.append(NextPageTemplate("demais"))
+            fluxo.extend(_paginas_fotos(fotos_validas, largura, altura, layout_fotos))
+            if apendice_fotos:
+                fluxo.extend(_apendice_fotos(fotos_validas, largura, altura))
+        doc.build(fluxo)
+        buffer.seek(0)
+        return buffer
+    except Exception as e:
+        print("Erro ao gerar PDF (fluxo):", e)
+        buffer.close()
+        return None
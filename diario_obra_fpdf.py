@@ -1,9 +1,17 @@
 import os
-import io
+import shutil
+import tempfile
 from datetime import datetime
 from fpdf import FPDF
 
+from artefatos import criar_saida_pdf, TAMANHO_BLOCO
+from layout_fotos import (
+    LAYOUTS_FOTOS, LAYOUT_FOTOS_PADRAO, ESPACO_ENTRE_FOTOS, ALTURA_LEGENDA,
+    paginas_grade, fotos_apendice, ajustar_legenda
+)
+
 LOGO_PDF_PATH = "LOGO_RDV_AZUL.png"
+MM_POR_PONTO = 25.4 / 72
 
 class DiarioObraPDF(FPDF):
     def header(self):
@@ -25,7 +33,7 @@ class DiarioObraPDF(FPDF):
         self.set_text_color(130, 130, 130)
         self.cell(0, 6, f'Gerado em: {datetime.now().strftime("%d/%m/%Y %H:%M")} - Página {self.page_no()}', 0, 0, 'R')
 
-def gerar_pdf_fpdf(dados_obra, colaboradores, maquinas, servicos, controle_doc, intercorrencias, responsavel, fiscal, clima, fotos_paths=None):
+def gerar_pdf_fpdf(registro, fotos_paths=None, layout_fotos=LAYOUT_FOTOS_PADRAO, apendice_fotos=False):
     pdf = DiarioObraPDF()
     pdf.add_page()
     pdf.set_auto_page_break(auto=True, margin=20)
@@ -34,11 +42,11 @@ def gerar_pdf_fpdf(dados_obra, colaboradores, maquinas, servicos, controle_doc,
     pdf.set_font('Arial', 'B', 11)
     pdf.set_text_color(0, 0, 0)
     campos = [
-        ("OBRA:", dados_obra.get("obra", "")),
-        ("LOCAL:", dados_obra.get("local", "")),
-        ("DATA:", dados_obra.get("data", "")),
-        ("CONTRATO:", dados_obra.get("contrato", "")),
-        ("CLIMA:", clima)
+        ("OBRA:", registro.obra),
+        ("LOCAL:", registro.local),
+        ("DATA:", registro.data_br),
+        ("CONTRATO:", registro.contrato),
+        ("CLIMA:", registro.clima)
     ]
     for rotulo, valor in campos:
         pdf.cell(25, 8, rotulo, 0, 0)
@@ -51,14 +59,14 @@ def gerar_pdf_fpdf(dados_obra, colaboradores, maquinas, servicos, controle_doc,
     pdf.set_fill_color(220, 230, 242)
     pdf.cell(0, 7, 'SERVIÇOS EXECUTADOS:', 0, 1, 'L', True)
     pdf.set_font('Arial', '', 10)
-    pdf.multi_cell(0, 7, servicos.strip() if servicos.strip() else "Nenhum serviço informado.", 0, 1)
+    pdf.multi_cell(0, 7, registro.servicos.strip() if registro.servicos.strip() else "Nenhum serviço informado.", 0, 1)
 
     # --- Máquinas e Equipamentos ---
     pdf.ln(2)
     pdf.set_font('Arial', 'B', 11)
     pdf.cell(0, 7, 'MÁQUINAS/EQUIPAMENTOS:', 0, 1, 'L', True)
     pdf.set_font('Arial', '', 10)
-    pdf.multi_cell(0, 7, maquinas.strip() if maquinas.strip() else "Nenhuma máquina/equipamento informado.", 0, 1)
+    pdf.multi_cell(0, 7, registro.maquinas.strip() if registro.maquinas.strip() else "Nenhuma máquina/equipamento informado.", 0, 1)
 
     # --- Efetivo de Pessoal ---
     pdf.ln(2)
@@ -73,11 +81,11 @@ def gerar_pdf_fpdf(dados_obra, colaboradores, maquinas, servicos, controle_doc,
     pdf.cell(30, 8, 'SAÍDA', 1, 1, 'C', True)
     pdf.set_text_color(0, 0, 0)
     pdf.set_font('Arial', '', 9)
-    for row in colaboradores:
-        pdf.cell(70, 8, row[0], 1)
-        pdf.cell(40, 8, row[1], 1)
-        pdf.cell(30, 8, row[2], 1)
-        pdf.cell(30, 8, row[3], 1)
+    for item in registro.efetivo_preenchido:
+        pdf.cell(70, 8, item.nome, 1)
+        pdf.cell(40, 8, item.funcao, 1)
+        pdf.cell(30, 8, item.entrada, 1)
+        pdf.cell(30, 8, item.saida, 1)
         pdf.ln()
     pdf.ln(2)
 
@@ -86,7 +94,7 @@ def gerar_pdf_fpdf(dados_obra, colaboradores, maquinas, servicos, controle_doc,
     pdf.set_fill_color(220, 230, 242)
     pdf.cell(0, 7, 'CONTROLE DE DOCUMENTAÇÃO DE SEGURANÇA:', 0, 1, 'L', True)
     pdf.set_font('Arial', '', 10)
-    pdf.multi_cell(0, 7, controle_doc.strip() if controle_doc.strip() else "Não informado.", 0, 1)
+    pdf.multi_cell(0, 7, registro.controle_documentacao.strip() if registro.controle_documentacao.strip() else "Não informado.", 0, 1)
     pdf.ln(2)
 
     # --- Intercorrências ---
@@ -94,7 +102,7 @@ def gerar_pdf_fpdf(dados_obra, colaboradores, maquinas, servicos, controle_doc,
     pdf.set_fill_color(220, 230, 242)
     pdf.cell(0, 7, 'INTERCORRÊNCIAS:', 0, 1, 'L', True)
     pdf.set_font('Arial', '', 10)
-    pdf.multi_cell(0, 7, intercorrencias.strip() if intercorrencias.strip() else "Sem intercorrências.", 0, 1)
+    pdf.multi_cell(0, 7, registro.ocorrencias.strip() if registro.ocorrencias.strip() else "Sem intercorrências.", 0, 1)
     pdf.ln(2)
 
     # --- Assinaturas ---
@@ -116,22 +124,70 @@ def gerar_pdf_fpdf(dados_obra, colaboradores, maquinas, servicos, controle_doc,
     pdf.set_font('Arial', '', 11)
     pdf.set_xy(x_inicio, y_assin + espaco_vertical)
     pdf.cell(largura_linha, 7, "Responsável Técnico:", 0, 2, 'C')
-    pdf.cell(largura_linha, 7, f"Nome: {responsavel}", 0, 0, 'C')
+    pdf.cell(largura_linha, 7, f"Nome: {registro.responsavel}", 0, 0, 'C')
 
     pdf.set_xy(x_inicio + largura_linha + distancia_entre, y_assin + espaco_vertical)
     pdf.cell(largura_linha, 7, "Fiscalização:", 0, 2, 'C')
-    pdf.cell(largura_linha, 7, f"Nome: {fiscal}", 0, 0, 'C')
+    pdf.cell(largura_linha, 7, f"Nome: {registro.fiscalizacao}", 0, 0, 'C')
     pdf.ln(20)
 
-    # --- Fotos (cada uma em nova página) ---
+    # --- Fotos em grade (folha de contatos) ---
     if fotos_paths:
-        for path in fotos_paths:
-            if os.path.exists(path):
+        fotos_validas = [path for path in fotos_paths if os.path.exists(path)]
+        colunas, linhas = LAYOUTS_FOTOS.get(layout_fotos, LAYOUTS_FOTOS[LAYOUT_FOTOS_PADRAO])
+        margem = pdf.l_margin
+        topo = 45
+        largura_util = pdf.w - 2 * margem
+        altura_util = pdf.h - topo - 25
+        temp_dir = tempfile.mkdtemp(prefix="diario_fpdf_")
+        try:
+            # Células em mm; ESPACO/LEGENDA padrão estão em pontos, por isso a conversão
+            paginas = paginas_grade(fotos_validas, largura_util, altura_util, colunas, linhas,
+                                    espaco=ESPACO_ENTRE_FOTOS * MM_POR_PONTO,
+                                    altura_legenda=ALTURA_LEGENDA * MM_POR_PONTO,
+                                    pontos_por_unidade=1 / MM_POR_PONTO)
+            for itens in paginas:
                 pdf.add_page()
                 pdf.set_font('Arial', 'B', 12)
-                pdf.cell(0, 10, f'Foto: {os.path.basename(path)}', 0, 1)
-                pdf.image(path, x=30, w=150)
-
-    # Retorno do PDF em buffer
-    pdf_buffer = io.BytesIO(pdf.output(dest='S').encode('latin1'))
+                pdf.cell(0, 8, 'REGISTRO FOTOGRÁFICO', 0, 1)
+                for item in itens:
+                    miniatura_path = os.path.join(temp_dir, f"foto_{item.numero}.jpg")
+                    item.img.save(miniatura_path, "JPEG", quality=85)
+                    pdf.image(miniatura_path, x=margem + item.x, y=topo + item.y_topo, w=item.largura, h=item.altura)
+                    pdf.set_font('Arial', '', 8)
+                    pdf.set_xy(margem + item.x_celula, topo + item.y_legenda + 1)
+                    pdf.cell(item.largura_celula, 4,
+                             ajustar_legenda(item.legenda, item.largura_celula, pdf.get_string_width), 0, 0, 'C')
+
+            # --- Apêndice opcional (cada foto em nova página) ---
+            if apendice_fotos:
+                largura_apendice = pdf.w - 2 * margem
+                altura_apendice = pdf.h - topo - 35
+                for numero, path, img, w_img, h_img in fotos_apendice(fotos_validas, largura_apendice,
+                                                                      altura_apendice, ampliar=True):
+                    pdf.add_page()
+                    pdf.set_font('Arial', 'B', 12)
+                    pdf.cell(0, 10, f'Apêndice - Foto {numero}: {os.path.basename(path)}', 0, 1)
+                    apendice_path = os.path.join(temp_dir, f"apendice_{numero}.jpg")
+                    img.save(apendice_path, "JPEG", quality=90)
+                    pdf.image(apendice_path, x=margem + (largura_apendice - w_img) / 2, w=w_img, h=h_img)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    # Retorno do PDF em arquivo temporário "spooled": fica em memória até
+    # PDF_SPOOL_MAX_BYTES e depois passa para o disco. close() encerra o
+    # documento; no fpdf 1.7 o resultado é a string latin1 em pdf.buffer, que é
+    # codificada bloco a bloco sem montar uma segunda cópia inteira em bytes.
+    pdf.close()
+    pdf_buffer = criar_saida_pdf()
+    conteudo = getattr(pdf, "buffer", None)
+    if isinstance(conteudo, str):
+        for inicio in range(0, len(conteudo), TAMANHO_BLOCO):
+            pdf_buffer.write(conteudo[inicio:inicio + TAMANHO_BLOCO].encode('latin1'))
+    else:
+        # fpdf2: output() já devolve bytes; gravados por fatias, sem copiar
+        conteudo = memoryview(pdf.output())
+        for inicio in range(0, len(conteudo), TAMANHO_BLOCO):
+            pdf_buffer.write(conteudo[inicio:inicio + TAMANHO_BLOCO])
+    pdf_buffer.seek(0)
     return pdf_buffer
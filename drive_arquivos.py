@@ -0,0 +1,227 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from google.oauth2 import service_account
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaIoBaseUpload
+
+from artefatos import TAMANHO_BLOCO_UPLOAD
+from catalogo_drive import (
+    BANCO_DRIVE, MIME_PASTA, CAMPOS_ARQUIVO, conectar_catalogo, arquivo_no_catalogo, registrar_arquivo,
+    remover_arquivo
+)
+
+# Envio para o Drive organizado em pastas obra/ano/mês. Os IDs das pastas
+# vêm do catálogo local (SQLite) para não listar o Drive a cada envio, e os
+# arquivos de um diário (PDF + fotos originais) sobem em paralelo. Um arquivo
+# que o catálogo local (catalogo_drive.py) já conhece na pasta é substituído em
+# vez de duplicado, então reenviar o mesmo diário é idempotente.
+MAX_UPLOADS_SIMULTANEOS = 4
+
+_executor = None
+_lock_executor = threading.Lock()
+# Último erro de preparo de cada thread do pool (pelo nome da thread); sai
+# quando a thread se prepara de novo com sucesso
+_erros_preparo = {}
+_local = threading.local()
+_lock_pastas = threading.Lock()
+
+
+def credenciais_drive(info_conta_servico):
+    return service_account.Credentials.from_service_account_info(
+        info_conta_servico, scopes=["https://www.googleapis.com/auth/drive"]
+    )
+
+
+def criar_servico_drive(creds):
+    return build("drive", "v3", credentials=creds, static_discovery=False)
+
+
+def servico_da_thread(creds):
+    # O cliente HTTP do googleapiclient não é thread-safe: um serviço por thread
+    servico = getattr(_local, "servico", None)
+    if servico is None:
+        servico = criar_servico_drive(creds)
+        _local.servico = servico
+    return servico
+
+
+def _preparar_thread(creds, raiz_id):
+    # Roda uma vez em cada thread criada pelo pool: monta o serviço do Drive
+    # (discovery, token de acesso, conexão TLS) antes do primeiro upload dela.
+    # Um erro aqui não pode escapar, ou o pool inteiro fica inutilizável.
+    nome_thread = threading.current_thread().name
+    try:
+        servico = servico_da_thread(creds)
+        if raiz_id:
+            servico.files().get(fileId=raiz_id, fields="id", supportsAllDrives=True).execute()
+    except HttpError:
+        pass
+    except Exception as erro:
+        _erros_preparo[nome_thread] = erro
+        return
+    _erros_preparo.pop(nome_thread, None)
+
+
+def _repreparar_thread(creds, raiz_id):
+    # Tarefa do aquecimento: uma thread que falhou no preparo tenta de novo
+    if threading.current_thread().name in _erros_preparo:
+        _preparar_thread(creds, raiz_id)
+
+
+def _pool_uploads(creds, raiz_id=None):
+    global _executor
+    with _lock_executor:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=MAX_UPLOADS_SIMULTANEOS, thread_name_prefix="drive_upload",
+                initializer=_preparar_thread, initargs=(creds, raiz_id)
+            )
+        return _executor
+
+
+def _conectar_cache():
+    return conectar_catalogo(BANCO_DRIVE)
+
+
+def _pasta_no_catalogo(pai_id, nome):
+    conn = _conectar_cache()
+    try:
+        return arquivo_no_catalogo(conn, pai_id, nome, MIME_PASTA)
+    finally:
+        conn.close()
+
+
+def esquecer_pasta_obra(raiz_id, obra):
+    # Retira a pasta da obra (e tudo abaixo dela) do catálogo, ex.: pasta
+    # apagada no Drive antes da próxima sincronização
+    conn = _conectar_cache()
+    try:
+        pasta_id = arquivo_no_catalogo(conn, raiz_id, obra, MIME_PASTA)
+        if pasta_id:
+            remover_arquivo(conn, pasta_id)
+    finally:
+        conn.close()
+
+
+def resolver_pasta(servico, raiz_id, pai_id, nome):
+    # O catálogo é a única fonte dos IDs das pastas: a sincronização já aplica
+    # nele pastas apagadas, renomeadas ou movidas no Drive
+    pasta_id = _pasta_no_catalogo(pai_id, nome)
+    if pasta_id:
+        return pasta_id
+    with _lock_pastas:
+        pasta_id = _pasta_no_catalogo(pai_id, nome)
+        if pasta_id:
+            return pasta_id
+        nome_q = nome.replace("\\", "\\\\").replace("'", "\\'")
+        resposta = servico.files().list(
+            q=f"'{pai_id}' in parents and name = '{nome_q}' and mimeType = '{MIME_PASTA}' and trashed = false",
+            fields="files(id)",
+            supportsAllDrives=True,
+            includeItemsFromAllDrives=True
+        ).execute()
+        encontrados = resposta.get("files", [])
+        if encontrados:
+            pasta_id = encontrados[0]["id"]
+        else:
+            pasta = servico.files().create(
+                body={"name": nome, "mimeType": MIME_PASTA, "parents": [pai_id]},
+                fields="id",
+                supportsAllDrives=True
+            ).execute()
+            pasta_id = pasta["id"]
+        # Registrada ainda dentro do lock: outra sessão já a encontra no catálogo
+        conn = _conectar_cache()
+        try:
+            registrar_arquivo(conn, raiz_id, {"id": pasta_id, "name": nome, "mimeType": MIME_PASTA, "parents": [pai_id]})
+        finally:
+            conn.close()
+        return pasta_id
+
+
+def resolver_pasta_diario(servico, raiz_id, obra, data):
+    pasta_id = raiz_id
+    for nome in (obra, data.strftime("%Y"), data.strftime("%m")):
+        pasta_id = resolver_pasta(servico, raiz_id, pasta_id, nome)
+    return pasta_id
+
+
+def enviar_arquivo(creds, pasta_id, nome_arquivo, arquivo, mimetype, arquivo_id=None):
+    # Com `arquivo_id` (arquivo já existente na pasta) o conteúdo é substituído.
+    # Retorna os metadados do arquivo no Drive.
+    servico = servico_da_thread(creds)
+    if arquivo_id:
+        arquivo.seek(0)
+        media = MediaIoBaseUpload(arquivo, mimetype=mimetype, chunksize=TAMANHO_BLOCO_UPLOAD, resumable=True)
+        try:
+            return servico.files().update(
+                fileId=arquivo_id,
+                media_body=media,
+                fields=CAMPOS_ARQUIVO,
+                supportsAllDrives=True
+            ).execute()
+        except HttpError as erro:
+            # Catálogo desatualizado (arquivo apagado no Drive): cria de novo
+            if erro.resp.status != 404:
+                raise
+    arquivo.seek(0)
+    media = MediaIoBaseUpload(arquivo, mimetype=mimetype, chunksize=TAMANHO_BLOCO_UPLOAD, resumable=True)
+    return servico.files().create(
+        body={"name": nome_arquivo, "parents": [pasta_id]},
+        media_body=media,
+        fields=CAMPOS_ARQUIVO,
+        supportsAllDrives=True
+    ).execute()
+
+
+def enviar_diario(creds, raiz_id, obra, data, arquivos):
+    # `arquivos`: lista de (nome, arquivo, mimetype); o primeiro é o PDF.
+    # Retorna {nome: id ou None} e {nome: erro} para as falhas.
+    # Na thread de quem chama (serviço próprio em cache): a resolução não
+    # espera na fila atrás dos uploads de outras sessões
+    pasta_id = resolver_pasta_diario(servico_da_thread(creds), raiz_id, obra, data)
+    conn = _conectar_cache()
+    try:
+        existentes = {nome: arquivo_no_catalogo(conn, pasta_id, nome) for nome, _, _ in arquivos}
+    finally:
+        conn.close()
+    pool = _pool_uploads(creds, raiz_id)
+    futuros = {
+        nome: pool.submit(enviar_arquivo, creds, pasta_id, nome, arquivo, mimetype, existentes[nome])
+        for nome, arquivo, mimetype in arquivos
+    }
+    ids, erros, enviados = {}, {}, []
+    for nome, futuro in futuros.items():
+        try:
+            enviado = futuro.result()
+            ids[nome] = enviado.get("id")
+            enviados.append(dict(enviado, parents=enviado.get("parents") or [pasta_id]))
+        except Exception as erro:
+            ids[nome] = None
+            erros[nome] = erro
+            if isinstance(erro, HttpError) and erro.resp.status == 404:
+                # Pasta do catálogo não existe mais no Drive: o próximo envio refaz a hierarquia
+                esquecer_pasta_obra(raiz_id, obra)
+    conn = _conectar_cache()
+    try:
+        for enviado in enviados:
+            registrar_arquivo(conn, raiz_id, enviado)
+    finally:
+        conn.close()
+    return ids, erros
+
+
+def aquecer_uploads(creds, raiz_id):
+    # Cria as threads do pool antes do primeiro envio; cada uma se prepara no
+    # initializer. As tarefas vazias chegam juntas enquanto as primeiras
+    # threads ainda se preparam, então o pool abre uma thread para cada.
+    # Sem barreira: um upload real em andamento não bloqueia nada. Só os
+    # erros das threads que continuam sem preparo são informados.
+    pool = _pool_uploads(creds, raiz_id)
+    for futuro in [pool.submit(_repreparar_thread, creds, raiz_id) for _ in range(MAX_UPLOADS_SIMULTANEOS)]:
+        futuro.result()
+    erros = list(_erros_preparo.values())
+    if erros:
+        raise erros[0]
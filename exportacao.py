@@ -0,0 +1,125 @@
+import argparse
+import csv
+from datetime import date
+
+from banco_registros import conectar
+
+# Exportação em lotes para BI: o cursor é lido com fetchmany e cada lote é
+# escrito antes do próximo, então a memória não cresce com o período exportado.
+TAMANHO_LOTE = 5000
+
+CONSULTAS = {
+    "registros": (
+        "SELECT r.id AS registro_id, r.obra, r.local, r.data, r.contrato, r.clima, r.maquinas, "
+        "r.servicos, r.ocorrencias, r.responsavel, r.fiscalizacao, r.usuario, r.atualizado_em "
+        "FROM registros r"
+    ),
+    "efetivo": (
+        "SELECT r.id AS registro_id, r.obra, r.data, r.contrato, e.nome, e.funcao, "
+        "e.entrada, e.saida, e.horas "
+        "FROM efetivo e JOIN registros r ON r.id = e.registro_id"
+    ),
+}
+
+# Tipos das colunas no Parquet (as demais são texto)
+TIPOS_PARQUET = {
+    "registro_id": "int64",
+    "horas": "float64",
+}
+
+FORMATOS = ("csv", "parquet")
+
+
+def _montar_consulta(tipo, data_inicio=None, data_fim=None, obras=None):
+    sql = CONSULTAS[tipo]
+    condicoes, parametros = [], []
+    if data_inicio:
+        condicoes.append("r.data >= ?")
+        parametros.append(data_inicio.isoformat())
+    if data_fim:
+        condicoes.append("r.data <= ?")
+        parametros.append(data_fim.isoformat())
+    if obras:
+        condicoes.append(f"r.obra IN ({', '.join('?' * len(obras))})")
+        parametros.extend(obras)
+    if condicoes:
+        sql += " WHERE " + " AND ".join(condicoes)
+    sql += " ORDER BY r.data, r.obra"
+    return sql, parametros
+
+
+def iterar_lotes(conn, tipo, data_inicio=None, data_fim=None, obras=None, tamanho_lote=TAMANHO_LOTE):
+    sql, parametros = _montar_consulta(tipo, data_inicio, data_fim, obras)
+    cursor = conn.execute(sql, parametros)
+    colunas = [d[0] for d in cursor.description]
+    while True:
+        linhas = cursor.fetchmany(tamanho_lote)
+        if not linhas:
+            break
+        yield colunas, linhas
+
+
+def colunas_exportacao(conn, tipo):
+    sql, _ = _montar_consulta(tipo)
+    return [d[0] for d in conn.execute(sql + " LIMIT 0").description]
+
+
+def exportar_csv(conn, tipo, destino, **filtros):
+    total = 0
+    with open(destino, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(colunas_exportacao(conn, tipo))
+        for _, linhas in iterar_lotes(conn, tipo, **filtros):
+            writer.writerows(linhas)
+            total += len(linhas)
+    return total
+
+
+def exportar_parquet(conn, tipo, destino, **filtros):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    colunas = colunas_exportacao(conn, tipo)
+    schema = pa.schema([(col, TIPOS_PARQUET.get(col, "string")) for col in colunas])
+    total = 0
+    # Cada lote vira um row group; o arquivo é colunar e comprimido
+    with pq.ParquetWriter(destino, schema, compression="snappy") as writer:
+        for _, linhas in iterar_lotes(conn, tipo, **filtros):
+            colunas_lote = list(zip(*linhas))
+            tabela = pa.Table.from_arrays(
+                [pa.array(valores, type=campo.type) for valores, campo in zip(colunas_lote, schema)],
+                schema=schema
+            )
+            writer.write_table(tabela)
+            total += len(linhas)
+    return total
+
+
+def exportar(conn, tipo, formato, destino, **filtros):
+    if formato == "parquet":
+        return exportar_parquet(conn, tipo, destino, **filtros)
+    return exportar_csv(conn, tipo, destino, **filtros)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta diários de obra para CSV/Parquet (BI).")
+    parser.add_argument("tipo", choices=list(CONSULTAS.keys()))
+    parser.add_argument("--formato", choices=FORMATOS, default="parquet")
+    parser.add_argument("--saida", required=True, help="Arquivo de destino")
+    parser.add_argument("--inicio", type=date.fromisoformat, help="Data inicial (AAAA-MM-DD)")
+    parser.add_argument("--fim", type=date.fromisoformat, help="Data final (AAAA-MM-DD)")
+    parser.add_argument("--obra", action="append", help="Filtra por obra (pode repetir)")
+    parser.add_argument("--banco", default=None, help="Caminho do banco de registros")
+    args = parser.parse_args()
+
+    conn = conectar(args.banco) if args.banco else conectar()
+    try:
+        total = exportar(conn, args.tipo, args.formato, args.saida,
+                         data_inicio=args.inicio, data_fim=args.fim, obras=args.obra)
+    finally:
+        conn.close()
+    print(f"{total} linhas exportadas para {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
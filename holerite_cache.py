@@ -0,0 +1,112 @@
+import hashlib
+import hmac
+import os
+import re
+import secrets
+import shutil
+import threading
+from pathlib import Path
+
+from googleapiclient.http import MediaIoBaseDownload
+
+from drive_arquivos import servico_da_thread
+
+# Cache local (LRU em disco) dos holerites baixados do Drive. A pasta fica
+# fora do static serving do Streamlit: o holerite só chega ao navegador pela
+# sessão de quem o pediu (st.download_button). Os nomes são derivados do ID do
+# Drive com uma chave local (HMAC), sem expor o ID no disco.
+PASTA_CACHE_HOLERITES = Path("cache_holerites")
+# Versões anteriores guardavam o cache em uma pasta pública
+PASTA_CACHE_PUBLICA_ANTIGA = Path("static") / "holerites"
+ARQUIVO_CHAVE_CACHE = Path("holerite_cache.key")
+LIMITE_CACHE_BYTES = 512 * 1024 * 1024
+TAMANHO_BLOCO_DOWNLOAD = 4 * 1024 * 1024
+# Locks fixos repartidos pelo nome do arquivo: downloads do mesmo holerite
+# são serializados sem guardar um lock por arquivo já visto
+QTD_LOCKS_ARQUIVOS = 64
+
+_locks_arquivos = [threading.Lock() for _ in range(QTD_LOCKS_ARQUIVOS)]
+_lock_chave = threading.Lock()
+_chave = None
+
+
+def extrair_id_drive(link):
+    encontrado = re.search(r"/d/([\w-]{10,})", link or "") or re.search(r"[?&]id=([\w-]{10,})", link or "")
+    return encontrado.group(1) if encontrado else None
+
+
+def _chave_cache():
+    # Gravada em um temporário e renomeada: nenhuma leitura (deste ou de outro
+    # processo) encontra o arquivo vazio ou pela metade
+    global _chave
+    with _lock_chave:
+        if _chave is None:
+            if not ARQUIVO_CHAVE_CACHE.exists():
+                temporario = ARQUIVO_CHAVE_CACHE.with_name(f"{ARQUIVO_CHAVE_CACHE.name}.{os.getpid()}.tmp")
+                temporario.write_text(secrets.token_hex(32))
+                os.replace(temporario, ARQUIVO_CHAVE_CACHE)
+            _chave = ARQUIVO_CHAVE_CACHE.read_text().strip().encode()
+        return _chave
+
+
+def _nome_em_cache(arquivo_id):
+    return hmac.new(_chave_cache(), arquivo_id.encode(), hashlib.sha256).hexdigest()[:40] + ".pdf"
+
+
+def _lock_do_arquivo(nome):
+    # `nome` começa pelo HMAC em hexadecimal
+    return _locks_arquivos[int(nome[:8], 16) % QTD_LOCKS_ARQUIVOS]
+
+
+def _baixar(creds, arquivo_id, destino):
+    servico = servico_da_thread(creds)
+    temporario = destino.with_suffix(".parcial")
+    requisicao = servico.files().get_media(fileId=arquivo_id, supportsAllDrives=True)
+    with open(temporario, "wb") as f:
+        download = MediaIoBaseDownload(f, requisicao, chunksize=TAMANHO_BLOCO_DOWNLOAD)
+        concluido = False
+        while not concluido:
+            _, concluido = download.next_chunk()
+    os.replace(temporario, destino)
+
+
+def limitar_cache(limite=LIMITE_CACHE_BYTES):
+    # Remove os holerites acessados há mais tempo até caber no limite
+    if not PASTA_CACHE_HOLERITES.exists():
+        return
+    arquivos = []
+    for caminho in PASTA_CACHE_HOLERITES.glob("*.pdf"):
+        try:
+            info = caminho.stat()
+        except OSError:
+            continue
+        arquivos.append((info.st_mtime, info.st_size, caminho))
+    total = sum(tamanho for _, tamanho, _ in arquivos)
+    for _, tamanho, caminho in sorted(arquivos):
+        if total <= limite:
+            break
+        try:
+            caminho.unlink()
+            total -= tamanho
+        except OSError:
+            continue
+
+
+def obter_holerite(creds, link):
+    # Retorna o caminho local do holerite, baixando do Drive só no primeiro acesso
+    arquivo_id = extrair_id_drive(link)
+    if not arquivo_id:
+        return None
+    if PASTA_CACHE_PUBLICA_ANTIGA.exists():
+        shutil.rmtree(PASTA_CACHE_PUBLICA_ANTIGA, ignore_errors=True)
+    PASTA_CACHE_HOLERITES.mkdir(parents=True, exist_ok=True)
+    nome = _nome_em_cache(arquivo_id)
+    destino = PASTA_CACHE_HOLERITES / nome
+    with _lock_do_arquivo(nome):
+        if destino.exists():
+            # Marca o acesso (a ordem do LRU é a data de modificação)
+            os.utime(destino)
+        else:
+            _baixar(creds, arquivo_id, destino)
+            limitar_cache()
+    return destino
@@ -1,7 +1,10 @@
 import streamlit as st
 import sqlite3
+import html
 
-def render_holerite_page():
+from holerite_cache import obter_holerite
+
+def render_holerite_page(creds=None):
     st.title("📄 Holerites - RDV Engenharia")
 
     # Verificar se o usuário está logado
@@ -14,12 +17,14 @@ def render_holerite_page():
     conn = sqlite3.connect("holerites.db")
     cursor = conn.cursor()
 
+    # Nome exato (sem diferenciar maiúsculas): com LIKE '%nome%' o usuário
+    # "ana" via também os holerites de "Mariana" e "Ana Paula"
     cursor.execute("""
         SELECT mes, ano, link_google_drive
         FROM holerites
-        WHERE nome_colaborador LIKE ?
+        WHERE trim(nome_colaborador) = trim(?) COLLATE NOCASE
         ORDER BY ano DESC, mes DESC
-    """, (f"%{nome_colaborador}%",))
+    """, (nome_colaborador,))
     resultados = cursor.fetchall()
     conn.close()
 
@@ -46,12 +51,32 @@ def render_holerite_page():
 
     if resultados:
         st.success(f"Holorites disponíveis para: **{nome_colaborador}**")
-        for mes, ano, link in resultados:
+        for i, (mes, ano, link) in enumerate(resultados):
             st.markdown(f"""
                 <div class="holerite-card">
-                    📅 <strong>{mes}/{ano}</strong><br>
-                    🔗 <a href="{link}" target="_blank">Clique aqui para abrir o Holerite</a>
+                    📅 <strong>{html.escape(str(mes))}/{html.escape(str(ano))}</strong><br>
+                    🔗 <a href="{html.escape(link or '')}" target="_blank">Clique aqui para abrir o Holerite</a>
                 </div>
             """, unsafe_allow_html=True)
+            if st.button(f"Carregar {mes}/{ano}", key=f"ver_holerite_{i}"):
+                st.session_state["holerite_selecionado"] = link
+
+        # --- Download pela sessão (cache local após o primeiro acesso) ---
+        selecionado = st.session_state.get("holerite_selecionado")
+        periodos = {link: (mes, ano) for mes, ano, link in resultados}
+        if selecionado in periodos:
+            mes, ano = periodos[selecionado]
+            try:
+                with st.spinner("Carregando holerite..."):
+                    caminho = obter_holerite(creds, selecionado)
+                    conteudo = caminho.read_bytes() if caminho else None
+            except Exception:
+                conteudo = None
+            if conteudo:
+                st.download_button(f"📥 Baixar holerite {mes}/{ano}", conteudo,
+                                   file_name=f"holerite_{ano}_{mes}.pdf", mime="application/pdf",
+                                   key="baixar_holerite")
+            else:
+                st.warning("Não foi possível carregar o holerite aqui. Use o link acima para abrir no Google Drive.")
     else:
         st.info("Nenhum holerite disponível para você no momento.")
@@ -0,0 +1,123 @@
+from datetime import datetime
+
+# Agregados materializados de homem-hora por obra, contrato, função e dia.
+# São atualizados na mesma transação em que o registro é salvo, de modo que
+# o painel lê apenas esta tabela em vez de percorrer todo o efetivo.
+
+SQL_CRIAR_AGREGADOS = """
+CREATE TABLE IF NOT EXISTS horas_agregadas (
+    obra TEXT NOT NULL,
+    contrato TEXT NOT NULL,
+    funcao TEXT NOT NULL,
+    dia TEXT NOT NULL,
+    horas REAL NOT NULL DEFAULT 0,
+    pessoas INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (obra, contrato, funcao, dia)
+)
+"""
+
+SQL_APLICAR_REGISTRO = """
+INSERT INTO horas_agregadas (obra, contrato, funcao, dia, horas, pessoas)
+SELECT r.obra, r.contrato, e.funcao, r.data, ? * SUM(e.horas), ? * COUNT(*)
+FROM efetivo e JOIN registros r ON r.id = e.registro_id
+WHERE r.id = ?
+GROUP BY e.funcao
+ON CONFLICT (obra, contrato, funcao, dia) DO UPDATE SET
+    horas = horas + excluded.horas,
+    pessoas = pessoas + excluded.pessoas
+"""
+
+AGRUPAMENTOS = {
+    "Obra": "obra",
+    "Contrato": "contrato",
+    "Função": "funcao",
+    "Mês": "substr(dia, 1, 7)",
+    "Dia": "dia",
+}
+
+
+def calcular_horas(entrada, saida):
+    try:
+        inicio = datetime.strptime(entrada, "%H:%M")
+        fim = datetime.strptime(saida, "%H:%M")
+    except (TypeError, ValueError):
+        return 0.0
+    minutos = (fim - inicio).total_seconds() / 60
+    if minutos < 0:
+        # Saída depois da meia-noite (turno noturno)
+        minutos += 24 * 60
+    return round(minutos / 60, 2)
+
+
+def criar_tabela_agregados(conn):
+    conn.execute(SQL_CRIAR_AGREGADOS)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_horas_agregadas_dia ON horas_agregadas(dia)")
+
+
+def somar_registro(conn, registro_id):
+    conn.execute(SQL_APLICAR_REGISTRO, (1, 1, registro_id))
+
+
+def subtrair_registro(conn, registro_id):
+    conn.execute(SQL_APLICAR_REGISTRO, (-1, -1, registro_id))
+    conn.execute("DELETE FROM horas_agregadas WHERE pessoas <= 0")
+
+
+def consultar_horas(conn, agrupar_por, data_inicio=None, data_fim=None, obra=None):
+    colunas = [AGRUPAMENTOS[nome] for nome in agrupar_por]
+    condicoes, parametros = [], []
+    if data_inicio:
+        condicoes.append("dia >= ?")
+        parametros.append(data_inicio.isoformat())
+    if data_fim:
+        condicoes.append("dia <= ?")
+        parametros.append(data_fim.isoformat())
+    if obra:
+        condicoes.append("obra = ?")
+        parametros.append(obra)
+    where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+    select = ", ".join(f"{col} AS \"{nome}\"" for nome, col in zip(agrupar_por, colunas))
+    sql = (
+        f"SELECT {select}, SUM(horas) AS \"Horas\", SUM(pessoas) AS \"Pessoas-dia\" "
+        f"FROM horas_agregadas {where} "
+        f"GROUP BY {', '.join(colunas)} ORDER BY {', '.join(colunas)}"
+    )
+    cursor = conn.execute(sql, parametros)
+    nomes = [d[0] for d in cursor.description]
+    return nomes, cursor.fetchall()
+
+
+def recalcular_agregados(conn):
+    # Recalcula horas e agregados do zero (carga histórica / backfill) de
+    # forma vetorizada com pandas, em vez de linha a linha.
+    import pandas as pd
+
+    efetivo_df = pd.read_sql_query(
+        "SELECT e.id, e.funcao, e.entrada, e.saida, r.obra, r.contrato, r.data AS dia "
+        "FROM efetivo e JOIN registros r ON r.id = e.registro_id",
+        conn
+    )
+    with conn:
+        conn.execute("DELETE FROM horas_agregadas")
+        if efetivo_df.empty:
+            return 0
+        entrada = pd.to_datetime(efetivo_df["entrada"], format="%H:%M", errors="coerce")
+        saida = pd.to_datetime(efetivo_df["saida"], format="%H:%M", errors="coerce")
+        minutos = (saida - entrada).dt.total_seconds() / 60
+        minutos = minutos.where(minutos >= 0, minutos + 24 * 60).fillna(0)
+        efetivo_df["horas"] = (minutos / 60).round(2)
+        conn.executemany(
+            "UPDATE efetivo SET horas = ? WHERE id = ?",
+            zip(efetivo_df["horas"].astype(float), efetivo_df["id"].astype(int))
+        )
+        agregados = (
+            efetivo_df.groupby(["obra", "contrato", "funcao", "dia"], as_index=False)
+            .agg(horas=("horas", "sum"), pessoas=("id", "count"))
+        )
+        conn.executemany(
+            "INSERT INTO horas_agregadas (obra, contrato, funcao, dia, horas, pessoas) VALUES (?, ?, ?, ?, ?, ?)",
+            agregados[["obra", "contrato", "funcao", "dia", "horas", "pessoas"]]
+            .astype({"horas": float, "pessoas": int})
+            .itertuples(index=False, name=None)
+        )
+    return len(efetivo_df)
@@ -0,0 +1,183 @@
+import csv
+import io
+import secrets
+
+# Cadastro de usuários em lote (ex.: um login por colaborador para a página de
+# holerites). Lê um CSV no formato do colaboradores.csv (Nome, Função) ou com
+# as colunas usuario/senha/perfil, e grava tudo numa única transação.
+PERFIS = ("user", "admin")
+USUARIOS_POR_PAGINA = 50
+# Sem caracteres ambíguos (0/O, 1/l/I) para senhas digitadas no celular
+ALFABETO_SENHA = "abcdefghijkmnpqrstuvwxyzABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+TAMANHO_SENHA = 8
+
+COLUNAS_USUARIO = ("usuario", "usuário", "username", "nome")
+COLUNAS_SENHA = ("senha", "password")
+COLUNAS_PERFIL = ("perfil", "role")
+
+
+def indice_usuarios_existe(conn):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_userstable_username'"
+    ).fetchone() is not None
+
+
+def criar_indice_usuarios(conn):
+    # Migração única: o upsert precisa de usuário único. Em bancos antigos com
+    # usuários repetidos o índice não é criado (retorna False) até o admin
+    # resolver os repetidos; nenhum cadastro é apagado automaticamente.
+    if indice_usuarios_existe(conn):
+        return True
+    repetido = conn.execute(
+        "SELECT 1 FROM userstable GROUP BY username HAVING COUNT(*) > 1 LIMIT 1"
+    ).fetchone()
+    if repetido:
+        return False
+    with conn:
+        conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_userstable_username ON userstable(username)")
+    return True
+
+
+def listar_usuarios_repetidos(conn):
+    # (rowid, usuário, perfil) de cada cadastro de um usuário repetido
+    return conn.execute(
+        "SELECT rowid, username, role FROM userstable WHERE username IN ("
+        "  SELECT username FROM userstable GROUP BY username HAVING COUNT(*) > 1"
+        ") ORDER BY username, rowid"
+    ).fetchall()
+
+
+def remover_cadastro(conn, rowid):
+    # Remove um cadastro específico escolhido pelo admin
+    # entre os repetidos; o último cadastro de um usuário nunca é removido
+    with conn:
+        conn.execute(
+            "DELETE FROM userstable WHERE rowid = ? AND (SELECT COUNT(*) FROM userstable "
+            "WHERE username = (SELECT username FROM userstable WHERE rowid = ?)) > 1",
+            (rowid, rowid)
+        )
+
+
+def gerar_senha():
+    return "".join(secrets.choice(ALFABETO_SENHA) for _ in range(TAMANHO_SENHA))
+
+
+def _coluna(campos, opcoes):
+    for campo in campos:
+        if campo and campo.strip().lower() in opcoes:
+            return campo
+    return None
+
+
+def ler_usuarios_csv(conteudo):
+    # Retorna [(linha, usuario, senha ou None, perfil)]; `conteudo` em bytes ou texto
+    if isinstance(conteudo, bytes):
+        conteudo = conteudo.decode("utf-8-sig")
+    leitor = csv.DictReader(io.StringIO(conteudo))
+    campos = leitor.fieldnames or []
+    coluna_usuario = _coluna(campos, COLUNAS_USUARIO)
+    if coluna_usuario is None:
+        raise ValueError("O CSV precisa de uma coluna 'usuario' (ou 'Nome', como no colaboradores.csv).")
+    coluna_senha = _coluna(campos, COLUNAS_SENHA)
+    coluna_perfil = _coluna(campos, COLUNAS_PERFIL)
+    usuarios = []
+    for numero, linha in enumerate(leitor, start=2):
+        usuario = (linha.get(coluna_usuario) or "").strip()
+        senha = (linha.get(coluna_senha) or "").strip() if coluna_senha else ""
+        perfil = (linha.get(coluna_perfil) or "").strip().lower() if coluna_perfil else ""
+        usuarios.append((numero, usuario, senha or None, perfil or "user"))
+    return usuarios
+
+
+def importar_usuarios(conn, usuarios, hash_senha, atualizar_existentes=False, usuario_atual=None):
+    # Usuários novos são inseridos; os existentes são conflitos, ou, com
+    # `atualizar_existentes`, têm perfil (e senha, se informada) atualizados.
+    # O usuário logado (`usuario_atual`) nunca é alterado pela importação, e o
+    # último admin não perde o perfil. Quem não tem senha no arquivo recebe uma
+    # senha gerada, devolvida em `senhas_geradas` para ser repassada ao
+    # colaborador.
+    existentes = dict(conn.execute("SELECT username, role FROM userstable"))
+    admins = {usuario for usuario, perfil in existentes.items() if perfil == "admin"}
+    novos, atualizacoes, conflitos, senhas_geradas = [], [], [], []
+    vistos = set()
+    for numero, usuario, senha, perfil in usuarios:
+        if not usuario:
+            conflitos.append((numero, usuario, "usuário vazio"))
+            continue
+        if perfil not in PERFIS:
+            conflitos.append((numero, usuario, f"perfil inválido '{perfil}'"))
+            continue
+        if usuario in vistos:
+            conflitos.append((numero, usuario, "repetido no arquivo"))
+            continue
+        vistos.add(usuario)
+        if usuario in existentes:
+            if not atualizar_existentes:
+                conflitos.append((numero, usuario, "já cadastrado"))
+                continue
+            if usuario == usuario_atual:
+                conflitos.append((numero, usuario, "usuário logado não é alterado pela importação"))
+                continue
+            if perfil == "admin":
+                admins.add(usuario)
+            elif usuario in admins:
+                if admins == {usuario}:
+                    conflitos.append((numero, usuario, "último admin não pode perder o perfil"))
+                    continue
+                admins.discard(usuario)
+            atualizacoes.append((perfil, hash_senha(senha) if senha else None, usuario))
+            continue
+        if senha is None:
+            senha = gerar_senha()
+            senhas_geradas.append((usuario, senha))
+        novos.append((usuario, hash_senha(senha), perfil))
+        if perfil == "admin":
+            admins.add(usuario)
+    with conn:
+        inseridos = conn.executemany(
+            "INSERT INTO userstable (username, password, role) VALUES (?, ?, ?) "
+            "ON CONFLICT (username) DO NOTHING",
+            novos
+        ).rowcount if novos else 0
+        atualizados = conn.executemany(
+            "UPDATE userstable SET role = ?, password = COALESCE(?, password) WHERE username = ?",
+            atualizacoes
+        ).rowcount if atualizacoes else 0
+    if inseridos < len(novos):
+        # Cadastrados por outra sessão entre a leitura e a gravação
+        conflitos.append((None, None, f"{len(novos) - inseridos} usuário(s) cadastrado(s) em paralelo"))
+    return {
+        "inseridos": inseridos,
+        "atualizados": atualizados,
+        "conflitos": conflitos,
+        "senhas_geradas": senhas_geradas,
+    }
+
+
+def _filtro_busca(busca):
+    if not busca:
+        return "", []
+    termo = busca.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return " WHERE username LIKE ? ESCAPE '\\'", [f"%{termo}%"]
+
+
+def contar_usuarios(conn, busca=None):
+    where, parametros = _filtro_busca(busca)
+    return conn.execute(f"SELECT COUNT(*) FROM userstable{where}", parametros).fetchone()[0]
+
+
+def listar_usuarios(conn, busca=None, pagina=1, por_pagina=USUARIOS_POR_PAGINA):
+    # Só usuário e perfil (sem o hash da senha), uma página por vez
+    where, parametros = _filtro_busca(busca)
+    return conn.execute(
+        f"SELECT username, role FROM userstable{where} ORDER BY username LIMIT ? OFFSET ?",
+        parametros + [por_pagina, (max(pagina, 1) - 1) * por_pagina]
+    ).fetchall()
+
+
+def gerar_csv_senhas(senhas_geradas):
+    saida = io.StringIO()
+    escritor = csv.writer(saida)
+    escritor.writerow(["usuario", "senha"])
+    escritor.writerows(senhas_geradas)
+    return saida.getvalue().encode("utf-8-sig")
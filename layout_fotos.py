@@ -0,0 +1,150 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+from PIL import Image as PILImage, ImageOps
+
+# Layouts disponíveis para a seção de fotos: (colunas, linhas) por página
+LAYOUTS_FOTOS = {
+    "2 x 2": (2, 2),
+    "2 x 3": (2, 3),
+    "3 x 3": (3, 3),
+    "1 por página": (1, 1),
+}
+LAYOUT_FOTOS_PADRAO = "2 x 3"
+
+# Resolução usada nas miniaturas da grade (pontos PDF -> pixels)
+DPI_GRADE_FOTOS = 150
+ESPACO_ENTRE_FOTOS = 10
+ALTURA_LEGENDA = 14
+
+
+def calcular_celulas(largura_util, altura_util, colunas, linhas,
+                     espaco=ESPACO_ENTRE_FOTOS, altura_legenda=ALTURA_LEGENDA):
+    # Retorna as células da grade como (x, y_topo, largura, altura_imagem),
+    # com coordenadas relativas ao canto superior esquerdo da área útil.
+    largura_celula = (largura_util - espaco * (colunas - 1)) / colunas
+    altura_celula = (altura_util - espaco * (linhas - 1)) / linhas
+    altura_imagem = altura_celula - altura_legenda
+    celulas = []
+    for linha in range(linhas):
+        for coluna in range(colunas):
+            x = coluna * (largura_celula + espaco)
+            y_topo = linha * (altura_celula + espaco)
+            celulas.append((x, y_topo, largura_celula, altura_imagem))
+    return celulas
+
+
+def encaixar_imagem(img_width, img_height, max_width, max_height):
+    # Mantém a proporção da imagem dentro da caixa (max_width x max_height)
+    escala = min(max_width / img_width, max_height / img_height)
+    return img_width * escala, img_height * escala
+
+
+def abrir_foto(foto_path, limite_px=None):
+    # Lê a foto e fecha o arquivo; a orientação do EXIF (fotos de celular) é
+    # aplicada antes de qualquer cálculo de encaixe. Com `limite_px` o JPEG já
+    # é decodificado reduzido (escala DCT), sem passar da resolução pedida.
+    with PILImage.open(foto_path) as img:
+        if limite_px:
+            # O lado maior vale para os dois eixos: a rotação pode trocá-los
+            lado = max(limite_px)
+            img.draft("RGB", (lado, lado))
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        img.load()
+    return img
+
+
+def gerar_miniatura(foto_path, max_width, max_height, dpi=DPI_GRADE_FOTOS):
+    # Abre a foto e reduz para o tamanho exato que ocupará na página,
+    # evitando embutir a imagem em resolução cheia em uma célula pequena.
+    limite_px = (max(1, int(max_width * dpi / 72)), max(1, int(max_height * dpi / 72)))
+    img = abrir_foto(foto_path, limite_px)
+    img.thumbnail(limite_px, PILImage.Resampling.LANCZOS)
+    return img
+
+
+def paginar_fotos(fotos_paths, colunas, linhas):
+    por_pagina = max(1, colunas * linhas)
+    for inicio in range(0, len(fotos_paths), por_pagina):
+        yield inicio, fotos_paths[inicio:inicio + por_pagina]
+
+
+@dataclass
+class FotoNaGrade:
+    # Posições relativas ao canto superior esquerdo da área útil, na unidade
+    # do motor de PDF (pontos no reportlab, mm no fpdf)
+    numero: int
+    caminho: str
+    img: PILImage.Image
+    x: float
+    y_topo: float
+    largura: float
+    altura: float
+    x_celula: float
+    largura_celula: float
+    y_legenda: float
+
+    @property
+    def legenda(self):
+        return f"Foto {self.numero}: {Path(self.caminho).name}"
+
+
+def paginas_grade(fotos_paths, largura_util, altura_util, colunas, linhas,
+                  espaco=ESPACO_ENTRE_FOTOS, altura_legenda=ALTURA_LEGENDA, pontos_por_unidade=1):
+    # Uma lista de FotoNaGrade por página, já com a miniatura no tamanho da
+    # célula; fotos que não abrem ficam de fora. Os três motores de PDF só
+    # desenham o que sai daqui.
+    celulas = calcular_celulas(largura_util, altura_util, colunas, linhas, espaco, altura_legenda)
+    for inicio, pagina in paginar_fotos(fotos_paths, colunas, linhas):
+        itens = []
+        for j, foto_path in enumerate(pagina):
+            x_cel, y_cel, w_cel, h_img = celulas[j]
+            try:
+                img = gerar_miniatura(foto_path, w_cel * pontos_por_unidade, h_img * pontos_por_unidade)
+            except Exception:
+                continue
+            largura, altura = encaixar_imagem(img.size[0], img.size[1], w_cel, h_img)
+            itens.append(FotoNaGrade(
+                numero=inicio + j + 1, caminho=foto_path, img=img,
+                x=x_cel + (w_cel - largura) / 2, y_topo=y_cel + (h_img - altura) / 2,
+                largura=largura, altura=altura,
+                x_celula=x_cel, largura_celula=w_cel, y_legenda=y_cel + h_img,
+            ))
+        yield itens
+
+
+def fotos_apendice(fotos_paths, largura, altura, ampliar=False):
+    # (número, caminho, imagem, largura, altura) de cada foto do apêndice,
+    # encaixada na página; sem `ampliar`, fotos pequenas ficam no tamanho real
+    for i, foto_path in enumerate(fotos_paths):
+        try:
+            img = abrir_foto(foto_path)
+        except Exception:
+            continue
+        w_img, h_img = encaixar_imagem(img.size[0], img.size[1], largura, altura)
+        if not ampliar and w_img > img.size[0]:
+            w_img, h_img = img.size
+        yield i + 1, foto_path, img, w_img, h_img
+
+
+def ajustar_legenda(legenda, largura, medir):
+    # `medir(texto)` é a largura do texto na fonte da legenda
+    while len(legenda) > 4 and medir(legenda) > largura:
+        legenda = legenda[:-4] + "..."
+    return legenda
+
+
+def desenhar_grade_canvas(c, itens, x_origem, y_topo):
+    # Desenha uma página da grade num canvas do reportlab; (x_origem, y_topo)
+    # é o canto superior esquerdo da área útil
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+
+    for item in itens:
+        c.drawImage(ImageReader(item.img), x_origem + item.x, y_topo - item.y_topo - item.altura,
+                    width=item.largura, height=item.altura)
+        c.setFont("Helvetica", 8)
+        legenda = ajustar_legenda(item.legenda, item.largura_celula, lambda texto: stringWidth(texto, "Helvetica", 8))
+        c.drawCentredString(x_origem + item.x_celula + item.largura_celula / 2, y_topo - item.y_legenda - 10, legenda)
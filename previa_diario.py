@@ -0,0 +1,66 @@
+from html import escape
+
+# Pré-visualização em HTML da primeira página do diário (dados, efetivo e
+# textos, sem fotos). É montada a cada alteração do formulário; o PDF, as
+# fotos e o envio ao Drive só rodam no "Salvar e Gerar Relatório".
+
+ESTILO_PREVIA = """
+<style>
+  .previa-diario { background: white; color: #111; font-family: Helvetica, Arial, sans-serif;
+                   font-size: 12px; border: 1px solid #ccc; border-radius: 4px; }
+  .previa-diario .cabecalho { background: #0F2A4D; color: white; text-align: center; padding: 10px 0; }
+  .previa-diario .cabecalho b { font-size: 16px; display: block; }
+  .previa-diario .corpo { padding: 12px 16px; }
+  .previa-diario table { border-collapse: collapse; width: 100%; margin-bottom: 8px; }
+  .previa-diario .info td { padding: 2px 4px; font-weight: bold; }
+  .previa-diario .caixa { border: 1px solid #888; padding: 6px 8px; margin-bottom: 8px; white-space: pre-wrap; }
+  .previa-diario .efetivo th { background: #0F2A4D; color: white; font-size: 11px; padding: 3px; }
+  .previa-diario .efetivo td { border: 1px solid #ccc; font-size: 11px; padding: 3px; }
+  .previa-diario .vazio { color: #888; font-style: italic; }
+  .previa-diario .assinaturas { display: flex; justify-content: space-around; margin-top: 18px; text-align: center; }
+  .previa-diario .assinaturas div { border-top: 1px solid #444; width: 40%; padding-top: 4px; }
+</style>
+"""
+
+
+def _caixa(titulo, texto, padrao):
+    conteudo = escape(texto.strip()) if texto and texto.strip() else f'<span class="vazio">{padrao}</span>'
+    return f'<div class="caixa"><b>{titulo}</b>\n{conteudo}</div>'
+
+
+def gerar_previa_html(registro, qtd_fotos=0):
+    linhas_efetivo = "".join(
+        f"<tr><td>{escape(item.nome)}</td><td>{escape(item.funcao)}</td>"
+        f"<td align='center'>{item.entrada}</td><td align='center'>{item.saida}</td></tr>"
+        for item in registro.efetivo_preenchido
+    ) or '<tr><td colspan="4" class="vazio">Nenhum colaborador selecionado.</td></tr>'
+    fotos = f"<p class='vazio'>+ {qtd_fotos} foto(s) nas páginas seguintes</p>" if qtd_fotos else ""
+    return f"""
+    {ESTILO_PREVIA}
+    <div class="previa-diario">
+      <div class="cabecalho"><b>DIÁRIO DE OBRA</b>RDV ENGENHARIA</div>
+      <div class="corpo">
+        <table class="info">
+          <tr><td width="90">OBRA:</td><td>{escape(registro.obra or 'N/A')}</td></tr>
+          <tr><td>LOCAL:</td><td>{escape(registro.local or 'N/A')}</td></tr>
+          <tr><td>DATA:</td><td>{escape(registro.data_br or 'N/A')}</td></tr>
+          <tr><td>CONTRATO:</td><td>{escape(registro.contrato or 'N/A')}</td></tr>
+        </table>
+        <div class="caixa"><b>Condições do dia:</b> {escape(registro.clima or 'N/A')}</div>
+        {_caixa("Máquinas e Equipamentos:", registro.maquinas, "Nenhuma máquina/equipamento informado.")}
+        {_caixa("Serviços Executados:", registro.servicos, "Nenhum serviço executado informado.")}
+        <b>Efetivo de Pessoal:</b>
+        <table class="efetivo">
+          <tr><th>NOME</th><th>FUNÇÃO</th><th>1ª ENTRADA</th><th>1ª SAÍDA</th></tr>
+          {linhas_efetivo}
+        </table>
+        {_caixa("Ocorrências:", registro.ocorrencias, "Nenhuma ocorrência informada.")}
+        {_caixa("Fiscalização:", registro.fiscalizacao, "N/A")}
+        <div class="assinaturas">
+          <div>Responsável Técnico<br>Nome: {escape(registro.responsavel or 'Eng. Responsável')}</div>
+          <div>Fiscalização<br>Nome: {escape(registro.fiscalizacao or 'Conforme assinatura')}</div>
+        </div>
+        {fotos}
+      </div>
+    </div>
+    """
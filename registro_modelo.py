@@ -0,0 +1,61 @@
+import re
+from dataclasses import dataclass, field
+from datetime import date
+
+from horas_trabalhadas import calcular_horas
+
+# Modelo único do diário de obra, usado pelo formulário, pelos dois motores de
+# PDF, pela prévia e pelo banco de registros. O efetivo é uma lista de objetos
+# (sem serializar para JSON e ler de volta).
+
+FORMATO_HORA = re.compile(r"^\d{2}:\d{2}$")
+
+
+@dataclass(slots=True)
+class EntradaEfetivo:
+    nome: str
+    funcao: str = ""
+    entrada: str = ""
+    saida: str = ""
+
+    @property
+    def horas(self):
+        return calcular_horas(self.entrada, self.saida)
+
+
+@dataclass(slots=True)
+class Registro:
+    obra: str
+    data: date
+    contrato: str
+    local: str = ""
+    clima: str = ""
+    maquinas: str = ""
+    servicos: str = ""
+    ocorrencias: str = ""
+    responsavel: str = ""
+    fiscalizacao: str = ""
+    controle_documentacao: str = ""
+    efetivo: list = field(default_factory=list)
+
+    @property
+    def data_br(self):
+        return self.data.strftime("%d/%m/%Y")
+
+    @property
+    def efetivo_preenchido(self):
+        # Vagas do formulário sem colaborador selecionado não entram no diário
+        return [item for item in self.efetivo if item.nome]
+
+    def validar(self):
+        erros = []
+        if not self.obra:
+            erros.append("Por favor, selecione a 'Obra'.")
+        if not self.contrato:
+            erros.append("Por favor, selecione o 'Contrato'.")
+        if not self.responsavel:
+            erros.append("Por favor, preencha o campo 'Responsável pela empresa'.")
+        for item in self.efetivo_preenchido:
+            if not FORMATO_HORA.match(item.entrada or "") or not FORMATO_HORA.match(item.saida or ""):
+                erros.append(f"Horários inválidos para '{item.nome}' (use HH:MM).")
+        return erros
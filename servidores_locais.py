@@ -0,0 +1,348 @@
+import base64
+import json
+import re
+import socketserver
+import threading
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, urlunsplit, parse_qs
+
+import httplib2
+
+# Servidores locais que substituem o Google Drive e o SMTP em testes (teste
+# de carga, testes manuais). O código de produção não sabe do Drive local: o
+# teste troca drive_arquivos.criar_servico_drive por DriveLocal.criar_servico
+# (ver teste_carga.py). O SMTP local entra pelas chaves host/port/starttls de
+# st.secrets["email"].
+
+def _agora():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+class EstadoDrive:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.arquivos = {}
+        self.sessoes_upload = {}
+        self.requisicoes = 0
+        # Log de alterações para a API changes (o page token é a posição no log)
+        self.alteracoes = []
+
+    def criar(self, metadados, conteudo=b""):
+        with self.lock:
+            arquivo_id = uuid.uuid4().hex
+            self.arquivos[arquivo_id] = {
+                "id": arquivo_id,
+                "name": metadados.get("name", "sem_nome"),
+                "mimeType": metadados.get("mimeType", "application/octet-stream"),
+                "parents": metadados.get("parents", []),
+                "size": str(len(conteudo)),
+                "modifiedTime": _agora(),
+                "trashed": False,
+                "conteudo": conteudo,
+            }
+            self.alteracoes.append(arquivo_id)
+            return self.recurso(arquivo_id)
+
+    def atualizar(self, arquivo_id, metadados, conteudo=None):
+        with self.lock:
+            arquivo = self.arquivos[arquivo_id]
+            if "name" in metadados:
+                arquivo["name"] = metadados["name"]
+            if "trashed" in metadados:
+                arquivo["trashed"] = bool(metadados["trashed"])
+            if conteudo is not None:
+                arquivo["conteudo"] = conteudo
+                arquivo["size"] = str(len(conteudo))
+            arquivo["modifiedTime"] = _agora()
+            self.alteracoes.append(arquivo_id)
+            return self.recurso(arquivo_id)
+
+    def apagar(self, arquivo_id):
+        with self.lock:
+            del self.arquivos[arquivo_id]
+            self.alteracoes.append(arquivo_id)
+
+    def listar_alteracoes(self, token, limite=100):
+        with self.lock:
+            inicio = int(token)
+            fim = min(len(self.alteracoes), inicio + limite)
+            alteracoes = []
+            for arquivo_id in self.alteracoes[inicio:fim]:
+                if arquivo_id in self.arquivos:
+                    alteracoes.append({"fileId": arquivo_id, "removed": False, "file": self.recurso(arquivo_id)})
+                else:
+                    alteracoes.append({"fileId": arquivo_id, "removed": True})
+            resposta = {"changes": alteracoes}
+            if fim < len(self.alteracoes):
+                resposta["nextPageToken"] = str(fim)
+            else:
+                resposta["newStartPageToken"] = str(fim)
+            return resposta
+
+    def recurso(self, arquivo_id):
+        return {k: v for k, v in self.arquivos[arquivo_id].items() if k != "conteudo"}
+
+    def listar(self, q):
+        # Suporta o subconjunto da sintaxe de consulta usado pelo app
+        pai = re.search(r"'([^']+)' in parents", q or "")
+        nome = re.search(r"name = '((?:[^'\\]|\\.)*)'", q or "")
+        mime = re.search(r"mimeType = '([^']+)'", q or "")
+        with self.lock:
+            resultado = []
+            for arquivo in self.arquivos.values():
+                if arquivo["trashed"]:
+                    continue
+                if pai and pai.group(1) not in arquivo["parents"]:
+                    continue
+                if nome and arquivo["name"] != re.sub(r"\\(.)", r"\1", nome.group(1)):
+                    continue
+                if mime and arquivo["mimeType"] != mime.group(1):
+                    continue
+                resultado.append(self.recurso(arquivo["id"]))
+            return resultado
+
+
+class _ManipuladorDrive(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def estado(self):
+        return self.server.estado
+
+    def _responder(self, status, corpo=None, cabecalhos=None):
+        dados = json.dumps(corpo).encode() if corpo is not None else b""
+        self.send_response(status)
+        if corpo is not None:
+            self.send_header("Content-Type", "application/json")
+        for chave, valor in (cabecalhos or {}).items():
+            self.send_header(chave, valor)
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _ler_corpo(self):
+        tamanho = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(tamanho) if tamanho else b""
+
+    def _rota(self):
+        partes = urlsplit(self.path)
+        with self.estado.lock:
+            self.estado.requisicoes += 1
+        return partes.path, {k: v[0] for k, v in parse_qs(partes.query).items()}
+
+    def do_GET(self):
+        caminho, params = self._rota()
+        if caminho == "/drive/v3/changes/startPageToken":
+            self._responder(200, {"startPageToken": str(len(self.estado.alteracoes))})
+            return
+        if caminho == "/drive/v3/changes":
+            limite = int(params.get("pageSize") or 100)
+            self._responder(200, self.estado.listar_alteracoes(params.get("pageToken", "0"), limite))
+            return
+        if caminho == "/drive/v3/files":
+            self._responder(200, {"files": self.estado.listar(params.get("q"))})
+            return
+        encontrado = re.fullmatch(r"/drive/v3/files/([^/]+)", caminho)
+        if encontrado and encontrado.group(1) in self.estado.arquivos:
+            arquivo_id = encontrado.group(1)
+            if params.get("alt") == "media":
+                conteudo = self.estado.arquivos[arquivo_id]["conteudo"]
+                self.send_response(200)
+                self.send_header("Content-Type", self.estado.arquivos[arquivo_id]["mimeType"])
+                self.send_header("Content-Length", str(len(conteudo)))
+                self.end_headers()
+                self.wfile.write(conteudo)
+            else:
+                self._responder(200, self.estado.recurso(arquivo_id))
+            return
+        self._responder(404, {"error": {"code": 404, "message": "Not found"}})
+
+    def do_POST(self):
+        caminho, params = self._rota()
+        corpo = self._ler_corpo()
+        if caminho == "/drive/v3/files":
+            self._responder(200, self.estado.criar(json.loads(corpo or b"{}")))
+            return
+        if caminho == "/upload/drive/v3/files" and params.get("uploadType") == "resumable":
+            self._iniciar_upload(json.loads(corpo or b"{}"))
+            return
+        self._responder(404, {"error": {"code": 404, "message": "Not found"}})
+
+    def _iniciar_upload(self, metadados, arquivo_id=None):
+        # Como no Drive, o tipo do arquivo vem do cabeçalho do upload quando não está nos metadados
+        if arquivo_id is None and "mimeType" not in metadados and self.headers.get("X-Upload-Content-Type"):
+            metadados["mimeType"] = self.headers["X-Upload-Content-Type"]
+        sessao = uuid.uuid4().hex
+        with self.estado.lock:
+            self.estado.sessoes_upload[sessao] = {"metadados": metadados, "arquivo_id": arquivo_id, "dados": bytearray()}
+        host = self.headers.get("Host")
+        self._responder(200, cabecalhos={
+            "Location": f"http://{host}/upload/drive/v3/files?uploadType=resumable&upload_id={sessao}"
+        })
+
+    def do_PATCH(self):
+        caminho, params = self._rota()
+        corpo = self._ler_corpo()
+        encontrado = re.fullmatch(r"(/upload)?/drive/v3/files/([^/]+)", caminho)
+        if not encontrado or encontrado.group(2) not in self.estado.arquivos:
+            self._responder(404, {"error": {"code": 404, "message": "File not found"}})
+            return
+        metadados = json.loads(corpo or b"{}")
+        if encontrado.group(1) and params.get("uploadType") == "resumable":
+            self._iniciar_upload(metadados, encontrado.group(2))
+            return
+        self._responder(200, self.estado.atualizar(encontrado.group(2), metadados))
+
+    def do_DELETE(self):
+        caminho, _ = self._rota()
+        encontrado = re.fullmatch(r"/drive/v3/files/([^/]+)", caminho)
+        if not encontrado or encontrado.group(1) not in self.estado.arquivos:
+            self._responder(404, {"error": {"code": 404, "message": "File not found"}})
+            return
+        self.estado.apagar(encontrado.group(1))
+        self._responder(204)
+
+    def do_PUT(self):
+        caminho, params = self._rota()
+        corpo = self._ler_corpo()
+        sessao = self.estado.sessoes_upload.get(params.get("upload_id"))
+        if caminho != "/upload/drive/v3/files" or sessao is None:
+            self._responder(404, {"error": {"code": 404, "message": "Upload session not found"}})
+            return
+        sessao["dados"].extend(corpo)
+        faixa = re.match(r"bytes (?:\d+-\d+|\*)/(\d+|\*)", self.headers.get("Content-Range", ""))
+        total = faixa.group(1) if faixa else str(len(sessao["dados"]))
+        if total != "*" and len(sessao["dados"]) >= int(total):
+            with self.estado.lock:
+                del self.estado.sessoes_upload[params["upload_id"]]
+            if sessao["arquivo_id"]:
+                self._responder(200, self.estado.atualizar(sessao["arquivo_id"], sessao["metadados"], bytes(sessao["dados"])))
+            else:
+                self._responder(200, self.estado.criar(sessao["metadados"], bytes(sessao["dados"])))
+        else:
+            self._responder(308, cabecalhos={"Range": f"bytes=0-{len(sessao['dados']) - 1}"})
+
+
+class DriveLocal:
+    def __init__(self, host="127.0.0.1", porta=0):
+        self.estado = EstadoDrive()
+        self.servidor = ThreadingHTTPServer((host, porta), _ManipuladorDrive)
+        self.servidor.daemon_threads = True
+        self.servidor.estado = self.estado
+        self.thread = threading.Thread(target=self.servidor.serve_forever, daemon=True)
+
+    @property
+    def endpoint(self):
+        host, porta = self.servidor.server_address[:2]
+        return f"http://{host}:{porta}"
+
+    def criar_servico(self, creds=None):
+        # Mesmo cliente do googleapiclient usado em produção, sem credenciais e
+        # com as URLs da API do Google reescritas para este servidor
+        from googleapiclient.discovery import build
+        return build("drive", "v3", http=_HttpDriveLocal(self.endpoint), static_discovery=True)
+
+    def iniciar(self):
+        self.thread.start()
+        return self
+
+    def parar(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+
+class _HttpDriveLocal(httplib2.Http):
+    def __init__(self, endpoint):
+        super().__init__()
+        self.local = urlsplit(endpoint)
+
+    def request(self, uri, *args, **kwargs):
+        partes = urlsplit(uri)
+        if partes.netloc != self.local.netloc:
+            uri = urlunsplit(partes._replace(scheme=self.local.scheme, netloc=self.local.netloc))
+        return super().request(uri, *args, **kwargs)
+
+
+class _ManipuladorSMTP(socketserver.StreamRequestHandler):
+    def _enviar(self, linha):
+        self.wfile.write(linha.encode() + b"\r\n")
+
+    def _ler(self):
+        return self.rfile.readline().decode("utf-8", "replace").rstrip("\r\n")
+
+    def handle(self):
+        self._enviar("220 localhost SMTP local")
+        while True:
+            linha = self._ler()
+            comando = linha.upper()
+            if comando.startswith("EHLO"):
+                self._enviar("250-localhost")
+                self._enviar("250-AUTH PLAIN LOGIN")
+                self._enviar("250 8BITMIME")
+            elif comando.startswith("HELO"):
+                self._enviar("250 localhost")
+            elif comando.startswith("AUTH PLAIN"):
+                if len(linha.split()) < 3:
+                    self._enviar("334 ")
+                    self._ler()
+                self._enviar("235 Authentication successful")
+            elif comando.startswith("AUTH LOGIN"):
+                self._enviar("334 " + base64.b64encode(b"Username:").decode())
+                self._ler()
+                self._enviar("334 " + base64.b64encode(b"Password:").decode())
+                self._ler()
+                self._enviar("235 Authentication successful")
+            elif comando.startswith(("MAIL FROM", "RCPT TO", "RSET", "NOOP")):
+                self._enviar("250 OK")
+            elif comando == "DATA":
+                self._enviar("354 End data with <CR><LF>.<CR><LF>")
+                linhas = []
+                while True:
+                    dado = self.rfile.readline()
+                    if not dado or dado in (b".\r\n", b".\n"):
+                        break
+                    linhas.append(dado)
+                with self.server.lock:
+                    self.server.mensagens.append(b"".join(linhas))
+                self._enviar("250 OK: queued")
+            elif comando == "QUIT":
+                self._enviar("221 Bye")
+                return
+            elif not linha:
+                return
+            else:
+                self._enviar("502 Command not implemented")
+
+
+class SMTPLocal:
+    def __init__(self, host="127.0.0.1", porta=0):
+        self.servidor = socketserver.ThreadingTCPServer((host, porta), _ManipuladorSMTP)
+        self.servidor.daemon_threads = True
+        self.servidor.mensagens = []
+        self.servidor.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.servidor.serve_forever, daemon=True)
+
+    @property
+    def host(self):
+        return self.servidor.server_address[0]
+
+    @property
+    def porta(self):
+        return self.servidor.server_address[1]
+
+    @property
+    def mensagens(self):
+        return self.servidor.mensagens
+
+    def iniciar(self):
+        self.thread.start()
+        return self
+
+    def parar(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
@@ -0,0 +1,43 @@
+import io
+from datetime import date
+
+import pytest
+
+from arquivo_mensal import arquivar_meses_fechados, caminho_pdf_diario, guardar_pdf_diario, ler_pdf_diario
+from banco_registros import conectar, salvar_registro
+from registro_modelo import Registro
+
+
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    # As pastas de PDFs e pacotes são relativas à pasta de trabalho
+    monkeypatch.chdir(tmp_path)
+    conn = conectar(":memory:")
+    yield conn
+    conn.close()
+
+
+def _diario(conn, obra, data):
+    salvar_registro(conn, Registro(obra=obra, data=data, contrato="001/2024", servicos="Alvenaria"))
+    conteudo = f"%PDF-1.4 {obra} {data.isoformat()}".encode()
+    guardar_pdf_diario(io.BytesIO(conteudo), obra, data)
+    return conteudo
+
+
+def test_pdf_do_mes_aberto_e_do_mes_arquivado(conn):
+    fechado = _diario(conn, "Obra A", date(2024, 4, 30))
+    aberto = _diario(conn, "Obra A", date(2024, 5, 2))
+
+    resultados = arquivar_meses_fechados(conn, hoje=date(2024, 5, 15))
+    assert [(r["obra"], r["mes"]) for r in resultados] == [("Obra A", "2024-04")]
+    # A cópia solta do mês arquivado sai do disco; a leitura vem do pacote
+    assert not caminho_pdf_diario("Obra A", date(2024, 4, 30)).exists()
+    assert ler_pdf_diario(conn, "Obra A", date(2024, 4, 30)) == fechado
+    assert ler_pdf_diario(conn, "Obra A", date(2024, 5, 2)) == aberto
+
+
+def test_pdf_inexistente(conn):
+    salvar_registro(conn, Registro(obra="Obra A", data=date(2024, 4, 10), contrato="001/2024"))
+    arquivar_meses_fechados(conn, hoje=date(2024, 5, 15))
+    assert ler_pdf_diario(conn, "Obra A", date(2024, 4, 10)) is None
+    assert ler_pdf_diario(conn, "Obra B", date(2024, 4, 10)) is None
@@ -0,0 +1,80 @@
+from datetime import date
+
+import pytest
+
+from banco_registros import conectar, salvar_registro, carregar_registro
+from horas_trabalhadas import consultar_horas, recalcular_agregados, calcular_horas
+from registro_modelo import Registro, EntradaEfetivo
+
+
+@pytest.fixture
+def conn():
+    conn = conectar(":memory:")
+    yield conn
+    conn.close()
+
+
+def _registro(obra, data, efetivo, contrato="001/2024"):
+    return Registro(obra=obra, data=data, contrato=contrato, servicos="Alvenaria",
+                    efetivo=[EntradaEfetivo(*item) for item in efetivo])
+
+
+def _agregados(conn):
+    return sorted(conn.execute("SELECT obra, contrato, funcao, dia, horas, pessoas FROM horas_agregadas"))
+
+
+def test_calcular_horas_turno_noturno_e_invalido():
+    assert calcular_horas("07:00", "17:00") == 10
+    assert calcular_horas("22:00", "06:00") == 8
+    assert calcular_horas("", "17:00") == 0
+
+
+def test_agregados_incrementais_batem_com_recalculo(conn):
+    salvar_registro(conn, _registro("Obra A", date(2024, 5, 2), [
+        ("Ana", "PEDREIRO", "07:00", "17:00"),
+        ("Bruno", "PEDREIRO", "07:00", "16:00"),
+        ("Caio", "SERVENTE", "22:00", "06:00"),
+    ]))
+    salvar_registro(conn, _registro("Obra A", date(2024, 5, 3), [("Ana", "PEDREIRO", "07:00", "12:00")]))
+    salvar_registro(conn, _registro("Obra B", date(2024, 5, 3), [("Davi", "ARMADOR", "08:00", "17:00")],
+                                    contrato="002/2024"))
+    # Reenvio do mesmo dia: o anterior sai dos agregados (-1) antes do novo entrar (+1)
+    salvar_registro(conn, _registro("Obra A", date(2024, 5, 2), [
+        ("Ana", "PEDREIRO", "07:00", "17:00"),
+        ("Edu", "CARPINTEIRO", "07:00", "11:00"),
+    ]))
+    incrementais = _agregados(conn)
+    assert ("Obra A", "001/2024", "SERVENTE", "2024-05-02", 8.0, 1) not in incrementais
+    assert ("Obra A", "001/2024", "PEDREIRO", "2024-05-02", 10.0, 1) in incrementais
+
+    recalcular_agregados(conn)
+    assert _agregados(conn) == incrementais
+
+
+def test_reenvio_sem_efetivo_remove_agregados_do_dia(conn):
+    data = date(2024, 5, 2)
+    salvar_registro(conn, _registro("Obra A", data, [("Ana", "PEDREIRO", "07:00", "17:00")]))
+    salvar_registro(conn, _registro("Obra A", data, []))
+    assert _agregados(conn) == []
+    assert conn.execute("SELECT COUNT(*) FROM registros").fetchone()[0] == 1
+
+
+def test_consultar_horas_agrupa_por_mes(conn):
+    salvar_registro(conn, _registro("Obra A", date(2024, 5, 2), [("Ana", "PEDREIRO", "07:00", "17:00")]))
+    salvar_registro(conn, _registro("Obra A", date(2024, 5, 20), [("Ana", "PEDREIRO", "07:00", "15:00")]))
+    colunas, linhas = consultar_horas(conn, ["Obra", "Mês"])
+    assert colunas == ["Obra", "Mês", "Horas", "Pessoas-dia"]
+    assert linhas == [("Obra A", "2024-05", 18.0, 2)]
+
+
+def test_carregar_registro_devolve_o_que_foi_salvo(conn):
+    registro = _registro("Obra A", date(2024, 5, 2), [("Ana", "PEDREIRO", "07:00", "17:00")])
+    registro_id = salvar_registro(conn, registro)
+    carregado = carregar_registro(conn, registro_id)
+    assert carregado.obra == "Obra A"
+    assert carregado.data == date(2024, 5, 2)
+    assert carregado.servicos == "Alvenaria"
+    assert [(e.nome, e.funcao, e.entrada, e.saida) for e in carregado.efetivo] == [
+        ("Ana", "PEDREIRO", "07:00", "17:00")
+    ]
+    assert carregar_registro(conn, registro_id + 1) is None
@@ -0,0 +1,80 @@
+import sqlite3
+from datetime import date
+
+import pytest
+
+from banco_registros import conectar, salvar_registro, SQL_CRIAR_REGISTROS
+from busca_registros import buscar_registros, criar_indice_busca, destacar_snippet, montar_consulta_fts
+from registro_modelo import Registro
+
+
+@pytest.fixture
+def conn():
+    conn = conectar(":memory:")
+    yield conn
+    conn.close()
+
+
+def _salvar(conn, obra, dia, servicos, ocorrencias=""):
+    return salvar_registro(conn, Registro(obra=obra, data=date(2024, 5, dia), contrato="001",
+                                          servicos=servicos, ocorrencias=ocorrencias))
+
+
+def _ids(resultados):
+    return [linha[0] for linha in resultados]
+
+
+def test_consulta_com_prefixo_e_sem_sintaxe_fts():
+    assert montar_consulta_fts('laje "NEAR(') == '"laje"* "NEAR"*'
+    assert montar_consulta_fts("  ") == ""
+
+
+def test_busca_ignora_acentos_e_usa_prefixo(conn):
+    registro_id = _salvar(conn, "Obra A", 1, "Concretagem da laje do 2º pavimento")
+    _salvar(conn, "Obra A", 2, "Alvenaria de vedação")
+    assert _ids(buscar_registros(conn, "concret")) == [registro_id]
+    assert _ids(buscar_registros(conn, "vedacao")) != []
+    assert buscar_registros(conn, "") == []
+
+
+def test_gatilhos_acompanham_reenvio_e_exclusao(conn):
+    registro_id = _salvar(conn, "Obra A", 1, "Concretagem da laje")
+    # Reenvio do mesmo dia troca o texto indexado
+    _salvar(conn, "Obra A", 1, "Montagem de formas", "Chuva forte à tarde")
+    assert buscar_registros(conn, "concretagem") == []
+    assert _ids(buscar_registros(conn, "formas")) == [registro_id]
+    assert _ids(buscar_registros(conn, "chuva")) == [registro_id]
+    with conn:
+        conn.execute("DELETE FROM registros WHERE id = ?", (registro_id,))
+    assert buscar_registros(conn, "formas") == []
+
+
+def test_filtros_de_obra_e_periodo(conn):
+    _salvar(conn, "Obra A", 1, "Pintura externa")
+    id_b = _salvar(conn, "Obra B", 10, "Pintura interna")
+    assert _ids(buscar_registros(conn, "pintura", obra="Obra B")) == [id_b]
+    assert _ids(buscar_registros(conn, "pintura", data_inicio=date(2024, 5, 5))) == [id_b]
+    assert _ids(buscar_registros(conn, "pintura", data_fim=date(2024, 5, 5))) != [id_b]
+
+
+def test_indice_criado_depois_indexa_registros_existentes():
+    conn = sqlite3.connect(":memory:")
+    conn.execute(SQL_CRIAR_REGISTROS)
+    conn.execute(
+        "INSERT INTO registros (obra, data, contrato, servicos, ocorrencias, atualizado_em) "
+        "VALUES ('Obra A', '2024-05-01', '001', 'Impermeabilização da cobertura', '', '2024-05-01T18:00:00')"
+    )
+    criar_indice_busca(conn)
+    # Uma segunda chamada (a cada conexão) não reconstrói nem duplica nada
+    criar_indice_busca(conn)
+    assert len(buscar_registros(conn, "impermeabilizacao")) == 1
+    conn.close()
+
+
+def test_snippet_escapa_html_e_destaca_termos(conn):
+    _salvar(conn, "Obra A", 1, "Laje <script>alert(1)</script> concretada")
+    snippet = buscar_registros(conn, "laje")[0][3]
+    destacado = destacar_snippet(snippet)
+    assert "<script>" not in destacado
+    assert "&lt;script&gt;" in destacado
+    assert "<mark>Laje</mark>" in destacado
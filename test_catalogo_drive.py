@@ -0,0 +1,192 @@
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+import catalogo_drive
+from catalogo_drive import (
+    MIME_PASTA, arquivo_no_catalogo, conectar_catalogo, listar_diarios_no_drive, registrar_arquivo,
+    remover_arquivo, sincronizar_catalogo
+)
+
+RAIZ = "raiz"
+
+
+class _Pedido:
+    def __init__(self, resposta):
+        self.resposta = resposta
+
+    def execute(self):
+        if isinstance(self.resposta, Exception):
+            raise self.resposta
+        return self.resposta
+
+
+class _Arquivos:
+    def __init__(self, drive):
+        self.drive = drive
+
+    def list(self, q, pageSize, pageToken=None, **_):
+        pai = q.split("'")[1]
+        filhos = [dict(a) for a in self.drive.arquivos.values() if a["parents"] == [pai] and not a["trashed"]]
+        inicio = int(pageToken or 0)
+        resposta = {"files": filhos[inicio:inicio + pageSize]}
+        if inicio + pageSize < len(filhos):
+            resposta["nextPageToken"] = str(inicio + pageSize)
+        return _Pedido(resposta)
+
+
+class _Alteracoes:
+    def __init__(self, drive):
+        self.drive = drive
+
+    def getStartPageToken(self, **_):
+        return _Pedido({"startPageToken": str(len(self.drive.alteracoes))})
+
+    def list(self, pageToken, pageSize, **_):
+        if self.drive.erro_alteracoes:
+            return _Pedido(self.drive.erro_alteracoes)
+        inicio = int(pageToken)
+        resposta = {"changes": self.drive.alteracoes[inicio:inicio + pageSize]}
+        if inicio + pageSize < len(self.drive.alteracoes):
+            resposta["nextPageToken"] = str(inicio + pageSize)
+        else:
+            resposta["newStartPageToken"] = str(len(self.drive.alteracoes))
+        return _Pedido(resposta)
+
+
+class DriveFalso:
+    # Só o que catalogo_drive usa: files().list por pasta e a API changes
+    def __init__(self):
+        self.arquivos = {}
+        self.alteracoes = []
+        self.erro_alteracoes = None
+
+    def files(self):
+        return _Arquivos(self)
+
+    def changes(self):
+        return _Alteracoes(self)
+
+    def _alterar(self, arquivo_id):
+        self.alteracoes.append({"fileId": arquivo_id, "removed": False, "file": dict(self.arquivos[arquivo_id])})
+
+    def criar(self, arquivo_id, nome, pai=RAIZ, mime="application/pdf"):
+        self.arquivos[arquivo_id] = {"id": arquivo_id, "name": nome, "mimeType": mime, "parents": [pai],
+                                     "size": "100", "modifiedTime": "2024-05-02T18:00:00.000Z", "trashed": False}
+        self._alterar(arquivo_id)
+        return arquivo_id
+
+    def pasta(self, arquivo_id, nome, pai=RAIZ):
+        return self.criar(arquivo_id, nome, pai, MIME_PASTA)
+
+    def atualizar(self, arquivo_id, **campos):
+        self.arquivos[arquivo_id].update(campos)
+        self._alterar(arquivo_id)
+
+
+def _erro_http(status):
+    return HttpError(httplib2.Response({"status": status}), b"")
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = conectar_catalogo(str(tmp_path / "drive_cache.db"))
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def drive(monkeypatch):
+    # Páginas pequenas para passar pela paginação da listagem e das alterações
+    monkeypatch.setattr(catalogo_drive, "TAMANHO_PAGINA", 2)
+    drive = DriveFalso()
+    drive.pasta("obra_a", "Obra A")
+    drive.pasta("ano", "2024", "obra_a")
+    drive.pasta("mes", "05", "ano")
+    drive.criar("pdf_1", "Diario_Obra_A_2024-05-02.pdf", "mes")
+    drive.criar("pdf_2", "Diario_Obra_A_2024-05-03.pdf", "mes")
+    drive.criar("foto_1", "Obra_A_2024-05-02_foto1_reduzida.jpg", "mes", "image/jpeg")
+    # PDF antigo enviado direto na raiz: obra e data vêm do nome
+    drive.criar("legado", "Diario_Obra_B_2024-04-01.pdf")
+    return drive
+
+
+def _diarios(conn):
+    return sorted((linha[0], linha[2], linha[3]) for linha in listar_diarios_no_drive(conn))
+
+
+def _caminho(conn, arquivo_id):
+    linha = conn.execute("SELECT caminho FROM drive_catalogo WHERE id = ?", (arquivo_id,)).fetchone()
+    return linha[0] if linha else None
+
+
+def test_primeira_sincronizacao_lista_a_arvore(conn, drive):
+    resumo = sincronizar_catalogo(conn, drive, RAIZ)
+    assert resumo == {"completa": True, "gravados": 7, "removidos": 0}
+    assert _diarios(conn) == [("legado", "Obra B", "2024-04-01"), ("pdf_1", "Obra A", "2024-05-02"),
+                              ("pdf_2", "Obra A", "2024-05-03")]
+    assert _caminho(conn, "foto_1") == "Obra A/2024/05/Obra_A_2024-05-02_foto1_reduzida.jpg"
+    assert arquivo_no_catalogo(conn, "ano", "05", MIME_PASTA) == "mes"
+
+
+def test_alteracoes_incrementais(conn, drive):
+    sincronizar_catalogo(conn, drive, RAIZ)
+    # Arquivo chega antes da pasta dele na lista de alterações
+    drive.arquivos["obra_c"] = {"id": "obra_c", "name": "Obra C", "mimeType": MIME_PASTA, "parents": [RAIZ],
+                                "trashed": False}
+    drive.criar("pdf_c", "Diario_Obra_C_2024-05-04.pdf", "obra_c")
+    drive._alterar("obra_c")
+    drive.atualizar("pdf_2", trashed=True)
+    drive.atualizar("obra_a", name="Obra A - Bloco 1")
+    drive.atualizar("legado", parents=["fora_da_raiz"])
+
+    resumo = sincronizar_catalogo(conn, drive, RAIZ)
+    assert resumo == {"completa": False, "gravados": 3, "removidos": 2}
+    assert _diarios(conn) == [("pdf_1", "Obra A - Bloco 1", "2024-05-02"), ("pdf_c", "Obra C", "2024-05-04")]
+    assert _caminho(conn, "foto_1") == "Obra A - Bloco 1/2024/05/Obra_A_2024-05-02_foto1_reduzida.jpg"
+
+    # Sem novas alterações, nada muda
+    assert sincronizar_catalogo(conn, drive, RAIZ) == {"completa": False, "gravados": 0, "removidos": 0}
+
+
+def test_pasta_apagada_leva_o_conteudo(conn, drive):
+    sincronizar_catalogo(conn, drive, RAIZ)
+    drive.alteracoes.append({"fileId": "ano", "removed": True})
+    resumo = sincronizar_catalogo(conn, drive, RAIZ)
+    assert resumo["removidos"] == 5
+    assert _diarios(conn) == [("legado", "Obra B", "2024-04-01")]
+
+
+@pytest.mark.parametrize("status", [400, 404, 410])
+def test_token_invalido_refaz_a_listagem_completa(conn, drive, status):
+    sincronizar_catalogo(conn, drive, RAIZ)
+    drive.criar("pdf_3", "Diario_Obra_A_2024-05-06.pdf", "mes")
+    drive.erro_alteracoes = _erro_http(status)
+    resumo = sincronizar_catalogo(conn, drive, RAIZ)
+    assert resumo["completa"] is True
+    assert ("pdf_3", "Obra A", "2024-05-06") in _diarios(conn)
+    # O novo token vem da listagem completa e a próxima sincronização é incremental
+    drive.erro_alteracoes = None
+    assert sincronizar_catalogo(conn, drive, RAIZ)["completa"] is False
+
+
+def test_outros_erros_sobem_e_mantem_o_token(conn, drive):
+    sincronizar_catalogo(conn, drive, RAIZ)
+    token = conn.execute("SELECT page_token FROM drive_sincronia").fetchone()[0]
+    drive.erro_alteracoes = _erro_http(500)
+    with pytest.raises(HttpError):
+        sincronizar_catalogo(conn, drive, RAIZ)
+    assert conn.execute("SELECT page_token FROM drive_sincronia").fetchone()[0] == token
+    assert len(_diarios(conn)) == 3
+
+
+def test_registrar_e_remover_arquivo(conn, drive):
+    sincronizar_catalogo(conn, drive, RAIZ)
+    assert registrar_arquivo(conn, RAIZ, {"id": "novo", "name": "Diario_Obra_A_2024-05-09.pdf",
+                                          "mimeType": "application/pdf", "parents": ["mes"]})
+    assert ("novo", "Obra A", "2024-05-09") in _diarios(conn)
+    # Pasta-mãe desconhecida: fica de fora
+    assert not registrar_arquivo(conn, RAIZ, {"id": "solto", "name": "x.pdf", "parents": ["desconhecida"]})
+    assert remover_arquivo(conn, "obra_a") == 7
+    assert remover_arquivo(conn, "obra_a") == 0
+    assert _diarios(conn) == [("legado", "Obra B", "2024-04-01")]
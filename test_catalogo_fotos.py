@@ -0,0 +1,103 @@
+import sqlite3
+from datetime import date
+
+import pytest
+from PIL import Image as PILImage
+
+from catalogo_fotos import (
+    IFD_EXIF, IFD_GPS, TAG_DATA_HORA_ORIGINAL, TAG_ORIENTACAO, TAMANHOS_MINIATURA,
+    caminho_foto, catalogar_fotos, contar_fotos, criar_tabela_fotos, listar_fotos, metadados_exif
+)
+
+
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    # PASTA_CATALOGO é relativa à pasta de trabalho
+    monkeypatch.chdir(tmp_path)
+    conn = sqlite3.connect(":memory:")
+    criar_tabela_fotos(conn)
+    yield conn
+    conn.close()
+
+
+def _exif():
+    exif = PILImage.Exif()
+    exif[TAG_ORIENTACAO] = 6
+    exif.get_ifd(IFD_EXIF)[TAG_DATA_HORA_ORIGINAL] = "2024:05:02 10:30:15"
+    exif.get_ifd(IFD_GPS).update({1: "S", 2: (23.0, 30.0, 0.0), 3: "W", 4: (46.0, 37.0, 48.0)})
+    return exif
+
+
+def _foto(caminho, tamanho=(1200, 900), cor="gray"):
+    PILImage.new("RGB", tamanho, cor).save(caminho, "JPEG", quality=85)
+    return str(caminho)
+
+
+def _meta():
+    return {"capturada_em": None, "latitude": None, "longitude": None, "orientacao": None}
+
+
+def test_exif_do_navegador_em_bytes():
+    meta = metadados_exif(_exif().tobytes())
+    assert meta["capturada_em"] == "2024-05-02T10:30:15"
+    assert meta["orientacao"] == 6
+    assert meta["latitude"] == pytest.approx(-23.5)
+    assert meta["longitude"] == pytest.approx(-(46 + 37 / 60 + 48 / 3600))
+
+
+def test_exif_da_imagem_aberta_no_servidor(tmp_path):
+    caminho = tmp_path / "com_exif.jpg"
+    PILImage.new("RGB", (64, 48)).save(caminho, "JPEG", exif=_exif())
+    with PILImage.open(caminho) as img:
+        meta = metadados_exif(img.getexif())
+    assert meta["capturada_em"] == "2024-05-02T10:30:15"
+    assert meta["orientacao"] == 6
+
+
+@pytest.mark.parametrize("origem", [b"", b"Exif\x00\x00lixo", PILImage.Exif()])
+def test_exif_ausente_ou_invalido(origem):
+    assert metadados_exif(origem) == _meta()
+
+
+def test_piramide_de_miniaturas_e_original(conn, tmp_path):
+    foto = _foto(tmp_path / "foto1.jpg")
+    catalogar_fotos(conn, "Obra A", date(2024, 5, 2), [foto], [_meta()])
+    hash_foto = conn.execute("SELECT hash FROM fotos").fetchone()[0]
+    assert caminho_foto(hash_foto).read_bytes() == open(foto, "rb").read()
+    for lado in TAMANHOS_MINIATURA:
+        with PILImage.open(caminho_foto(hash_foto, lado)) as img:
+            assert max(img.size) == lado
+    assert not list((tmp_path / "static").rglob("*.parcial"))
+
+
+def test_mesma_foto_nao_duplica_nem_reprocessa(conn, tmp_path):
+    foto = _foto(tmp_path / "foto1.jpg")
+    copia = tmp_path / "copia.jpg"
+    copia.write_bytes(open(foto, "rb").read())
+    outra = _foto(tmp_path / "foto2.jpg", cor="navy")
+
+    catalogar_fotos(conn, "Obra A", date(2024, 5, 2), [foto, str(copia), outra], [_meta()] * 3)
+    assert contar_fotos(conn, "Obra A") == 2
+    hash_foto = conn.execute("SELECT hash FROM fotos WHERE nome = 'foto1.jpg'").fetchone()[0]
+    miniatura = caminho_foto(hash_foto, TAMANHOS_MINIATURA[-1])
+    modificada_em = miniatura.stat().st_mtime_ns
+
+    # Reenvio do mesmo diário e a mesma foto em outra obra: a pirâmide é reaproveitada
+    catalogar_fotos(conn, "Obra A", date(2024, 5, 2), [foto], [_meta()])
+    catalogar_fotos(conn, "Obra B", date(2024, 5, 2), [foto], [_meta()])
+    assert contar_fotos(conn, "Obra A") == 2
+    assert contar_fotos(conn, "Obra B") == 1
+    assert miniatura.stat().st_mtime_ns == modificada_em
+    assert len(list((tmp_path / "static").rglob(f"{hash_foto}*.jpg"))) == 1 + len(TAMANHOS_MINIATURA)
+
+
+def test_listar_fotos_pagina_das_mais_recentes(conn, tmp_path):
+    for dia in range(1, 6):
+        foto = _foto(tmp_path / f"dia{dia}.jpg", tamanho=(200, 150), cor=(dia * 40, 0, 0))
+        catalogar_fotos(conn, "Obra A", date(2024, 5, dia), [foto], [_meta()])
+    primeira = listar_fotos(conn, "Obra A", pagina=1, por_pagina=2)
+    terceira = listar_fotos(conn, "Obra A", pagina=3, por_pagina=2)
+    assert [linha[1] for linha in primeira] == ["2024-05-05", "2024-05-04"]
+    assert [linha[1] for linha in terceira] == ["2024-05-01"]
+    assert primeira[0][5:] == (200, 150)
+    assert len(listar_fotos(conn, "Obra A", data_inicio=date(2024, 5, 4))) == 2
@@ -0,0 +1,44 @@
+import re
+from datetime import date
+
+import pytest
+from reportlab import rl_config
+
+from diario_obra_flowables import gerar_pdf_fluxo
+from registro_modelo import Registro, EntradaEfetivo
+
+
+@pytest.fixture(autouse=True)
+def pdf_sem_compressao(monkeypatch):
+    # Conteúdo das páginas em texto puro, para contar cabeçalhos e linhas
+    monkeypatch.setattr(rl_config, "pageCompression", 0)
+
+
+def _gerar(registro):
+    pdf = gerar_pdf_fluxo(registro, [])
+    assert pdf is not None
+    return pdf.read()
+
+
+def _paginas(conteudo):
+    return len(re.findall(rb"/Type /Page\b", conteudo))
+
+
+def test_paragrafo_maior_que_uma_pagina_continua_na_seguinte():
+    # "Serviços" colado como um único bloco, sem quebras de linha
+    servicos = " ".join(["Concretagem da laje do pavimento tipo, eixo A-F."] * 600)
+    registro = Registro(obra="Obra Teste", data=date(2024, 5, 10), contrato="001/2024", servicos=servicos)
+    assert _paginas(_gerar(registro)) > 2
+
+
+@pytest.mark.parametrize("colaboradores, paginas_minimas", [(1, 1), (6, 1), (40, 2), (120, 3), (500, 10)])
+def test_efetivo_grande_repete_cabecalho_em_cada_pagina(colaboradores, paginas_minimas):
+    efetivo = [EntradaEfetivo(f"COLABORADOR {i:03d}", "PEDREIRO", "07:00", "17:00") for i in range(colaboradores)]
+    registro = Registro(obra="Obra Teste", data=date(2024, 5, 10), contrato="001/2024", efetivo=efetivo)
+    conteudo = _gerar(registro)
+    paginas = _paginas(conteudo)
+    assert paginas >= paginas_minimas
+    # Nenhuma linha some ou é cortada no rodapé
+    assert all(f"(COLABORADOR {i:03d})".encode() in conteudo for i in range(colaboradores))
+    # Cabeçalho da tabela (1ª ENTRADA) repetido em cada página que a tabela ocupa
+    assert conteudo.count(b"ENTRADA)") == paginas
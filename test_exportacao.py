@@ -0,0 +1,70 @@
+import csv
+from datetime import date
+
+import pytest
+
+from banco_registros import conectar, salvar_registro
+from exportacao import iterar_lotes, exportar, colunas_exportacao
+from registro_modelo import Registro, EntradaEfetivo
+
+
+@pytest.fixture
+def conn():
+    conn = conectar(":memory:")
+    for dia in range(1, 8):
+        for obra in ("Obra A", "Obra B"):
+            salvar_registro(conn, Registro(
+                obra=obra, data=date(2024, 5, dia), contrato="001/2024", servicos=f"Serviço {dia}",
+                efetivo=[EntradaEfetivo("Ana", "PEDREIRO", "07:00", "17:00"),
+                         EntradaEfetivo("Bruno", "SERVENTE", "07:00", "16:00")]
+            ))
+    yield conn
+    conn.close()
+
+
+def test_lotes_respeitam_o_tamanho_e_cobrem_tudo(conn):
+    lotes = [linhas for _, linhas in iterar_lotes(conn, "efetivo", tamanho_lote=5)]
+    assert [len(lote) for lote in lotes] == [5, 5, 5, 5, 5, 3]
+    datas = [linha[2] for lote in lotes for linha in lote]
+    assert datas == sorted(datas)
+
+
+def test_filtros_de_periodo_e_obra(conn):
+    linhas = [linha for _, lote in iterar_lotes(conn, "registros", data_inicio=date(2024, 5, 3),
+                                                data_fim=date(2024, 5, 4), obras=["Obra B"]) for linha in lote]
+    assert [(linha[1], linha[3]) for linha in linhas] == [("Obra B", "2024-05-03"), ("Obra B", "2024-05-04")]
+
+
+def test_csv_tem_cabecalho_e_todas_as_linhas(conn, tmp_path):
+    destino = tmp_path / "efetivo.csv"
+    total = exportar(conn, "efetivo", "csv", destino, obras=["Obra A"])
+    with open(destino, encoding="utf-8-sig", newline="") as f:
+        linhas = list(csv.reader(f))
+    assert total == 14
+    assert linhas[0] == colunas_exportacao(conn, "efetivo")
+    assert len(linhas) == 15
+
+
+def test_csv_vazio_so_com_cabecalho(conn, tmp_path):
+    destino = tmp_path / "vazio.csv"
+    assert exportar(conn, "registros", "csv", destino, data_inicio=date(2030, 1, 1)) == 0
+    with open(destino, encoding="utf-8-sig", newline="") as f:
+        assert list(csv.reader(f)) == [colunas_exportacao(conn, "registros")]
+
+
+def test_parquet_um_row_group_por_lote(conn, tmp_path, monkeypatch):
+    pq = pytest.importorskip("pyarrow.parquet")
+    import exportacao
+
+    # O tamanho do lote padrão é lido na chamada de iterar_lotes
+    iterar_original = exportacao.iterar_lotes
+    monkeypatch.setattr(exportacao, "iterar_lotes",
+                        lambda *args, **kwargs: iterar_original(*args, tamanho_lote=4, **kwargs))
+    destino = tmp_path / "efetivo.parquet"
+    assert exportar(conn, "efetivo", "parquet", destino) == 28
+    arquivo = pq.ParquetFile(destino)
+    assert arquivo.metadata.num_row_groups == 7
+    tabela = arquivo.read()
+    assert str(tabela.schema.field("horas").type) == "double"
+    assert str(tabela.schema.field("registro_id").type) == "int64"
+    assert sum(tabela.column("horas").to_pylist()) == 14 * 10 + 14 * 9
@@ -0,0 +1,106 @@
+import sqlite3
+
+import pytest
+
+from importacao_usuarios import (
+    criar_indice_usuarios, importar_usuarios, ler_usuarios_csv, listar_usuarios_repetidos, remover_cadastro
+)
+
+
+def _hash(senha):
+    return f"hash:{senha}"
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE userstable(username TEXT,password TEXT,role TEXT)")
+    conn.executemany("INSERT INTO userstable VALUES (?, ?, ?)",
+                     [("admin", "hash:admin123", "admin"), ("ana", "hash:ana", "user")])
+    assert criar_indice_usuarios(conn)
+    yield conn
+    conn.close()
+
+
+def _usuarios(conn):
+    return dict(conn.execute("SELECT username, role FROM userstable"))
+
+
+def _senha(conn, usuario):
+    return conn.execute("SELECT password FROM userstable WHERE username = ?", (usuario,)).fetchone()[0]
+
+
+def test_le_csv_de_colaboradores_e_com_colunas_proprias():
+    assert ler_usuarios_csv("Nome,Função\nJOÃO SILVA,PEDREIRO\n".encode("utf-8-sig")) == [
+        (2, "JOÃO SILVA", None, "user")
+    ]
+    assert ler_usuarios_csv("usuario,senha,perfil\nbia,segredo,ADMIN\n") == [(2, "bia", "segredo", "admin")]
+    with pytest.raises(ValueError):
+        ler_usuarios_csv("email\nx@y\n")
+
+
+def test_insere_novos_e_reporta_conflitos(conn):
+    resultado = importar_usuarios(conn, [
+        (2, "bruno", "senha1", "user"),
+        (3, "carla", None, "user"),
+        (4, "ana", None, "user"),
+        (5, "bruno", None, "user"),
+        (6, "", None, "user"),
+        (7, "davi", None, "gerente"),
+    ], _hash)
+    assert resultado["inseridos"] == 2
+    assert resultado["atualizados"] == 0
+    assert [motivo for _, _, motivo in resultado["conflitos"]] == [
+        "já cadastrado", "repetido no arquivo", "usuário vazio", "perfil inválido 'gerente'"
+    ]
+    assert _senha(conn, "bruno") == "hash:senha1"
+    [(usuario, senha)] = resultado["senhas_geradas"]
+    assert usuario == "carla" and _senha(conn, "carla") == _hash(senha)
+
+
+def test_atualizar_existentes_mantem_senha_sem_nova(conn):
+    resultado = importar_usuarios(conn, [(2, "ana", None, "admin")], _hash,
+                                  atualizar_existentes=True, usuario_atual="admin")
+    assert resultado["atualizados"] == 1
+    assert _usuarios(conn)["ana"] == "admin"
+    assert _senha(conn, "ana") == "hash:ana"
+
+
+def test_importacao_nao_altera_o_usuario_logado(conn):
+    resultado = importar_usuarios(conn, [(2, "admin", "nova", "user")], _hash,
+                                  atualizar_existentes=True, usuario_atual="admin")
+    assert resultado["atualizados"] == 0
+    assert resultado["conflitos"] == [(2, "admin", "usuário logado não é alterado pela importação")]
+    assert _usuarios(conn)["admin"] == "admin"
+    assert _senha(conn, "admin") == "hash:admin123"
+
+
+def test_ultimo_admin_nao_perde_o_perfil(conn):
+    resultado = importar_usuarios(conn, [(2, "admin", None, "user")], _hash, atualizar_existentes=True)
+    assert resultado["conflitos"] == [(2, "admin", "último admin não pode perder o perfil")]
+    assert _usuarios(conn)["admin"] == "admin"
+
+    # Com outro admin (promovido no mesmo arquivo), o rebaixamento passa
+    resultado = importar_usuarios(conn, [(2, "ana", None, "admin"), (3, "admin", None, "user")], _hash,
+                                  atualizar_existentes=True)
+    assert resultado["conflitos"] == []
+    assert _usuarios(conn) == {"admin": "user", "ana": "admin"}
+
+
+def test_repetidos_antigos_sem_indice_e_remocao_pelo_admin():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE userstable(username TEXT,password TEXT,role TEXT)")
+    conn.executemany("INSERT INTO userstable VALUES (?, ?, ?)",
+                     [("ana", "h1", "user"), ("ana", "h2", "admin"), ("bia", "h3", "user")])
+    # Nada é apagado automaticamente: o índice espera o admin resolver
+    assert not criar_indice_usuarios(conn)
+    repetidos = listar_usuarios_repetidos(conn)
+    assert [(usuario, perfil) for _, usuario, perfil in repetidos] == [("ana", "user"), ("ana", "admin")]
+    remover_cadastro(conn, repetidos[0][0])
+    # O último cadastro de um usuário nunca é removido
+    remover_cadastro(conn, repetidos[1][0])
+    assert list(conn.execute("SELECT username, role FROM userstable ORDER BY username")) == [
+        ("ana", "admin"), ("bia", "user")
+    ]
+    assert criar_indice_usuarios(conn)
+    conn.close()
@@ -0,0 +1,268 @@
+import argparse
+import functools
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+# Teste de carga ponta a ponta: executa o app.py real sem navegador (AppTest do
+# Streamlit) em N sessões simultâneas. Cada sessão faz login, preenche o diário
+# com M colaboradores e K fotos e envia para um Drive e um SMTP locais
+# (servidores_locais.py). Ao final mostra vazão, percentis de latência por
+# etapa e o crescimento de memória do processo.
+#
+#   python teste_carga.py --sessoes 10 --colaboradores 12 --fotos 6
+
+PASTA_APP = Path(__file__).resolve().parent
+ARQUIVOS_APP = ["obras.csv", "contratos.csv", "LOGO RDV AZUL.jpeg", "LOGO_RDV_AZUL-sem fundo.png"]
+ETAPAS = ["login", "fotos", "pdf", "registro", "catalogo", "drive", "email", "envio_total"]
+CHAVE_TEMPOS_ENVIO = "_tempos_envio"
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            paginas = int(f.read().split()[1])
+        return paginas * os.sysconf("SC_PAGE_SIZE") / 1048576
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentil(valores, p):
+    if not valores:
+        return float("nan")
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, max(0, round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+
+def gerar_fotos(quantidade, largura):
+    from PIL import Image as PILImage
+    from upload_fotos import FotoRedimensionada
+
+    altura = largura * 3 // 4
+    fotos = []
+    for i in range(quantidade):
+        # Ruído em baixa resolução ampliado: JPEG com tamanho próximo ao de uma foto real
+        base = PILImage.frombytes("RGB", (64, 48), os.urandom(64 * 48 * 3))
+        img = base.resize((largura, altura), PILImage.Resampling.BILINEAR)
+        buffer = io.BytesIO()
+        img.save(buffer, "JPEG", quality=90)
+        fotos.append((f"foto_{i+1}.jpg", buffer.getvalue()))
+    return [lambda nome=nome, dados=dados: FotoRedimensionada(nome, dados) for nome, dados in fotos]
+
+
+def substituir_upload_fotos(fabricas_fotos):
+    # O AppTest não opera o componente de upload do navegador: o app.py passa
+    # a receber as fotos geradas, como se o navegador já as tivesse reduzido.
+    # O app importa a função a cada execução do script, então basta trocá-la
+    # no módulo já carregado.
+    import upload_fotos
+
+    def upload_fotos_teste(rotulo, key):
+        return [fabrica() for fabrica in fabricas_fotos]
+
+    upload_fotos.upload_fotos_navegador = upload_fotos_teste
+
+
+def substituir_drive(drive):
+    # O app.py continua exigindo st.secrets["google_service_account"]; aqui as
+    # credenciais viram um marcador e o serviço do Drive aponta para o local
+    import drive_arquivos
+
+    drive_arquivos.credenciais_drive = lambda info_conta_servico: "drive-local"
+    drive_arquivos.criar_servico_drive = drive.criar_servico
+
+
+def medir_etapas():
+    # Tempo de cada etapa do envio sem instrumentar o app.py: as funções que o
+    # script importa a cada execução são trocadas nos módulos por versões que
+    # anotam a duração na sessão. Chamadas fora de uma execução do script
+    # (aquecimento, limpeza) não são medidas.
+    import streamlit as st
+    import yagmail
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    import banco_registros
+    import catalogo_fotos
+    import diario_obra_flowables
+    import drive_arquivos
+
+    def medida(etapa, funcao):
+        @functools.wraps(funcao)
+        def funcao_medida(*args, **kwargs):
+            if get_script_run_ctx() is None:
+                return funcao(*args, **kwargs)
+            inicio = time.perf_counter()
+            tempos = st.session_state.setdefault(CHAVE_TEMPOS_ENVIO, {})
+            tempos.setdefault(f"inicio_{etapa}", inicio)
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                tempos[etapa] = time.perf_counter() - inicio
+        return funcao_medida
+
+    diario_obra_flowables.gerar_pdf_fluxo = medida("pdf", diario_obra_flowables.gerar_pdf_fluxo)
+    banco_registros.salvar_registro = medida("registro", banco_registros.salvar_registro)
+    catalogo_fotos.catalogar_fotos = medida("catalogo", catalogo_fotos.catalogar_fotos)
+    drive_arquivos.enviar_diario = medida("drive", drive_arquivos.enviar_diario)
+    yagmail.SMTP.send = medida("email", yagmail.SMTP.send)
+
+
+def tempos_envio(at, inicio):
+    tempos = dict(at.session_state[CHAVE_TEMPOS_ENVIO]) if CHAVE_TEMPOS_ENVIO in at.session_state else {}
+    # As fotos são processadas no script antes do PDF: a etapa vai do clique
+    # até o início do PDF (inclui a reexecução do formulário até o botão)
+    if "inicio_pdf" in tempos:
+        tempos["fotos"] = tempos["inicio_pdf"] - inicio
+    return {etapa: tempo for etapa, tempo in tempos.items() if not etapa.startswith("inicio_")}
+
+
+def preparar_pasta_trabalho(qtd_colaboradores):
+    pasta = Path(tempfile.mkdtemp(prefix="teste_carga_"))
+    for nome in ARQUIVOS_APP:
+        if (PASTA_APP / nome).exists():
+            shutil.copy(PASTA_APP / nome, pasta / nome)
+    with open(pasta / "colaboradores.csv", "w", encoding="utf-8") as f:
+        f.write("Nome,Função\n")
+        for i in range(max(qtd_colaboradores, 1)):
+            funcao = random.choice(["PEDREIRO", "SERVENTE DE OBRAS", "CARPINTEIRO", "ARMADOR"])
+            f.write(f'"COLABORADOR TESTE {i+1:03d}","{funcao}"\n')
+    return pasta
+
+
+def _por_rotulo(widgets, rotulo):
+    for widget in widgets:
+        if widget.label == rotulo:
+            return widget
+    raise LookupError(f"Widget '{rotulo}' não encontrado")
+
+
+def _erros(at):
+    erros = [str(e.value) for e in at.exception]
+    erros += [e.value for e in at.error]
+    return erros
+
+
+def executar_sessao(indice, args, config_email, resultados, lock):
+    from streamlit.testing.v1 import AppTest
+
+    tempos = []
+    erros = []
+    try:
+        at = AppTest.from_file(str(PASTA_APP / "app.py"), default_timeout=args.timeout)
+        at.secrets["google_service_account"] = {"type": "service_account"}
+        at.secrets["email"] = config_email
+        at.run()
+
+        inicio = time.perf_counter()
+        at.text_input(key="login_username").input("admin")
+        at.text_input(key="login_password").input("admin123")
+        _por_rotulo(at.button, "Entrar").click().run()
+        tempo_login = time.perf_counter() - inicio
+        if not at.session_state["logged_in"]:
+            raise RuntimeError(f"login falhou: {_erros(at)}")
+
+        for envio in range(args.envios):
+            # Cada sessão/envio usa um dia diferente (um diário por obra e dia)
+            data_diario = date.today() - timedelta(days=indice * args.envios + envio)
+            _por_rotulo(at.selectbox, "Obra").select_index(1)
+            _por_rotulo(at.selectbox, "Contrato").select_index(1)
+            _por_rotulo(at.date_input, "Data").set_value(data_diario)
+            _por_rotulo(at.text_input, "Local").input("Teste de carga")
+            _por_rotulo(at.text_area, "Serviços executados no dia").input("Concretagem da laje. " * 20)
+            _por_rotulo(at.text_area, "Ocorrências").input("Sem ocorrências relevantes.")
+            _por_rotulo(at.text_input, "Responsável pela empresa").input(f"Sessão {indice}")
+            _por_rotulo(at.number_input, "Quantos colaboradores hoje?").set_value(args.colaboradores)
+            at.run()
+            for i in range(args.colaboradores):
+                at.selectbox(key=f"colab_nome_reativo_{i}").select_index(i + 1)
+            at.run()
+
+            at.session_state[CHAVE_TEMPOS_ENVIO] = {}
+            inicio = time.perf_counter()
+            _por_rotulo(at.button, "Salvar e Gerar Relatório").click().run()
+            etapas = tempos_envio(at, inicio)
+            etapas["envio_total"] = time.perf_counter() - inicio
+            if envio == 0:
+                etapas["login"] = tempo_login
+            tempos.append(etapas)
+            erros.extend(_erros(at))
+    except Exception as e:
+        erros.append(f"{type(e).__name__}: {e}")
+    with lock:
+        resultados.append({"sessao": indice, "tempos": tempos, "erros": erros})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do app.py com Drive e SMTP locais.")
+    parser.add_argument("--sessoes", type=int, default=5, help="Sessões simultâneas (N)")
+    parser.add_argument("--colaboradores", type=int, default=8, help="Colaboradores por diário (M)")
+    parser.add_argument("--fotos", type=int, default=4, help="Fotos por diário (K)")
+    parser.add_argument("--envios", type=int, default=1, help="Diários enviados por sessão")
+    parser.add_argument("--largura-foto", type=int, default=4000, help="Largura das fotos geradas (px)")
+    parser.add_argument("--timeout", type=float, default=300, help="Tempo máximo por execução do script (s)")
+    args = parser.parse_args()
+
+    from servidores_locais import DriveLocal, SMTPLocal
+
+    drive = DriveLocal().iniciar()
+    smtp = SMTPLocal().iniciar()
+    config_email = {"user": "carga@local", "password": "x", "host": smtp.host, "port": smtp.porta, "starttls": False}
+
+    pasta_original = os.getcwd()
+    pasta_trabalho = preparar_pasta_trabalho(args.colaboradores)
+    os.chdir(pasta_trabalho)
+    sys.path.insert(0, str(PASTA_APP))
+    try:
+        substituir_upload_fotos(gerar_fotos(args.fotos, args.largura_foto))
+        substituir_drive(drive)
+        medir_etapas()
+        memoria_inicial = rss_mb()
+        resultados, lock = [], threading.Lock()
+        threads = [
+            threading.Thread(target=executar_sessao,
+                             args=(i, args, config_email, resultados, lock))
+            for i in range(args.sessoes)
+        ]
+        inicio = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duracao = time.perf_counter() - inicio
+        memoria_final = rss_mb()
+    finally:
+        os.chdir(pasta_original)
+        drive.parar()
+        smtp.parar()
+        shutil.rmtree(pasta_trabalho, ignore_errors=True)
+
+    envios = [t for r in resultados for t in r["tempos"]]
+    erros = [(r["sessao"], e) for r in resultados for e in r["erros"]]
+    print(f"\nSessões: {args.sessoes}  colaboradores: {args.colaboradores}  fotos: {args.fotos}  envios/sessão: {args.envios}")
+    print(f"Envios concluídos: {len(envios)} em {duracao:.1f}s  ->  {len(envios) / duracao:.2f} envios/s")
+    print(f"Arquivos no Drive local: {len(drive.estado.arquivos)}  e-mails recebidos: {len(smtp.mensagens)}")
+    print(f"\n{'etapa':<12}{'n':>5}{'p50 (s)':>10}{'p90 (s)':>10}{'p99 (s)':>10}{'máx (s)':>10}")
+    for etapa in ETAPAS:
+        valores = [t[etapa] for t in envios if etapa in t]
+        if valores:
+            print(f"{etapa:<12}{len(valores):>5}{percentil(valores, 50):>10.2f}{percentil(valores, 90):>10.2f}"
+                  f"{percentil(valores, 99):>10.2f}{max(valores):>10.2f}")
+    print(f"\nMemória (RSS): {memoria_inicial:.0f} MB -> {memoria_final:.0f} MB "
+          f"(+{memoria_final - memoria_inicial:.0f} MB, {((memoria_final - memoria_inicial) / max(len(envios), 1)):.1f} MB/envio)")
+    if erros:
+        print(f"\n{len(erros)} erro(s):")
+        for sessao, erro in erros[:20]:
+            print(f"  sessão {sessao}: {erro}")
+    return 1 if erros else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
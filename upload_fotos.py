@@ -0,0 +1,56 @@
+import io
+import json
+import struct
+from pathlib import Path
+
+import streamlit.components.v1 as components
+
+# Mesmo limite usado por processar_fotos no servidor
+LADO_MAXIMO_FOTO = 1200
+QUALIDADE_JPEG = 0.85
+
+_componente_upload = components.declare_component(
+    "upload_fotos", path=str(Path(__file__).parent / "componentes" / "upload_fotos")
+)
+
+
+class FotoRedimensionada(io.BytesIO):
+    # Mesma interface do UploadedFile do Streamlit (name, type, getbuffer).
+    # O canvas do navegador descarta o EXIF, então o segmento original vem à
+    # parte em `exif` para o catálogo de fotos.
+    def __init__(self, nome, conteudo, tipo="image/jpeg", exif=None):
+        super().__init__(conteudo)
+        self.name = nome
+        self.type = tipo
+        self.exif = exif
+
+
+def desempacotar_fotos(pacote):
+    # Formato montado pelo componente: 4 bytes com o tamanho do cabeçalho
+    # JSON, o cabeçalho e, para cada foto, o JPEG seguido do segmento EXIF
+    (tamanho_cabecalho,) = struct.unpack_from(">I", pacote, 0)
+    pos = 4 + tamanho_cabecalho
+    fotos = []
+    for foto in json.loads(bytes(pacote[4:pos]).decode("utf-8")):
+        dados = bytes(pacote[pos:pos + foto["tamanho"]])
+        pos += foto["tamanho"]
+        exif = bytes(pacote[pos:pos + foto["exif"]])
+        pos += foto["exif"]
+        fotos.append(FotoRedimensionada(foto["nome"], dados, exif=exif))
+    return fotos
+
+
+def upload_fotos_navegador(rotulo, key):
+    # Retorna a lista de fotos já reduzidas no navegador, ou None quando o
+    # componente não carregou ou o navegador não consegue reduzir as fotos;
+    # nesse caso o chamador deve usar o st.file_uploader normal. As fotos
+    # chegam em binário; o valor JSON só informa se a redução é suportada.
+    valor = _componente_upload(
+        rotulo=rotulo, lado_maximo=LADO_MAXIMO_FOTO, qualidade=QUALIDADE_JPEG,
+        key=key, default=None
+    )
+    if isinstance(valor, (bytes, bytearray, memoryview)):
+        return desempacotar_fotos(valor)
+    if not valor or not valor.get("suportado"):
+        return None
+    return []